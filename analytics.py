@@ -0,0 +1,224 @@
+"""Векторизованная аналитика по оценкам на NumPy.
+
+Данные UniversityData один раз превращаются в колонки NumPy, после чего все
+групповые агрегаты (средние, медианы, перцентили, гистограммы) считаются
+векторными операциями без циклов Python по строкам. Колонки и результаты
+кэшируются до изменения данных (см. UniversityData.version).
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from unik import GradeTable, InvalidDataError, UniversityData
+
+# Поля, по которым можно группировать оценки
+GROUP_KEYS = ("student", "course", "faculty", "year")
+
+
+class GradeAnalytics:
+    """Кэширующий аналитический слой над UniversityData.
+
+    Все методы возвращают словари колонок NumPy одинаковой длины,
+    по одной строке на группу, например {"course_id": ..., "mean": ...}.
+    """
+
+    def __init__(self, data: UniversityData):
+        self.data = data
+        self._version = None
+        self._columns: Dict[str, np.ndarray] = {}
+        self._faculties: np.ndarray = np.empty(0, dtype=object)
+        self._results: Dict[tuple, Dict[str, np.ndarray]] = {}
+
+    # Построение колонок
+
+    def _refresh(self):
+        """Пересобирает колонки, если данные изменились с прошлого обращения"""
+        version = self.data.version
+        if version == self._version:
+            return
+        self._columns = self._build_columns()
+        self._results.clear()
+        self._version = version
+
+    def _build_columns(self) -> Dict[str, np.ndarray]:
+        grades = self.data.grades
+        if isinstance(grades, GradeTable):
+            # Колоночное хранилище отдаем в NumPy без копирования через буферный протокол
+            alive = np.frombuffer(grades._alive, dtype=np.uint8).astype(bool)
+            student_ids = np.frombuffer(grades._student_ids, dtype=np.int64)[alive]
+            course_ids = np.frombuffer(grades._course_ids, dtype=np.int64)[alive]
+            values = np.frombuffer(grades._grades, dtype=np.float64)[alive]
+        else:
+            count = len(grades)
+            student_ids = np.fromiter((g.student_id for g in grades), dtype=np.int64, count=count)
+            course_ids = np.fromiter((g.course_id for g in grades), dtype=np.int64, count=count)
+            values = np.fromiter((g.grade for g in grades), dtype=np.float64, count=count)
+
+        students = self.data.students
+        count = len(students)
+        ids = np.fromiter(students.ids(), dtype=np.int64, count=count)
+        years = np.fromiter((s.year for s in students), dtype=np.int64, count=count)
+        # Факультеты кодируем целыми числами, чтобы группировать их как числа
+        self._faculties, faculty_codes = np.unique(
+            np.array([s.faculty for s in students], dtype=object).astype(str), return_inverse=True)
+
+        # Сопоставляем каждой оценке строку студента; оценки без студента получают -1
+        student_row = np.full(len(student_ids), -1, dtype=np.int64)
+        if count:
+            order = np.argsort(ids, kind="stable")
+            sorted_ids = ids[order]
+            position = np.searchsorted(sorted_ids, student_ids)
+            position[position == count] = 0
+            found = sorted_ids[position] == student_ids
+            student_row[found] = order[position[found]]
+        found = student_row >= 0
+        faculty = np.full(len(student_ids), -1, dtype=np.int64)
+        faculty[found] = faculty_codes.reshape(-1)[student_row[found]]
+        year = np.full(len(student_ids), -1, dtype=np.int64)
+        year[found] = years[student_row[found]]
+
+        return {
+            "student_id": student_ids,
+            "course_id": course_ids,
+            "grade": values,
+            "student_row": student_row,
+            "faculty": faculty,
+            "year": year,
+        }
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Возвращает колонки оценок: student_id, course_id, grade, faculty (код), year"""
+        self._refresh()
+        return self._columns
+
+    def _cached(self, key: tuple, compute):
+        self._refresh()
+        result = self._results.get(key)
+        if result is None:
+            result = self._results[key] = compute()
+        return result
+
+    # Группировка
+
+    def _group_keys(self, by: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Возвращает (ключи оценок, маска оценок, участвующих в группировке)"""
+        if by not in GROUP_KEYS:
+            raise InvalidDataError(f"Группировка по {by!r} не поддерживается, доступны: {', '.join(GROUP_KEYS)}")
+        columns = self._columns
+        if by == "student":
+            keys = columns["student_id"]
+            return keys, np.ones(len(keys), dtype=bool)
+        if by == "course":
+            keys = columns["course_id"]
+            return keys, np.ones(len(keys), dtype=bool)
+        # Факультет и курс обучения известны только для оценок существующих студентов
+        keys = columns[by]
+        return keys, columns["student_row"] >= 0
+
+    def _label(self, by: str, groups: np.ndarray) -> Dict[str, np.ndarray]:
+        if by == "faculty":
+            return {"faculty": self._faculties[groups] if len(self._faculties) else groups.astype(str)}
+        return {f"{by}_id" if by in ("student", "course") else by: groups}
+
+    def group_statistics(self, by: str, percentiles: Sequence[float] = (25, 50, 75)) -> Dict[str, np.ndarray]:
+        """Считает count, mean, std, min, max и перцентили оценок для каждой группы.
+
+        by: "student", "course", "faculty" или "year". Перцентили считаются
+        линейной интерполяцией, как np.percentile, но сразу для всех групп.
+        """
+        percentiles = tuple(float(p) for p in percentiles)
+        return self._cached(("stats", by, percentiles), lambda: self._group_statistics(by, percentiles))
+
+    def _group_statistics(self, by: str, percentiles: Tuple[float, ...]) -> Dict[str, np.ndarray]:
+        keys, mask = self._group_keys(by)
+        values = self._columns["grade"][mask]
+        keys = keys[mask]
+
+        # Сортируем по (группа, оценка): группы становятся непрерывными отрезками
+        order = np.lexsort((values, keys))
+        keys, values = keys[order], values[order]
+        groups, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+
+        result = self._label(by, groups)
+        result["count"] = counts
+        if not len(groups):
+            for name in ("mean", "std", "min", "max"):
+                result[name] = np.empty(0)
+            for p in percentiles:
+                result[f"p{p:g}"] = np.empty(0)
+            return result
+
+        sums = np.add.reduceat(values, starts)
+        means = sums / counts
+        squares = np.add.reduceat(values * values, starts)
+        result["mean"] = means
+        result["std"] = np.sqrt(np.maximum(squares / counts - means * means, 0.0))
+        result["min"] = values[starts]
+        result["max"] = values[starts + counts - 1]
+        for p in percentiles:
+            position = (counts - 1) * (p / 100.0)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, counts - 1)
+            fraction = position - lower
+            low_values = values[starts + lower]
+            result[f"p{p:g}"] = low_values + (values[starts + upper] - low_values) * fraction
+        return result
+
+    def student_means(self) -> Dict[str, np.ndarray]:
+        """Средний балл каждого студента: student_id, count, mean"""
+        stats = self.group_statistics("student", percentiles=())
+        return {"student_id": stats["student_id"], "count": stats["count"], "mean": stats["mean"]}
+
+    def course_statistics(self, percentiles: Sequence[float] = (25, 50, 75, 90)) -> Dict[str, np.ndarray]:
+        """Статистика по курсам: среднее, медиана (p50) и перцентили"""
+        return self.group_statistics("course", percentiles)
+
+    def faculty_distribution(self, bins: int = 10, value_range: Tuple[float, float] = (0.0, 100.0)):
+        """Статистика и гистограмма оценок по факультетам"""
+        return self._distribution("faculty", bins, value_range)
+
+    def year_distribution(self, bins: int = 10, value_range: Tuple[float, float] = (0.0, 100.0)):
+        """Статистика и гистограмма оценок по курсам обучения (году)"""
+        return self._distribution("year", bins, value_range)
+
+    def _distribution(self, by: str, bins: int, value_range: Tuple[float, float]):
+        result = dict(self.group_statistics(by))
+        histogram = self.histogram(bins, value_range, by=by)
+        result["histogram"] = histogram["counts"]
+        result["edges"] = histogram["edges"]
+        return result
+
+    def histogram(self, bins: int = 10, value_range: Tuple[float, float] = (0.0, 100.0),
+                  by: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Гистограмма оценок; при указании by - отдельная строка счетчиков на группу.
+
+        Возвращает {"edges": границы, "counts": счетчики} и, при группировке,
+        колонку с ключами групп. Оценки вне value_range не учитываются.
+        """
+        key = ("histogram", by, int(bins), tuple(float(v) for v in value_range))
+        return self._cached(key, lambda: self._histogram(int(bins), value_range, by))
+
+    def _histogram(self, bins: int, value_range: Tuple[float, float], by: Optional[str]):
+        if bins <= 0:
+            raise InvalidDataError("Количество интервалов гистограммы должно быть положительным")
+        low, high = value_range
+        edges = np.linspace(low, high, bins + 1)
+        values = self._columns["grade"]
+        if by is None:
+            counts, _ = np.histogram(values, bins=edges)
+            return {"edges": edges, "counts": counts}
+
+        keys, mask = self._group_keys(by)
+        values = values[mask]
+        # Группы те же, что и в group_statistics, даже если у группы нет оценок в диапазоне
+        groups, inverse = np.unique(keys[mask], return_inverse=True)
+        # Номер интервала как у np.histogram: правая граница включается в последний интервал
+        bin_index = np.searchsorted(edges, values, side="right") - 1
+        bin_index[values == high] = bins - 1
+        in_range = (values >= low) & (values <= high)
+        flat = np.bincount(inverse.reshape(-1)[in_range] * bins + bin_index[in_range],
+                           minlength=len(groups) * bins)
+        result = self._label(by, groups)
+        result["edges"] = edges
+        result["counts"] = flat.reshape(len(groups), bins)
+        return result
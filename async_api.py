@@ -0,0 +1,135 @@
+"""Асинхронный фасад над unik для использования внутри asyncio сервиса.
+
+Загрузка, сохранение и CRUD операции выполняются в пуле потоков, поэтому
+не блокируют цикл событий. Данные открываются в потокобезопасном режиме
+(UniversityData.lock = RWLock), так как операции идут из разных потоков.
+
+Сохранения одного файла объединяются: пока запись идет, все новые вызовы
+ждут одну следующую запись, которая начнется после текущей и учтет все
+изменения. Всплеск из N обновлений с сохранением после каждого дает не
+больше двух записей файла (с save_delay > 0 - обычно одну).
+
+Отмена: отмена ожидающей корутины не прерывает общую запись, которую ждут
+другие вызовы (asyncio.shield); CRUD операция, еще не начатая в пуле,
+отменяется вместе с корутиной.
+"""
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Dict, Optional, Tuple
+
+import unik
+from unik import (NULL_LOCK, RWLock, UniversityData, UniversityDataError, load_from_json, load_from_xml,
+                  save_to_json, save_to_xml)
+
+
+class _SaveSlot:
+    """Состояние сохранения одного файла: текущая запись и следующая в очереди"""
+    __slots__ = ("running", "queued")
+
+    def __init__(self):
+        self.running: Optional[asyncio.Task] = None
+        self.queued: Optional[asyncio.Task] = None
+
+
+class AsyncUniversity:
+    """Асинхронные загрузка, сохранение и CRUD для UniversityData"""
+
+    def __init__(self, data: Optional[UniversityData] = None, executor: Optional[Executor] = None,
+                 save_delay: float = 0.0):
+        self.data = data if data is not None else UniversityData(thread_safe=True)
+        if self.data.lock is NULL_LOCK:
+            # Операции выполняются в пуле потоков, поэтому без блокировки не обойтись
+            self.data.lock = RWLock()
+        self.executor = executor
+        # Пауза перед началом записи, за которую успевают накопиться изменения
+        self.save_delay = save_delay
+        # Число фактически выполненных записей файлов
+        self.writes = 0
+        self._saves: Dict[Tuple[str, str], _SaveSlot] = {}
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    # Загрузка
+
+    @classmethod
+    async def load_json(cls, filename: str, executor: Optional[Executor] = None, **options) -> "AsyncUniversity":
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(executor, load_from_json, filename)
+        return cls(data, executor, **options)
+
+    @classmethod
+    async def load_xml(cls, filename: str, executor: Optional[Executor] = None, **options) -> "AsyncUniversity":
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(executor, load_from_xml, filename)
+        return cls(data, executor, **options)
+
+    # Сохранение с объединением вызовов
+
+    def _schedule_save(self, key: Tuple[str, str], saver) -> asyncio.Task:
+        slot = self._saves.get(key)
+        if slot is None:
+            slot = self._saves[key] = _SaveSlot()
+        if slot.queued is None:
+            slot.queued = asyncio.ensure_future(self._save_after(slot, slot.running, saver, key[1]))
+        return slot.queued
+
+    async def _save_after(self, slot: _SaveSlot, previous: Optional[asyncio.Task], saver, filename: str):
+        if previous is not None:
+            # Ждем текущую запись, не наследуя ее ошибку или отмену
+            await asyncio.wait([previous])
+        if self.save_delay:
+            await asyncio.sleep(self.save_delay)
+        # С этого момента новые вызовы должны ставить в очередь следующую запись
+        current = asyncio.current_task()
+        slot.queued, slot.running = None, current
+        try:
+            # Сохранятели unik сообщают об ошибке результатом False; исключение
+            # получат все вызовы, ожидающие эту запись
+            if not await self._run(saver, self.data, filename):
+                raise UniversityDataError(f"Не удалось сохранить {filename}")
+            self.writes += 1
+        finally:
+            if slot.running is current:
+                slot.running = None
+
+    async def save_json(self, filename: str):
+        """Сохраняет данные в JSON, объединяя одновременные вызовы.
+
+        При неудачной записи выбрасывает UniversityDataError.
+        """
+        await asyncio.shield(self._schedule_save(("json", filename), save_to_json))
+
+    async def save_xml(self, filename: str):
+        """Сохраняет данные в XML, объединяя одновременные вызовы.
+
+        При неудачной записи выбрасывает UniversityDataError.
+        """
+        await asyncio.shield(self._schedule_save(("xml", filename), save_to_xml))
+
+    async def flush(self):
+        """Дожидается завершения всех начатых и запланированных сохранений"""
+        tasks = [task for slot in self._saves.values() for task in (slot.running, slot.queued) if task is not None]
+        if tasks:
+            await asyncio.wait(tasks)
+
+
+def _async_operation(func):
+    # Асинхронная обертка над CRUD функцией unik, выполняемой в пуле потоков
+    async def operation(self, *args, **kwargs):
+        return await self._run(func, self.data, *args, **kwargs)
+
+    operation.__name__ = operation.__qualname__ = func.__name__
+    operation.__doc__ = func.__doc__
+    return operation
+
+
+for _name in ("create_student", "find_student", "update_student", "delete_student",
+              "create_professor", "find_professor", "update_professor", "delete_professor",
+              "create_course", "find_course", "update_course", "delete_course",
+              "create_many", "update_many", "delete_many",
+              "grades_for_student", "grades_for_course", "average_grade", "course_statistics"):
+    setattr(AsyncUniversity, _name, _async_operation(getattr(unik, _name)))
+del _name
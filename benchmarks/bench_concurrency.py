@@ -0,0 +1,109 @@
+"""Многопоточный стресс-тест UniversityData(thread_safe=True).
+
+Проверяет, что параллельные create_student с пересекающимися ID не создают
+дубликатов, а затем измеряет пропускную способность чтения (find_student,
+grades_for_student) при разном числе потоков, с фоновым писателем и без него.
+
+Запуск: python benchmarks/bench_concurrency.py [--students N] [--seconds S]
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from unik import UniversityData, create_many, create_student, find_student, grades_for_student, update_student
+
+
+def _build(students: int) -> UniversityData:
+    data = UniversityData(thread_safe=True)
+    create_many(data, "student", ({"id": i, "name": f"Студент {i}", "email": f"s{i}@uni.ru",
+                                   "year": i % 4 + 1, "faculty": "ИИТ"} for i in range(1, students + 1)))
+    create_many(data, "grade", ({"id": i, "student_id": i % students + 1, "course_id": i % 50 + 1,
+                                 "grade": float(i % 101)} for i in range(1, students * 5 + 1)))
+    return data
+
+
+def check_unique_inserts(threads: int = 8, ids: int = 2000):
+    """Все потоки пытаются создать одни и те же ID; успешных вставок должно быть ровно ids"""
+    data = UniversityData(thread_safe=True)
+    created = []
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        for student_id in range(1, ids + 1):
+            if create_student(data, id=student_id, name="x", email="y", year=1, faculty="z"):
+                created.append(student_id)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    ok = len(created) == ids == len(data.students) and len(set(created)) == ids
+    print(f"Уникальность при {threads} потоках: {'OK' if ok else 'ОШИБКА'} "
+          f"(вставок {len(created)}, студентов {len(data.students)})")
+    return ok
+
+
+def measure_reads(data: UniversityData, threads: int, seconds: float, with_writer: bool) -> float:
+    """Возвращает суммарное число операций чтения в секунду"""
+    students = len(data.students)
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def reader(slot: int):
+        rng = random.Random(slot)
+        done = 0
+        while not stop.is_set():
+            student_id = rng.randint(1, students)
+            find_student(data, student_id)
+            grades_for_student(data, student_id)
+            done += 1
+        counts[slot] = done
+
+    def writer():
+        rng = random.Random(-1)
+        while not stop.is_set():
+            update_student(data, rng.randint(1, students), year=rng.randint(1, 4))
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        pool = [threading.Thread(target=reader, args=(slot,)) for slot in range(threads)]
+        if with_writer:
+            pool.append(threading.Thread(target=writer))
+        for thread in pool:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in pool:
+            thread.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=50_000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    check_unique_inserts()
+    data = _build(args.students)
+    print(f"Студентов: {len(data.students)}, оценок: {len(data.grades)}")
+    for with_writer in (False, True):
+        label = "с писателем" if with_writer else "только чтение"
+        base = None
+        for threads in args.threads:
+            rate = measure_reads(data, threads, args.seconds, with_writer)
+            base = base or rate
+            print(f"{label:<14} потоков {threads:>2}: {rate:12.0f} оп/с  (x{rate / base:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Сравнение памяти, занимаемой оценками, в разных представлениях.
+
+Запуск: python benchmarks/bench_memory.py [--grades N]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from unik import Grade, GradeStore, GradeTable
+
+
+# Прежнее представление оценки: обычный класс со словарем атрибутов
+class DictGrade:
+    def __init__(self, id, student_id, course_id, grade):
+        self.id = id
+        self.student_id = student_id
+        self.course_id = course_id
+        self.grade = grade
+
+
+def _rows(count: int):
+    # Типичный набор: ~50 оценок на студента, 200 курсов, баллы 0-100
+    for i in range(1, count + 1):
+        yield i, i // 50 + 1, i % 200 + 1, float(i % 101)
+
+
+def _measure(build, count: int) -> int:
+    tracemalloc.start()
+    container = build(count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del container
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--grades", type=int, default=200_000, help="количество оценок")
+    args = parser.parse_args()
+    count = args.grades
+
+    cases = [
+        ("список объектов с __dict__", lambda n: [DictGrade(*row) for row in _rows(n)]),
+        ("список Grade со __slots__", lambda n: [Grade(*row) for row in _rows(n)]),
+        ("GradeStore (индексы по ID, студенту, курсу)", lambda n: GradeStore(Grade(*row) for row in _rows(n))),
+        ("GradeTable (колонки array)", lambda n: GradeTable(Grade(*row) for row in _rows(n))),
+    ]
+    print(f"Оценок: {count}")
+    for name, build in cases:
+        size = _measure(build, count)
+        print(f"{name:<46} {size / 2**20:9.1f} МБ  {size / count:7.1f} байт/оценка")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Замеры времени и памяти слоя данных на синтетических наборах разного размера.
+
+Для каждого размера (числа студентов) synth.generate() строит набор данных,
+после чего измеряются загрузка и сохранение JSON/XML, find_*, update_*,
+delete_* и _check_unique_id. Время приводится к одной единице работы
+(записи файла или вызову), поэтому при линейной сложности и O(1) операциях
+оно не должно расти с размером; итоговая таблица роста показывает показатель
+степени (0 - не зависит от размера, 1 - растет линейно с размером).
+
+Память - пик выделений tracemalloc за операцию, измеряется отдельным
+прогоном (трассировка замедляет код и исказила бы время).
+
+Результаты записываются в JSON; --compare сравнивает их с прошлым запуском
+и завершается с кодом 1, если есть регрессии сверх --threshold.
+
+Запуск: python benchmarks/run.py [--scales 1000 10000 100000] [--output results.json]
+                                 [--compare baseline.json] [--no-memory]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import synth
+from unik import (DuplicateIDError, UniversityData, _check_unique_id, delete_course, delete_professor,
+                  delete_student, find_course, find_professor, find_student, load_from_json, load_from_xml,
+                  save_to_json, save_to_xml, update_course, update_professor, update_student)
+
+RESULTS_FORMAT = 1
+
+# Рост времени на единицу работы, при котором операция отмечается как нелинейная:
+# 0.3 означает, что при десятикратном увеличении данных единица работы дорожает вдвое
+GROWTH_LIMIT = 0.3
+
+
+class Case:
+    """Измеряемая операция: run(data, ids) выполняет ее и возвращает число единиц работы"""
+    __slots__ = ("name", "run", "entity_type", "unit")
+
+    def __init__(self, name: str, run, entity_type: str = None, unit: str = "вызов"):
+        self.name = name
+        self.run = run
+        # Для точечных операций - тип сущности, из которого выбираются ID
+        self.entity_type = entity_type
+        self.unit = unit
+
+
+def _rows(data: UniversityData) -> int:
+    return sum(len(data.store(entity_type)) for entity_type in ("student", "professor", "course",
+                                                                "department", "grade"))
+
+
+def _cases(directory: str):
+    json_file = os.path.join(directory, "university.json")
+    xml_file = os.path.join(directory, "university.xml")
+
+    def save_json(data, _):
+        # Отметка нужна, если сохранение неизмененных данных пропускается
+        # (skip_unchanged_saves); иначе она ничего не стоит
+        data.mark_dirty()
+        save_to_json(data, json_file)
+        return _rows(data)
+
+    def save_xml(data, _):
+        data.mark_dirty()
+        save_to_xml(data, xml_file)
+        return _rows(data)
+
+    def load_json(data, _):
+        return _rows(load_from_json(json_file))
+
+    def load_xml(data, _):
+        return _rows(load_from_xml(xml_file))
+
+    def calls(function, **changes):
+        def run(data, ids):
+            for entity_id in ids:
+                function(data, entity_id, **changes)
+            return len(ids)
+        return run
+
+    def check_unique(data, ids):
+        # Половина проверок находит занятый ID, половина - свободный
+        for entity_id in ids:
+            try:
+                _check_unique_id(data, "student", entity_id)
+            except DuplicateIDError:
+                pass
+            _check_unique_id(data, "student", -entity_id)
+        return 2 * len(ids)
+
+    return [
+        Case("save_to_json", save_json, unit="запись"),
+        Case("load_from_json", load_json, unit="запись"),
+        Case("save_to_xml", save_xml, unit="запись"),
+        Case("load_from_xml", load_xml, unit="запись"),
+        Case("find_student", calls(find_student), "student"),
+        Case("find_professor", calls(find_professor), "professor"),
+        Case("find_course", calls(find_course), "course"),
+        Case("update_student", calls(update_student, year=3), "student"),
+        Case("update_professor", calls(update_professor, department="ИИТ"), "professor"),
+        Case("update_course", calls(update_course, credits=5), "course"),
+        Case("_check_unique_id", check_unique, "student"),
+        # Удаления идут последними, так как уменьшают набор данных
+        Case("delete_student", calls(delete_student), "student"),
+        Case("delete_professor", calls(delete_professor), "professor"),
+        Case("delete_course", calls(delete_course), "course"),
+    ]
+
+
+def _measure(case: Case, data: UniversityData, rounds: list) -> dict:
+    # Лучший из нескольких прогонов меньше зависит от случайных задержек системы
+    seconds = math.inf
+    for ids in rounds:
+        start = time.perf_counter()
+        units = case.run(data, ids)
+        seconds = min(seconds, time.perf_counter() - start)
+    return {"op": case.name, "units": units, "unit": case.unit, "seconds": seconds,
+            "unit_ns": seconds / units * 1e9 if units else 0.0, "peak_bytes": None}
+
+
+def _peak_memory(case: Case, data: UniversityData, ids: list) -> int:
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        case.run(data, ids)
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def run_scale(students: int, args, directory: str) -> list:
+    """Строит набор данных из students студентов и измеряет все операции"""
+    start = time.perf_counter()
+    data = synth.generate(students, grades=students * args.grades_per_student, seed=args.seed,
+                          columnar_grades=args.columnar)
+    seconds = time.perf_counter() - start
+    rows = _rows(data)
+    results = [{"op": "generate", "units": rows, "unit": "запись", "seconds": seconds,
+                "unit_ns": seconds / rows * 1e9, "peak_bytes": None, "scale": students}]
+    _report(results[0])
+
+    rng = random.Random(args.seed)
+    for case in _cases(directory):
+        # Выборки ID для прогонов времени и последнего прогона памяти; для удалений
+        # они не должны пересекаться, поэтому берутся без повторов
+        rounds = [[] for _ in range(args.repeat + 1)]
+        if case.entity_type is not None:
+            available = list(data.store(case.entity_type).ids())
+            count = min(args.calls, len(available) // len(rounds))
+            sample = rng.sample(available, count * len(rounds))
+            rounds = [sample[start:start + count] for start in range(0, len(sample), count)] if count else rounds
+        result = _measure(case, data, rounds[:-1])
+        if args.memory:
+            result["peak_bytes"] = _peak_memory(case, data, rounds[-1])
+        result["scale"] = students
+        results.append(result)
+        _report(result)
+    return results
+
+
+def _format_bytes(size) -> str:
+    if size is None:
+        return "-"
+    for unit in ("Б", "КБ", "МБ"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
+
+
+def _report(result: dict):
+    print(f"  {result['op']:<18} {result['seconds']:9.3f} с  {result['unit_ns']:10.0f} нс/{result['unit']:<6}"
+          f"  пик {_format_bytes(result['peak_bytes']):>9}")
+
+
+def growth(results: list) -> dict:
+    """Показатель степени роста времени единицы работы между наименьшим и наибольшим размером"""
+    by_op = {}
+    for result in results:
+        by_op.setdefault(result["op"], []).append(result)
+    exponents = {}
+    for op, points in by_op.items():
+        points = [point for point in points if point["unit_ns"] > 0]
+        if len(points) < 2:
+            continue
+        small = min(points, key=lambda point: point["scale"])
+        large = max(points, key=lambda point: point["scale"])
+        if large["scale"] == small["scale"]:
+            continue
+        exponents[op] = math.log(large["unit_ns"] / small["unit_ns"]) / math.log(large["scale"] / small["scale"])
+    return exponents
+
+
+def compare(results: list, meta: dict, baseline: dict, threshold: float) -> list:
+    """Печатает отношения к прошлому запуску и возвращает список регрессий"""
+    previous = {(result["op"], result["scale"]): result for result in baseline["results"]}
+    regressions = []
+    print(f"\nСравнение с прошлым запуском ({baseline['meta'].get('created', '?')}):")
+    changed = [key for key in ("grades_per_student", "calls", "repeat", "seed", "columnar", "python")
+               if baseline["meta"].get(key) != meta.get(key)]
+    if changed:
+        print(f"  Внимание: параметры запусков различаются ({', '.join(changed)})")
+    for result in results:
+        old = previous.get((result["op"], result["scale"]))
+        if old is None or not old["unit_ns"]:
+            continue
+        ratio = result["unit_ns"] / old["unit_ns"]
+        line = f"  {result['op']:<18} {result['scale']:>9}  время x{ratio:.2f}"
+        if result["peak_bytes"] is not None and old.get("peak_bytes"):
+            line += f"  память x{result['peak_bytes'] / old['peak_bytes']:.2f}"
+        if ratio > threshold:
+            line += "  РЕГРЕССИЯ"
+            regressions.append((result["op"], result["scale"], ratio))
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10_000, 100_000],
+                        help="размеры наборов данных (число студентов)")
+    parser.add_argument("--grades-per-student", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=10_000, help="число вызовов точечных операций")
+    parser.add_argument("--repeat", type=int, default=3, help="число прогонов времени (берется лучший)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--columnar", action="store_true", help="хранить оценки в GradeTable")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="не измерять память")
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--compare", help="результаты прошлого запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="допустимое замедление единицы работы относительно прошлого запуска")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for students in sorted(args.scales):
+            print(f"Студентов: {students}, оценок: {students * args.grades_per_student}")
+            results.extend(run_scale(students, args, directory))
+
+    exponents = growth(results)
+    if exponents:
+        print("\nРост времени единицы работы с размером данных (0 - постоянное):")
+        for op, exponent in exponents.items():
+            mark = "  НЕЛИНЕЙНО" if exponent > GROWTH_LIMIT else ""
+            print(f"  {op:<18} {exponent:+.2f}{mark}")
+
+    report = {
+        "format": RESULTS_FORMAT,
+        "meta": {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "scales": sorted(args.scales), "grades_per_student": args.grades_per_student,
+                 "calls": args.calls, "repeat": args.repeat, "seed": args.seed, "columnar": args.columnar, "memory": args.memory},
+        "results": results,
+        "growth": exponents,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nРезультаты записаны в {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("format") != RESULTS_FORMAT:
+            sys.exit(f"Неподдерживаемый формат результатов: {baseline.get('format')}")
+        regressions = compare(results, report["meta"], baseline, args.threshold)
+        if regressions:
+            print(f"Регрессий: {len(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Ссылочная целостность данных университета.
+
+Внешние ключи описывают ссылки между сущностями: Grade.student_id ->
+Student.id, Grade.course_id -> Course.id и Professor.department ->
+Department.name. Для каждого ключа задается действие при удалении или смене
+ключа родителя:
+
+- "cascade" - зависимые сущности удаляются (при смене ключа - получают новый);
+- "restrict" - операция запрещается, пока есть зависимые сущности;
+- "nullify" - ссылка в зависимых сущностях заменяется на None; поле должно
+  допускать None в схеме сущности (EntitySchema.nullable), иначе данные
+  нельзя было бы сохранить и загрузить.
+
+Integrity подключается к UniversityData (data.integrity), после чего
+delete_*/update_* и пакетные операции применяют эти правила. Зависимые
+сущности находятся по обратным индексам (индексы GradeStore/GradeTable или
+собственные индексы по событиям изменений), поэтому каскад стоит
+O(затронутых строк). Создание сущностей со ссылкой на отсутствующего
+родителя не запрещается, чтобы данные можно было загружать в любом порядке;
+такие ссылки находит check().
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from unik import (_GRADE_COLUMNS, ENTITY_TYPES, SCHEMAS, GradeTable, IntegrityError, InvalidDataError, NotFoundError,
+                  UniversityData)
+
+ACTIONS = ("cascade", "restrict", "nullify")
+
+
+class ForeignKey:
+    """Ссылка поля child_type.field на поле parent_type.parent_field"""
+    __slots__ = ("child_type", "field", "parent_type", "parent_field", "on_delete")
+
+    def __init__(self, child_type: str, field: str, parent_type: str, parent_field: str = "id",
+                 on_delete: str = "restrict"):
+        if on_delete not in ACTIONS:
+            raise InvalidDataError(f"Неизвестное действие внешнего ключа: {on_delete}")
+        self.child_type = child_type
+        self.field = field
+        self.parent_type = parent_type
+        self.parent_field = parent_field
+        self.on_delete = on_delete
+
+    @property
+    def name(self) -> str:
+        return f"{self.child_type}.{self.field}"
+
+    def __repr__(self):
+        return (f"ForeignKey({self.name} -> {self.parent_type}.{self.parent_field}, "
+                f"on_delete={self.on_delete!r})")
+
+
+# Внешние ключи по умолчанию: оценки удаляются вместе со студентом или курсом,
+# а профессор удаленной кафедры остается без кафедры
+FOREIGN_KEYS = (
+    ForeignKey("grade", "student_id", "student", on_delete="cascade"),
+    ForeignKey("grade", "course_id", "course", on_delete="cascade"),
+    ForeignKey("professor", "department", "department", "name", on_delete="nullify"),
+)
+
+# Встроенные индексы хранилищ оценок, которыми можно пользоваться как обратными
+_STORE_INDEXES = {("grade", "student_id"): "for_student", ("grade", "course_id"): "for_course"}
+
+
+class Violation:
+    """Нарушение целостности: сущность ссылается на отсутствующего родителя"""
+    __slots__ = ("foreign_key", "child_id", "value")
+
+    def __init__(self, foreign_key: ForeignKey, child_id: int, value):
+        self.foreign_key = foreign_key
+        self.child_id = child_id
+        self.value = value
+
+    def __repr__(self):
+        return f"Violation({self.foreign_key.name}: ID {self.child_id} -> {self.value!r})"
+
+
+class Integrity:
+    """Применяет действия внешних ключей при удалении и смене ключей родителей.
+
+    actions переопределяет действия по имени ключа, например
+    {"grade.student_id": "restrict"}.
+    """
+
+    def __init__(self, data: UniversityData, foreign_keys: Iterable[ForeignKey] = FOREIGN_KEYS,
+                 actions: Optional[Dict[str, str]] = None):
+        self.data = data
+        self.foreign_keys: List[ForeignKey] = []
+        for fk in foreign_keys:
+            action = (actions or {}).get(fk.name, fk.on_delete)
+            fk = ForeignKey(fk.child_type, fk.field, fk.parent_type, fk.parent_field, action)
+            if action == "nullify" and fk.field not in SCHEMAS[ENTITY_TYPES[fk.child_type]].nullable:
+                raise InvalidDataError(f"{fk.name}: поле не допускает None, nullify невозможен")
+            self.foreign_keys.append(fk)
+        # Ключи, ссылающиеся на тип сущности
+        self._referencing: Dict[str, List[ForeignKey]] = {}
+        for fk in self.foreign_keys:
+            self._referencing.setdefault(fk.parent_type, []).append(fk)
+        # Собственные обратные индексы для ключей без индекса в хранилище:
+        # имя ключа -> {значение: {ID зависимой сущности: None}} и ID -> значение
+        self._index: Dict[str, Dict[object, Dict[int, None]]] = {}
+        self._values: Dict[str, Dict[int, object]] = {}
+        for fk in self.foreign_keys:
+            if (fk.child_type, fk.field) not in _STORE_INDEXES:
+                self._rebuild(fk)
+        data.subscribe(self._on_change)
+        data.integrity = self
+
+    def close(self):
+        """Отключает правила от данных"""
+        self.data.unsubscribe(self._on_change)
+        if self.data.integrity is self:
+            self.data.integrity = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Обратные индексы
+
+    def _rebuild(self, fk: ForeignKey):
+        index = self._index[fk.name] = {}
+        values = self._values[fk.name] = {}
+        for child in self.data.store(fk.child_type):
+            value = getattr(child, fk.field)
+            index.setdefault(value, {})[child.id] = None
+            values[child.id] = value
+
+    def _on_change(self, entity_type: str, op: str, entity_id, entity, changes):
+        for fk in self.foreign_keys:
+            if fk.child_type != entity_type or fk.name not in self._index:
+                continue
+            index, values = self._index[fk.name], self._values[fk.name]
+            if op in ("clear", "reset"):
+                self._rebuild(fk)
+                continue
+            if op in ("delete", "update"):
+                old = values.pop(entity_id)
+                children = index[old]
+                del children[entity_id]
+                if not children:
+                    del index[old]
+            if op in ("create", "update"):
+                value = getattr(entity, fk.field)
+                index.setdefault(value, {})[entity.id] = None
+                values[entity.id] = value
+
+    def _children(self, fk: ForeignKey, key) -> List[int]:
+        """ID сущностей, ссылающихся по ключу fk на значение key"""
+        method = _STORE_INDEXES.get((fk.child_type, fk.field))
+        if method is not None:
+            return [child.id for child in getattr(self.data.store(fk.child_type), method)(key)]
+        return list(self._index[fk.name].get(key, ()))
+
+    def _shared_key(self, fk: ForeignKey, parent_id: int, key) -> bool:
+        """Есть ли другой родитель с тем же значением ключа (например, тезка кафедры)"""
+        if fk.parent_field == "id":
+            return False
+        # Ссылки не по ID ведут на небольшие справочники, поэтому просмотр допустим
+        return any(getattr(parent, fk.parent_field) == key and parent.id != parent_id
+                   for parent in self.data.store(fk.parent_type))
+
+    # Планирование и применение операций
+
+    def plan_delete(self, entity_type: str, entity_id: int) -> List[tuple]:
+        """Возвращает операции удаления с каскадом, не изменяя данные.
+
+        IntegrityError выбрасывается, если удалению мешает ключ с restrict.
+        """
+        plan: List[tuple] = []
+        self._plan_delete(entity_type, entity_id, plan, set())
+        return plan
+
+    def _plan_delete(self, entity_type: str, entity_id: int, plan: List[tuple], visited: set):
+        if (entity_type, entity_id) in visited:
+            return
+        visited.add((entity_type, entity_id))
+        parent = self.data.store(entity_type).get(entity_id)
+        if parent is None:
+            raise NotFoundError(f"ID {entity_id} не найден")
+        for fk in self._referencing.get(entity_type, ()):
+            key = getattr(parent, fk.parent_field)
+            children = self._children(fk, key)
+            if not children or self._shared_key(fk, entity_id, key):
+                continue
+            if fk.on_delete == "restrict":
+                raise IntegrityError(f"На {entity_type} с ID {entity_id} ссылаются {len(children)} "
+                                     f"записей {fk.name}")
+            for child_id in children:
+                if fk.on_delete == "cascade":
+                    self._plan_delete(fk.child_type, child_id, plan, visited)
+                else:
+                    plan.append(("update", fk.child_type, child_id, {fk.field: None}))
+        plan.append(("delete", entity_type, entity_id, None))
+
+    def plan_update(self, entity_type: str, entity_id: int, changes: dict) -> List[tuple]:
+        """Возвращает операции обновления сущности и ссылок на ее ключи"""
+        parent = self.data.store(entity_type).get(entity_id)
+        plan: List[tuple] = []
+        for fk in self._referencing.get(entity_type, ()):
+            if fk.parent_field not in changes or parent is None:
+                continue
+            key, new_key = getattr(parent, fk.parent_field), changes[fk.parent_field]
+            if new_key == key:
+                continue
+            children = self._children(fk, key)
+            if not children or self._shared_key(fk, entity_id, key):
+                continue
+            if fk.on_delete == "restrict":
+                raise IntegrityError(f"Ключ {key!r} у {entity_type} с ID {entity_id} используется "
+                                     f"{len(children)} записями {fk.name}")
+            value = new_key if fk.on_delete == "cascade" else None
+            plan.extend(("update", fk.child_type, child_id, {fk.field: value}) for child_id in children)
+        plan.append(("update", entity_type, entity_id, changes))
+        return plan
+
+    def _apply(self, plan: List[tuple]):
+        for op, entity_type, entity_id, changes in plan:
+            store = self.data.store(entity_type)
+            if op == "delete":
+                store.remove(entity_id)
+            else:
+                store.update(entity_id, changes)
+
+    def delete(self, entity_type: str, entity_id: int):
+        """Удаляет сущность вместе с зависимыми согласно действиям ключей"""
+        self._apply(self.plan_delete(entity_type, entity_id))
+
+    def update(self, entity_type: str, entity_id: int, changes: dict):
+        """Обновляет сущность и переносит смену ее ключа на зависимые сущности"""
+        self._apply(self.plan_update(entity_type, entity_id, changes))
+
+
+def _column(store, field: str) -> Iterator[Tuple[int, object]]:
+    """Пары (ID, значение поля); колоночное хранилище читается без создания объектов"""
+    if isinstance(store, GradeTable):
+        column = getattr(store, next(name for name, column_field in _GRADE_COLUMNS.items() if column_field == field))
+        return ((grade_id, value) for grade_id, value, live in zip(store._ids, column, store._alive) if live)
+    return ((entity.id, getattr(entity, field)) for entity in store)
+
+
+def check(data: UniversityData, foreign_keys: Iterable[ForeignKey] = FOREIGN_KEYS) -> List[Violation]:
+    """Проверяет все ссылки за один проход по каждой зависимой таблице.
+
+    Возвращает список нарушений (пустой, если данные целостны). Пустые
+    ссылки (None), оставленные действием nullify, нарушением не считаются.
+    """
+    violations = []
+    parent_keys: Dict[tuple, set] = {}
+    with data.lock.read():
+        for fk in foreign_keys:
+            target = (fk.parent_type, fk.parent_field)
+            if target not in parent_keys:
+                parent_keys[target] = {value for _, value in _column(data.store(fk.parent_type), fk.parent_field)}
+            keys = parent_keys[target]
+            violations.extend(Violation(fk, child_id, value)
+                              for child_id, value in _column(data.store(fk.child_type), fk.field)
+                              if value not in keys and value is not None)
+    return violations
@@ -0,0 +1,197 @@
+"""Журнал изменений (write-ahead log) для UniversityData.
+
+Вместо перезаписи всего файла после каждой операции каждое изменение
+хранилищ (create_*, update_*, delete_*, пакетные операции) дописывается
+одной JSON строкой в журнал. При открытии журнал проигрывается поверх
+последнего полного снимка, а уплотнение записывает новый снимок и очищает
+журнал - по запросу или при превышении порога размера.
+
+Запись дописывается до изменения данных: хранилище сначала проверяет
+операцию, затем журнал записывает (и синхронизирует) строку и только после
+этого изменение применяется. Если записать не удалось, данные не меняются,
+а CRUD функция сообщает об ошибке.
+
+Каждая запись журнала имеет порядковый номер seq; снимок хранит номер
+последней учтенной записи в ключе "journal_seq", поэтому сбой между
+заменой снимка и очисткой журнала не приводит к повторному применению
+изменений.
+"""
+import json
+import os
+from typing import Optional
+
+from unik import ENTITY_TYPES, SECTIONS, InvalidDataError, UniversityData, UniversityDataError, logger
+
+# Порог размера журнала, после которого он автоматически сворачивается в снимок
+DEFAULT_COMPACT_THRESHOLD = 64 * 1024 * 1024
+
+
+def _read_snapshot(filename: str):
+    """Читает JSON снимок и номер последней учтенной записи журнала"""
+    data = UniversityData()
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+    except FileNotFoundError:
+        return data, 0
+    for name, class_type in SECTIONS.items():
+        getattr(data, name).extend(class_type(**record) for record in document.get(name, []))
+    return data, document.get("journal_seq", 0)
+
+
+def _apply(data: UniversityData, record: dict):
+    """Применяет одну запись журнала к данным"""
+    op = record["op"]
+    entity_type = record["type"]
+    class_type = ENTITY_TYPES[entity_type]
+    store = data.store(entity_type)
+    if op == "create":
+        store.add(class_type(**record["record"]))
+    elif op == "update":
+        store.update(record["id"], record["changes"])
+    elif op == "delete":
+        store.remove(record["id"])
+    elif op == "clear":
+        store.clear()
+    elif op == "reset":
+        setattr(data, entity_type + "s", [class_type(**item) for item in record["records"]])
+    else:
+        raise InvalidDataError(f"Неизвестная операция журнала: {op}")
+
+
+class Journal:
+    """Дописывает изменения UniversityData в журнал и сворачивает его в снимок.
+
+    sync=True вызывает fsync после каждой записи: изменение, о котором
+    CRUD функция сообщила как об успешном, переживет сбой процесса и ОС.
+    """
+
+    def __init__(self, data: UniversityData, snapshot_path: str, journal_path: Optional[str] = None,
+                 seq: int = 0, sync: bool = True, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD):
+        self.data = data
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or snapshot_path + ".journal"
+        self.seq = seq
+        self.sync = sync
+        self.compact_threshold = compact_threshold
+        # Без буфера: при ошибке записи в файле не остается непереданных байт
+        self._file = open(self.journal_path, 'ab', buffering=0)
+        self._size = self._file.tell()
+        # Строку, которую не удалось ни дописать, ни отрезать, нельзя оставить
+        # в журнале незамеченной: дальнейшие изменения запрещаются
+        self._broken = False
+        data.subscribe(self._before_change, before=True)
+        data.subscribe(self._on_change)
+
+    def _before_change(self, entity_type: str, op: str, entity_id, entity, changes):
+        record = {"seq": self.seq + 1, "op": op, "type": entity_type}
+        if op == "create":
+            record["id"] = entity_id
+            record["record"] = entity.to_dict()
+        elif op == "update":
+            record["id"] = entity_id
+            record["changes"] = changes
+        elif op == "delete":
+            record["id"] = entity_id
+        elif op == "reset":
+            record["records"] = [item.to_dict() for item in entity]
+        self._append(record)
+
+    def _on_change(self, entity_type: str, op: str, entity_id, entity, changes):
+        # Уплотняем после применения изменения, чтобы снимок его уже содержал
+        if self._size >= self.compact_threshold:
+            try:
+                self.compact()
+            except OSError as e:
+                # Изменение уже записано в журнал, поэтому не теряется
+                logger.warning("Не удалось уплотнить журнал %s: %s", self.journal_path, e)
+
+    def _append(self, record: dict):
+        if self._broken:
+            raise UniversityDataError(f"Журнал {self.journal_path} поврежден, откройте его заново")
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        try:
+            written = 0
+            while written < len(line):
+                written += self._file.write(line[written:])
+            if self.sync:
+                os.fsync(self._file.fileno())
+        except BaseException:
+            # Отрезаем недописанную строку, иначе при проигрывании применится
+            # изменение, о неудаче которого сообщили вызывающему
+            try:
+                self._file.truncate(self._size)
+            except OSError:
+                self._broken = True
+            raise
+        self.seq = record["seq"]
+        self._size += len(line)
+
+    def compact(self):
+        """Записывает полный снимок с текущим seq и очищает журнал"""
+        document = {"journal_seq": self.seq}
+        document.update((name, [item.to_dict() for item in getattr(self.data, name)]) for name in SECTIONS)
+        tmp_name = self.snapshot_path + ".tmp"
+        with open(tmp_name, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, self.snapshot_path)
+        # Снимок уже содержит все записи журнала, поэтому его можно очистить
+        self._file.truncate(0)
+        os.fsync(self._file.fileno())
+        self._size = 0
+
+    def close(self):
+        """Отписывается от изменений и закрывает файл журнала"""
+        self.data.unsubscribe(self._before_change)
+        self.data.unsubscribe(self._on_change)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def replay(data: UniversityData, journal_path: str, after_seq: int = 0) -> int:
+    """Проигрывает записи журнала с seq > after_seq и возвращает последний seq.
+
+    Оборванная при сбое последняя строка отбрасывается и обрезается в файле.
+    """
+    last_seq = after_seq
+    try:
+        f = open(journal_path, 'r+b')
+    except FileNotFoundError:
+        return last_seq
+    with f:
+        position = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Запись не была дописана до конца: она не была подтверждена
+                f.truncate(position)
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise InvalidDataError(f"Поврежденная запись журнала на смещении {position}") from None
+            if record["seq"] > last_seq:
+                try:
+                    _apply(data, record)
+                except Exception as e:
+                    raise InvalidDataError(f"Не удалось применить запись журнала seq={record['seq']}: {e}") from e
+                last_seq = record["seq"]
+            position += len(line)
+    return last_seq
+
+
+def open_journaled(snapshot_path: str, journal_path: Optional[str] = None, **options) -> Journal:
+    """Загружает снимок, проигрывает журнал и возвращает Journal, ведущий запись.
+
+    Данные доступны через journal.data; options передаются в Journal.
+    """
+    journal_path = journal_path or snapshot_path + ".journal"
+    data, base_seq = _read_snapshot(snapshot_path)
+    seq = replay(data, journal_path, base_seq)
+    return Journal(data, snapshot_path, journal_path, seq=seq, **options)
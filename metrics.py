@@ -0,0 +1,256 @@
+"""Метрики операций слоя данных: счетчики, гистограммы задержек и профилировщик.
+
+Измеряются CRUD функции unik (create_*/find_*/update_*/delete_* и пакетные
+*_many) и все загрузчики и сохранятели (JSON, XML, снимки, шарды). Пока
+метрики не включены, измеряемые функции не делают ничего, кроме проверки
+одной глобальной переменной.
+
+    metrics = enable()
+    ...
+    metrics.snapshot()                     # словарь со счетчиками и квантилями
+    metrics.write_prometheus("unik.prom")  # текстовый формат Prometheus
+    disable()
+
+SamplingProfiler периодически снимает стеки потоков, которые выполняют
+измеряемые операции, и показывает, в каких строках кода операции проводят
+время.
+"""
+import math
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from threading import get_ident
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import unik
+
+_clock = time.perf_counter
+
+# Верхние границы корзин гистограммы задержек в секундах: от 1 мкс до 10 с
+LATENCY_BUCKETS = tuple(base * 10.0 ** power for power in range(-6, 1) for base in (1.0, 2.5, 5.0)) + (10.0,)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами в стиле Prometheus"""
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Iterable[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        # Последняя корзина - значения больше последней границы (+Inf)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля линейной интерполяцией внутри корзины, как histogram_quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class OperationStats:
+    """Число вызовов, неудач и распределение задержек одной операции"""
+    __slots__ = ("calls", "errors", "latency")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram(bounds)
+
+
+class Metrics:
+    """Наблюдатель операций unik (см. unik.set_observer), собирающий метрики"""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._operations: Dict[str, OperationStats] = {}
+        # finish вызывается из разных потоков, а обновление гистограммы не атомарно
+        self._mutex = threading.Lock()
+        # ID потока -> стек выполняемых в нем операций; ведется, только пока
+        # подключен SamplingProfiler
+        self._active: Dict[int, List[str]] = {}
+        self.track_active = False
+
+    # Интерфейс наблюдателя
+
+    def start(self, op: str) -> float:
+        if self.track_active:
+            self._active.setdefault(get_ident(), []).append(op)
+        return _clock()
+
+    def finish(self, op: str, started: float, ok: bool):
+        elapsed = _clock() - started
+        if self._active:
+            # Операция могла начаться до подключения профилировщика и не попасть в стек
+            ident = get_ident()
+            stack = self._active.get(ident)
+            if stack and stack[-1] == op:
+                stack.pop()
+                if not stack:
+                    del self._active[ident]
+        with self._mutex:
+            stats = self._operations.get(op)
+            if stats is None:
+                stats = self._operations[op] = OperationStats(self.buckets)
+            stats.calls += 1
+            if not ok:
+                stats.errors += 1
+            stats.latency.observe(elapsed)
+
+    def active(self) -> Dict[int, str]:
+        """ID потока -> внешняя операция, которую он сейчас выполняет"""
+        return {ident: stack[0] for ident, stack in list(self._active.items()) if stack}
+
+    # Экспорт
+
+    def reset(self):
+        """Обнуляет все счетчики"""
+        with self._mutex:
+            self._operations.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> dict:
+        """Текущие значения: вызовы, ошибки, суммарное и среднее время, квантили"""
+        with self._mutex:
+            operations = {}
+            for op, stats in sorted(self._operations.items()):
+                latency = stats.latency
+                operations[op] = {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "seconds": latency.sum,
+                    "mean": latency.sum / latency.count if latency.count else None,
+                    "p50": latency.quantile(0.5),
+                    "p90": latency.quantile(0.9),
+                    "p99": latency.quantile(0.99),
+                    "buckets": dict(zip([*map(_format_bound, latency.bounds), "+Inf"], latency.counts)),
+                }
+        return {"since": self.started, "uptime": time.time() - self.started, "operations": operations}
+
+    def prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines = ["# HELP unik_operations_total Число вызовов операций unik по исходу.",
+                 "# TYPE unik_operations_total counter"]
+        with self._mutex:
+            operations = sorted(self._operations.items())
+            for op, stats in operations:
+                lines.append(f'unik_operations_total{{op="{op}",outcome="ok"}} {stats.calls - stats.errors}')
+                lines.append(f'unik_operations_total{{op="{op}",outcome="error"}} {stats.errors}')
+            lines.append("# HELP unik_operation_duration_seconds Длительность операций unik.")
+            lines.append("# TYPE unik_operation_duration_seconds histogram")
+            for op, stats in operations:
+                latency = stats.latency
+                cumulative = 0
+                for bound, count in zip([*map(_format_bound, latency.bounds), "+Inf"], latency.counts):
+                    cumulative += count
+                    lines.append(f'unik_operation_duration_seconds_bucket{{op="{op}",le="{bound}"}} {cumulative}')
+                lines.append(f'unik_operation_duration_seconds_sum{{op="{op}"}} {latency.sum!r}')
+                lines.append(f'unik_operation_duration_seconds_count{{op="{op}"}} {latency.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, filename: str):
+        """Атомарно записывает метрики в файл (например, для textfile collector node_exporter)"""
+        tmp_name = filename + ".tmp"
+        with open(tmp_name, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_name, filename)
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else format(bound, "g")
+
+
+def enable(metrics: Optional[Metrics] = None) -> Metrics:
+    """Включает измерение операций unik и возвращает собирающий метрики объект"""
+    metrics = metrics if metrics is not None else Metrics()
+    unik.set_observer(metrics)
+    return metrics
+
+
+def disable():
+    """Выключает измерение операций"""
+    unik.set_observer(None)
+
+
+class SamplingProfiler:
+    """Профилировщик, раз в interval секунд снимающий стеки потоков с операциями unik.
+
+    Для каждого потока, выполняющего измеряемую операцию, запоминается
+    текущая строка кода; top() показывает самые частые пары (операция,
+    строка). Поток профилировщика конкурирует за GIL, поэтому слишком малый
+    interval замедляет измеряемый код.
+    """
+
+    def __init__(self, metrics: Metrics, interval: float = 0.005):
+        self.metrics = metrics
+        self.interval = interval
+        # (операция, "файл:строка функция") -> число снимков
+        self.samples: Dict[Tuple[str, str], int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.metrics.track_active = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="unik-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.metrics.track_active = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Снимает стеки один раз"""
+        active = self.metrics.active()
+        if not active:
+            return
+        frames = sys._current_frames()
+        for ident, op in active.items():
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            code = frame.f_code
+            location = f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}"
+            key = (op, location)
+            self.samples[key] = self.samples.get(key, 0) + 1
+
+    def top(self, limit: int = 10, op: Optional[str] = None) -> List[Tuple[str, str, int]]:
+        """Самые частые места в виде (операция, место, число снимков)"""
+        items = [(sample_op, location, count) for (sample_op, location), count in self.samples.items()
+                 if op is None or sample_op == op]
+        items.sort(key=lambda item: item[2], reverse=True)
+        return items[:limit]
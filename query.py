@@ -0,0 +1,497 @@
+"""Декларативные запросы к данным университета с выбором индексов.
+
+Запрос описывает источник, соединения по внешним ключам (Student <-> Grade
+<-> Course, Professor <-> Department), условия, проекцию, группировку,
+сортировку и ограничение:
+
+    q = (Query(data, "student")
+         .join("grade").join("course")
+         .where(year=4, faculty="ИИТ")
+         .where("course.id", "==", course_id)
+         .group_by("student.id", "student.name", average=("avg", "grade.grade"))
+         .having("average", "<", 30)
+         .order_by("average")
+         .limit(10))
+    print(q.explain())
+    for row in q:
+        ...
+
+Планировщик начинает с таблицы, для которой условие равенства попадает в
+индекс и дает меньше всего строк: ID (get), student_id и course_id оценок
+(for_student/for_course), faculty студентов и department профессоров (при
+переданном views.ViewCache). Остальные таблицы присоединяются поиском по
+индексу, а без него - по хэш-таблице, построенной за один проход.
+Условия проверяются сразу, как только связаны все их таблицы.
+
+Строки вычисляются лениво: limit без order_by прекращает чтение после
+нужного числа строк, а order_by с limit держит в памяти только k лучших.
+Результат собирается под блокировкой чтения данных и выдается после ее
+снятия, поэтому внутри цикла по запросу можно изменять данные.
+"""
+import heapq
+import operator
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from integrity import _STORE_INDEXES, FOREIGN_KEYS, ForeignKey
+from unik import ENTITY_TYPES, SCHEMAS, InvalidDataError, UniversityData
+
+OPERATORS: Dict[str, Callable] = {
+    "==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+    ">": operator.gt, ">=": operator.ge, "in": lambda value, values: value in values,
+}
+
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+
+# Представления views.ViewCache, которые служат хэш-индексом по полю
+_VIEW_INDEXES = {("student", "faculty"): "students_by_faculty",
+                 ("professor", "department"): "professors_by_department"}
+
+
+class _Condition:
+    """Условие на поле таблицы или произвольная функция от строки"""
+    __slots__ = ("alias", "field", "op", "value", "test", "aliases", "text")
+
+    def __init__(self, alias: Optional[str], field: Optional[str], op: str, value, test: Callable,
+                 aliases: frozenset, text: str):
+        self.alias = alias
+        self.field = field
+        self.op = op
+        self.value = value
+        self.test = test
+        self.aliases = aliases
+        self.text = text
+
+    def values(self) -> list:
+        """Значения, которые ищутся по индексу (для == и in)"""
+        return [self.value] if self.op == "==" else list(self.value)
+
+
+class _Join:
+    """Связь новой таблицы с уже присоединенной по внешнему ключу"""
+    __slots__ = ("alias", "other", "fk")
+
+    def __init__(self, alias: str, other: str, fk: ForeignKey):
+        self.alias = alias
+        self.other = other
+        self.fk = fk
+
+
+class _Access:
+    """Способ получить строки первой таблицы плана"""
+    __slots__ = ("alias", "estimate", "text", "rows", "condition")
+
+    def __init__(self, alias: str, estimate: float, text: str, rows: Callable, condition=None):
+        self.alias = alias
+        self.estimate = estimate
+        self.text = text
+        self.rows = rows
+        self.condition = condition
+
+
+class Query:
+    """Неизменяемое описание запроса; каждый метод возвращает новый запрос"""
+
+    def __init__(self, data: UniversityData, source: str, views=None):
+        if source not in ENTITY_TYPES:
+            raise InvalidDataError(f"Неизвестный тип сущности: {source}")
+        self.data = data
+        # views.ViewCache с представлениями-индексами (необязательно)
+        self.views = views
+        self._aliases: List[str] = [source]
+        self._joins: List[_Join] = []
+        self._conditions: List[_Condition] = []
+        self._select: Optional[List[Tuple[str, str]]] = None
+        self._group: Optional[Tuple[List[Tuple[str, str]], List[Tuple[str, str, Optional[str]]]]] = None
+        self._having: List[_Condition] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+
+    def _copy(self) -> "Query":
+        query = Query.__new__(Query)
+        query.__dict__.update(self.__dict__)
+        for name in ("_aliases", "_joins", "_conditions", "_having", "_order"):
+            setattr(query, name, list(getattr(self, name)))
+        return query
+
+    # Описание запроса
+
+    def join(self, entity_type: str) -> "Query":
+        """Присоединяет таблицу, связанную внешним ключом с одной из уже присоединенных"""
+        if entity_type not in ENTITY_TYPES:
+            raise InvalidDataError(f"Неизвестный тип сущности: {entity_type}")
+        if entity_type in self._aliases:
+            raise InvalidDataError(f"Таблица {entity_type} уже есть в запросе")
+        for fk in FOREIGN_KEYS:
+            for new, other in ((fk.child_type, fk.parent_type), (fk.parent_type, fk.child_type)):
+                if new == entity_type and other in self._aliases:
+                    query = self._copy()
+                    query._aliases.append(entity_type)
+                    query._joins.append(_Join(entity_type, other, fk))
+                    return query
+        raise InvalidDataError(f"Таблица {entity_type} не связана с {', '.join(self._aliases)}")
+
+    def _resolve(self, name: str) -> Tuple[str, str]:
+        """"student.year" или "year" -> (таблица, поле)"""
+        alias, _, field = name.rpartition(".")
+        candidates = [alias] if alias else self._aliases
+        for candidate in candidates:
+            if candidate in self._aliases and field in SCHEMAS[ENTITY_TYPES[candidate]].fields:
+                return candidate, field
+        raise InvalidDataError(f"Поле {name} не найдено в таблицах {', '.join(self._aliases)}")
+
+    def _field_condition(self, name: str, op: str, value) -> _Condition:
+        if op not in OPERATORS:
+            raise InvalidDataError(f"Неизвестный оператор: {op}")
+        alias, field = self._resolve(name)
+        compare = OPERATORS[op]
+        shown = value
+        if op == "in":
+            value = frozenset(value)
+            shown = sorted(value, key=repr)
+        test = lambda row: compare(getattr(row[alias], field), value)
+        return _Condition(alias, field, op, value, test, frozenset([alias]), f"{alias}.{field} {op} {shown!r}")
+
+    def where(self, *condition, **equals) -> "Query":
+        """Добавляет условия: where("year", ">=", 3), where(faculty="ИИТ") или where(функция строки).
+
+        Функция получает словарь {таблица: сущность} и проверяется после всех соединений.
+        """
+        query = self._copy()
+        if len(condition) == 1 and callable(condition[0]):
+            function = condition[0]
+            query._conditions.append(_Condition(None, None, "call", None, function, None,
+                                                getattr(function, "__name__", "функция")))
+        elif len(condition) == 3:
+            query._conditions.append(query._field_condition(*condition))
+        elif condition:
+            raise InvalidDataError("Условие задается как (поле, оператор, значение) или функцией")
+        for name, value in equals.items():
+            query._conditions.append(query._field_condition(name, "==", value))
+        return query
+
+    def select(self, *fields: str, **renamed: str) -> "Query":
+        """Оставляет в строках результата только поля: select("student.name", score="grade.grade")"""
+        if self._group is not None:
+            raise InvalidDataError("Строки после group_by уже содержат только ключи и агрегаты")
+        query = self._copy()
+        query._select = [(name, name) for name in fields] + list(renamed.items())
+        for _, name in query._select:
+            self._resolve(name)
+        return query
+
+    def group_by(self, *fields: str, **aggregates: Tuple[str, Optional[str]]) -> "Query":
+        """Группирует строки по полям и считает агрегаты: average=("avg", "grade.grade"), n=("count", None)"""
+        if self._select is not None:
+            raise InvalidDataError("group_by нельзя применить после select")
+        query = self._copy()
+        keys = [(name, name) for name in fields]
+        for _, name in keys:
+            self._resolve(name)
+        functions = []
+        for output, (function, name) in aggregates.items():
+            if function not in AGGREGATES:
+                raise InvalidDataError(f"Неизвестная агрегатная функция: {function}")
+            if name is not None:
+                self._resolve(name)
+            elif function != "count":
+                raise InvalidDataError(f"Функции {function} нужно поле")
+            functions.append((output, function, name))
+        query._group = (keys, functions)
+        return query
+
+    def having(self, name: str, op: str, value) -> "Query":
+        """Условие на строки после группировки (ключи и агрегаты)"""
+        if self._group is None:
+            raise InvalidDataError("having применяется только после group_by")
+        if op not in OPERATORS:
+            raise InvalidDataError(f"Неизвестный оператор: {op}")
+        compare = OPERATORS[op]
+        query = self._copy()
+        query._having.append(_Condition(None, name, op, value, lambda row: compare(row[name], value),
+                                        None, f"{name} {op} {value!r}"))
+        return query
+
+    def order_by(self, *fields: str) -> "Query":
+        """Сортирует результат; "-поле" - по убыванию"""
+        query = self._copy()
+        query._order = [(name.lstrip("-"), name.startswith("-")) for name in fields]
+        return query
+
+    def limit(self, count: int, offset: int = 0) -> "Query":
+        """Ограничивает результат count строками, пропустив первые offset"""
+        query = self._copy()
+        query._limit = count
+        query._offset = offset
+        return query
+
+    # Планирование
+
+    def _access_paths(self, alias: str) -> List[_Access]:
+        store = self.data.store(alias)
+        paths = [_Access(alias, len(store), f"полный просмотр {alias}", lambda: iter(store))]
+        for condition in self._conditions:
+            if condition.alias != alias or condition.op not in ("==", "in"):
+                continue
+            values = condition.values()
+            field = condition.field
+            text = f"{alias} по индексу {field} ({condition.text})"
+            if field == "id":
+                rows = lambda values=values: (entity for entity in map(store.get, values) if entity is not None)
+                paths.append(_Access(alias, len(values), text, rows, condition))
+            elif (alias, field) in _STORE_INDEXES:
+                method = getattr(store, _STORE_INDEXES[(alias, field)])
+                parents = self.data.store(next(fk.parent_type for fk in FOREIGN_KEYS
+                                               if (fk.child_type, fk.field) == (alias, field)))
+                estimate = len(values) * len(store) / max(1, len(parents))
+                rows = lambda values=values, method=method: chain.from_iterable(map(method, values))
+                paths.append(_Access(alias, estimate, text, rows, condition))
+            elif (alias, field) in _VIEW_INDEXES and self.views is not None:
+                # Представление вычисляется один раз и дальше поддерживается кэшем
+                index = self.views.get(_VIEW_INDEXES[(alias, field)])
+                estimate = sum(len(index.get(value, ())) for value in values)
+                rows = lambda values=values, index=index: chain.from_iterable(index.get(value, ()) for value in values)
+                paths.append(_Access(alias, estimate, f"{text}, представление {_VIEW_INDEXES[(alias, field)]}",
+                                     rows, condition))
+        return paths
+
+    def _plan(self) -> Tuple[_Access, List[_Join], List[List[_Condition]]]:
+        """Первая таблица, порядок соединений и условия, проверяемые после каждого шага"""
+        access = min((path for alias in self._aliases for path in self._access_paths(alias)),
+                     key=lambda path: path.estimate)
+        # Обходим дерево соединений от выбранной таблицы
+        bound = [access.alias]
+        steps: List[_Join] = []
+        pending = list(self._joins)
+        while pending:
+            for join in pending:
+                if join.alias in bound or join.other in bound:
+                    # Связь может понадобиться в обратном направлении
+                    new = join.other if join.alias in bound else join.alias
+                    steps.append(_Join(new, join.alias if new == join.other else join.other, join.fk))
+                    bound.append(new)
+                    pending.remove(join)
+                    break
+        # Каждое условие проверяется на первом шаге, где связаны все его таблицы
+        filters: List[List[_Condition]] = [[] for _ in range(len(steps) + 1)]
+        for condition in self._conditions:
+            if condition is access.condition:
+                continue
+            if condition.aliases is None:
+                filters[-1].append(condition)
+            else:
+                filters[max(bound.index(alias) for alias in condition.aliases)].append(condition)
+        return access, steps, filters
+
+    def _lookup(self, join: _Join, cache: dict) -> Tuple[Callable, str]:
+        """Функция поиска строк новой таблицы по строке уже связанных и описание способа"""
+        fk, alias, other = join.fk, join.alias, join.other
+        store = self.data.store(alias)
+        if alias == fk.child_type:
+            # Новая таблица ссылается на связанную: ищем сущности со ссылкой на ее ключ
+            key_of = operator.attrgetter(fk.parent_field)
+            method = _STORE_INDEXES.get((alias, fk.field))
+            if method is not None:
+                find = getattr(store, method)
+                return (lambda row: find(key_of(row[other]))), f"индекс {alias}.{fk.field}"
+            view = _VIEW_INDEXES.get((alias, fk.field))
+            if view is not None and self.views is not None:
+                index = self.views.get(view)
+                return (lambda row: index.get(key_of(row[other]), ())), f"представление {view}"
+            field = fk.field
+        else:
+            key_of = operator.attrgetter(fk.field)
+            if fk.parent_field == "id":
+                get = store.get
+
+                def find(row):
+                    entity = get(key_of(row[other]))
+                    return () if entity is None else (entity,)
+                return find, f"индекс {alias}.id"
+            field = fk.parent_field
+
+        def find(row):
+            # Хэш-таблица строится при первом поиске и живет до конца перебора
+            index = cache.get(alias)
+            if index is None:
+                index = cache[alias] = {}
+                for entity in store:
+                    index.setdefault(getattr(entity, field), []).append(entity)
+            return index.get(key_of(row[other]), ())
+        return find, f"хэш по {alias}.{field}"
+
+    def explain(self) -> str:
+        """Текстовое описание выбранного плана"""
+        access, steps, filters = self._plan()
+        lines = [f"Доступ: {access.text}, ~{access.estimate:.0f} строк"]
+        lines.extend(f"  Фильтр: {condition.text}" for condition in filters[0])
+        for join, conditions in zip(steps, filters[1:]):
+            _, method = self._lookup(join, {})
+            lines.append(f"Соединение: {join.alias} с {join.other} по {join.fk.name} ({method})")
+            lines.extend(f"  Фильтр: {condition.text}" for condition in conditions)
+        if self._group is not None:
+            keys, functions = self._group
+            parts = [f"{output} = {function}({name or '*'})" for output, function, name in functions]
+            lines.append(f"Группировка: {', '.join(name for _, name in keys)}" + (f": {', '.join(parts)}" if parts else ""))
+            lines.extend(f"  Условие группы: {condition.text}" for condition in self._having)
+        if self._select is not None:
+            lines.append(f"Проекция: {', '.join(output for output, _ in self._select)}")
+        if self._order:
+            order = ", ".join(name + (" по убыванию" if descending else "") for name, descending in self._order)
+            if self._limit is not None:
+                lines.append(f"Сортировка: {order}, лучшие {self._offset + self._limit} (куча)")
+            else:
+                lines.append(f"Сортировка: {order}")
+        if self._limit is not None:
+            lines.append(f"Ограничение: {self._limit}" + (f" со смещением {self._offset}" if self._offset else "")
+                         + ("" if self._order or self._group is not None else ", чтение останавливается досрочно"))
+        return "\n".join(lines)
+
+    # Выполнение
+
+    def _rows(self) -> Iterator[dict]:
+        access, steps, filters = self._plan()
+        cache: dict = {}
+        alias = access.alias
+        rows: Iterable[dict] = ({alias: entity} for entity in access.rows())
+        rows = _filtered(rows, filters[0])
+        for join, conditions in zip(steps, filters[1:]):
+            find, _ = self._lookup(join, cache)
+            rows = _filtered(_joined(rows, join.alias, find), conditions)
+        return rows
+
+    def _output(self, rows: Iterable[dict]) -> Iterator:
+        if self._group is not None:
+            rows = self._grouped(rows)
+            for condition in self._having:
+                rows = filter(condition.test, rows)
+        elif self._select is not None:
+            getters = [(output, self._getter(name)) for output, name in self._select]
+            rows = ({output: get(row) for output, get in getters} for row in rows)
+        elif len(self._aliases) == 1:
+            alias = self._aliases[0]
+            rows = (row[alias] for row in rows)
+        return rows
+
+    def _getter(self, name: str) -> Callable:
+        alias, field = self._resolve(name)
+        get = operator.attrgetter(field)
+        return lambda row: get(row[alias])
+
+    def _grouped(self, rows: Iterable[dict]) -> Iterator[dict]:
+        keys, functions = self._group
+        key_getters = [self._getter(name) for _, name in keys]
+        value_getters = [self._getter(name) if name is not None else None for _, _, name in functions]
+        groups: Dict[tuple, list] = {}
+        for row in rows:
+            key = tuple(get(row) for get in key_getters)
+            state = groups.get(key)
+            if state is None:
+                # На агрегат: [число значений, сумма, минимум, максимум]
+                state = groups[key] = [[0, 0, None, None] for _ in functions]
+            for accumulator, get in zip(state, value_getters):
+                accumulator[0] += 1
+                if get is None:
+                    continue
+                value = get(row)
+                accumulator[1] += value
+                if accumulator[2] is None or value < accumulator[2]:
+                    accumulator[2] = value
+                if accumulator[3] is None or value > accumulator[3]:
+                    accumulator[3] = value
+        for key, state in groups.items():
+            result = {output: value for (output, _), value in zip(keys, key)}
+            for (output, function, _), (count, total, low, high) in zip(functions, state):
+                result[output] = {"count": count, "sum": total, "avg": total / count if count else None,
+                                  "min": low, "max": high}[function]
+            yield result
+
+    def _sort_getters(self, rows_are_entities: bool) -> List[Callable]:
+        if self._group is not None or self._select is not None:
+            getters = [operator.itemgetter(name) for name, _ in self._order]
+        elif rows_are_entities:
+            getters = [operator.attrgetter(self._resolve(name)[1]) for name, _ in self._order]
+        else:
+            getters = [self._getter(name) for name, _ in self._order]
+        return getters
+
+    def _ordered(self, rows: Iterable) -> Iterable:
+        getters = self._sort_getters(self._group is None and self._select is None and len(self._aliases) == 1)
+        directions = [descending for _, descending in self._order]
+        # None (например, после nullify) всегда идет последним
+        if len(set(directions)) == 1:
+            descending = directions[0]
+            key = lambda row: tuple(((value is not None) if descending else (value is None), value)
+                                    for value in (get(row) for get in getters))
+            if self._limit is not None:
+                select = heapq.nlargest if descending else heapq.nsmallest
+                return select(self._offset + self._limit, rows, key=key)
+            return sorted(rows, key=key, reverse=descending)
+        # Разные направления: поля по убыванию сравниваются в обратном порядке
+        parts = list(zip(getters, directions))
+        key = lambda row: tuple(_Descending((value is not None, value)) if descending else (value is None, value)
+                                for value, descending in ((get(row), descending) for get, descending in parts))
+        if self._limit is not None:
+            return heapq.nsmallest(self._offset + self._limit, rows, key=key)
+        return sorted(rows, key=key)
+
+    def _result(self) -> Iterator:
+        rows = self._output(self._rows())
+        if self._order:
+            rows = self._ordered(rows)
+        if self._limit is not None or self._offset:
+            stop = None if self._limit is None else self._offset + self._limit
+            rows = islice(rows, self._offset, stop)
+        return rows
+
+    def __iter__(self) -> Iterator:
+        # Блокировка не удерживается между шагами перебора: иначе изменение данных
+        # внутри цикла или брошенный перебор оставляли бы ее занятой
+        return iter(self.all())
+
+    def all(self) -> list:
+        """Все строки результата списком"""
+        with self.data.lock.read():
+            return list(self._result())
+
+    def first(self):
+        """Первая строка результата или None"""
+        rows = (self if self._limit is not None else self.limit(1, self._offset)).all()
+        return rows[0] if rows else None
+
+    def count(self) -> int:
+        """Число строк результата"""
+        with self.data.lock.read():
+            return sum(1 for _ in self._result())
+
+    def __repr__(self):
+        return f"Query({' + '.join(self._aliases)})"
+
+
+class _Descending:
+    """Ключ сортировки с обратным порядком сравнения"""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+
+def _filtered(rows: Iterable[dict], conditions: List[_Condition]) -> Iterable[dict]:
+    for condition in conditions:
+        rows = filter(condition.test, rows)
+    return rows
+
+
+def _joined(rows: Iterable[dict], alias: str, find: Callable) -> Iterator[dict]:
+    for row in rows:
+        for entity in find(row):
+            joined = dict(row)
+            joined[alias] = entity
+            yield joined
@@ -0,0 +1,248 @@
+"""Поиск по именам, email и кодам с префиксами и ранжированием.
+
+SearchIndex разбивает индексируемые поля (Student.name, Student.email,
+Professor.name, Course.name, Course.code) на слова, приводит их к единому
+виду (casefold, "ё" -> "е") и хранит отсортированный список слов, поэтому
+слова с заданным префиксом находятся двоичным поиском. Каждое слово запроса
+должно совпасть с началом какого-либо слова сущности: запрос "бел ил" найдет
+"Илья Белов", а "elez2006t@gm" - адрес elez2006t@gmail.com.
+
+Индекс подписывается на изменения UniversityData и обновляется при
+create_*/update_*/delete_* и операциях хранилищ.
+"""
+import re
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from unik import InvalidDataError, UniversityData
+
+# Индексируемые поля и их вес в ранжировании
+FIELDS = {
+    "student": {"name": 2.0, "email": 1.0},
+    "professor": {"name": 2.0},
+    "course": {"name": 2.0, "code": 1.0},
+}
+
+# Число результатов на странице по умолчанию
+DEFAULT_LIMIT = 20
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Приводит текст к виду для сравнения без учета регистра и "ё" """
+    return text.casefold().replace("ё", "е")
+
+
+def tokenize(text) -> List[str]:
+    """Разбивает значение поля или запрос на нормализованные слова"""
+    return _WORD.findall(normalize(str(text)))
+
+
+class SearchHit:
+    """Найденная сущность и ее оценка релевантности"""
+    __slots__ = ("entity_type", "entity", "score")
+
+    def __init__(self, entity_type: str, entity, score: float):
+        self.entity_type = entity_type
+        self.entity = entity
+        self.score = score
+
+    def __repr__(self):
+        return f"SearchHit({self.entity_type}, id={self.entity.id}, score={self.score:.2f})"
+
+
+class SearchResult:
+    """Страница результатов: hits с позиции offset и общее число совпадений total"""
+    __slots__ = ("hits", "total", "offset", "limit")
+
+    def __init__(self, hits: List[SearchHit], total: int, offset: int, limit: int):
+        self.hits = hits
+        self.total = total
+        self.offset = offset
+        self.limit = limit
+
+    def __iter__(self):
+        return iter(self.hits)
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    def __repr__(self):
+        return f"SearchResult(total={self.total}, offset={self.offset}, hits={self.hits!r})"
+
+
+class SearchIndex:
+    """Префиксный индекс слов для поиска студентов, профессоров и курсов"""
+
+    def __init__(self, data: UniversityData, fields: Dict[str, Dict[str, float]] = FIELDS):
+        self.data = data
+        self.fields = fields
+        # По типам сущностей: слово -> {вес: множество ID} и отсортированный список слов.
+        # Множества позволяют объединять и пересекать совпадения без цикла по ID
+        self._postings: Dict[str, Dict[str, Dict[float, Set[int]]]] = {name: {} for name in fields}
+        self._words: Dict[str, List[str]] = {}
+        # (тип, ID) -> слова сущности с весами, чтобы снимать ее с индекса при изменении
+        self._entity_words: Dict[Tuple[str, int], Dict[str, float]] = {}
+        with data.lock.read():
+            for entity_type in fields:
+                for entity in data.store(entity_type):
+                    self._add(entity_type, entity, sort=False)
+                self._words[entity_type] = sorted(self._postings[entity_type])
+        data.subscribe(self._on_change)
+
+    def close(self):
+        """Отписывается от изменений данных"""
+        self.data.unsubscribe(self._on_change)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Поддержка индекса
+
+    def _add(self, entity_type: str, entity, sort: bool = True):
+        words: Dict[str, float] = {}
+        for field, weight in self.fields[entity_type].items():
+            for position, word in enumerate(tokenize(getattr(entity, field))):
+                # Первое слово поля (обычно фамилия или имя) немного важнее остальных
+                score = weight * 1.1 if position == 0 else weight
+                if score > words.get(word, 0.0):
+                    words[word] = score
+        self._entity_words[(entity_type, entity.id)] = words
+        postings = self._postings[entity_type]
+        for word, score in words.items():
+            buckets = postings.get(word)
+            if buckets is None:
+                buckets = postings[word] = {}
+                if sort:
+                    insort(self._words[entity_type], word)
+            buckets.setdefault(score, set()).add(entity.id)
+
+    def _remove(self, entity_type: str, entity_id: int):
+        postings = self._postings[entity_type]
+        for word, score in self._entity_words.pop((entity_type, entity_id), {}).items():
+            buckets = postings[word]
+            buckets[score].discard(entity_id)
+            if not buckets[score]:
+                del buckets[score]
+            if not buckets:
+                del postings[word]
+                words = self._words[entity_type]
+                del words[bisect_left(words, word)]
+
+    def _rebuild(self, entity_type: str):
+        for key in [key for key in self._entity_words if key[0] == entity_type]:
+            del self._entity_words[key]
+        self._postings[entity_type] = {}
+        for entity in self.data.store(entity_type):
+            self._add(entity_type, entity, sort=False)
+        self._words[entity_type] = sorted(self._postings[entity_type])
+
+    def _on_change(self, entity_type: str, op: str, entity_id, entity, changes):
+        fields = self.fields.get(entity_type)
+        if fields is None:
+            return
+        if op == "create":
+            self._add(entity_type, entity)
+        elif op == "delete":
+            self._remove(entity_type, entity_id)
+        elif op == "update":
+            # Переиндексируем только при смене индексируемых полей или ID
+            if "id" in changes or not fields.keys().isdisjoint(changes):
+                self._remove(entity_type, entity_id)
+                self._add(entity_type, entity)
+        else:
+            self._rebuild(entity_type)
+
+    # Поиск
+
+    def _levels(self, entity_type: str, term: str) -> Dict[float, Set[int]]:
+        """Сущности со словом, начинающимся с term, сгруппированные по оценке совпадения"""
+        words = self._words[entity_type]
+        postings = self._postings[entity_type]
+        levels: Dict[float, Set[int]] = {}
+        start = bisect_left(words, term)
+        for word in words[start:bisect_left(words, term + "\U0010ffff", start)]:
+            # Полное совпадение слова ценится выше, чем дополнение префикса
+            closeness = 1.0 if word == term else 0.5 + 0.5 * len(term) / len(word)
+            for weight, ids in postings[word].items():
+                score = weight * closeness
+                if score in levels:
+                    levels[score] |= ids
+                else:
+                    levels[score] = set(ids)
+        # Сущность с несколькими подходящими словами остается только на лучшем уровне
+        seen: Set[int] = set()
+        for score in sorted(levels, reverse=True):
+            levels[score] -= seen
+            seen |= levels[score]
+        return levels
+
+    def _ranked(self, entity_type: str, terms: List[str]) -> Dict[float, Set[int]]:
+        """Уровни оценки для сущностей, совпавших со всеми словами запроса"""
+        per_term = sorted((self._levels(entity_type, term) for term in terms),
+                          key=lambda levels: sum(map(len, levels.values())))
+        if len(per_term) == 1:
+            return per_term[0]
+        # Пересекаем, начиная с самого редкого слова, и складываем оценки слов
+        candidates = set().union(*per_term[0].values())
+        for levels in per_term[1:]:
+            candidates &= set().union(*levels.values())
+        totals = dict.fromkeys(candidates, 0.0)
+        for levels in per_term:
+            for score, ids in levels.items():
+                for entity_id in ids & candidates:
+                    totals[entity_id] += score
+        ranked: Dict[float, Set[int]] = {}
+        for entity_id, score in totals.items():
+            ranked.setdefault(score, set()).add(entity_id)
+        return ranked
+
+    def search(self, query: str, types: Optional[Sequence[str]] = None,
+               limit: int = DEFAULT_LIMIT, offset: int = 0) -> SearchResult:
+        """Ищет сущности, каждое слово которых начинается со слов запроса.
+
+        types ограничивает типы сущностей ("student", "professor", "course").
+        Результаты упорядочены по убыванию релевантности, затем по типу и ID.
+        """
+        types = list(types) if types is not None else list(self.fields)
+        unknown = set(types) - self.fields.keys()
+        if unknown:
+            raise InvalidDataError(f"Тип сущности не индексируется: {sorted(unknown)}")
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return SearchResult([], 0, offset, limit)
+        with self.data.lock.read():
+            groups = []
+            for number, entity_type in enumerate(self.fields):
+                if entity_type in types:
+                    groups.extend((score, number, entity_type, ids)
+                                  for score, ids in self._ranked(entity_type, terms).items() if ids)
+            groups.sort(key=lambda group: (-group[0], group[1]))
+            # Сортируем ID только в тех группах, которые попадают на страницу
+            hits = []
+            skip = offset
+            for score, _, entity_type, ids in groups:
+                if len(hits) >= limit:
+                    break
+                if skip >= len(ids):
+                    skip -= len(ids)
+                    continue
+                store = self.data.store(entity_type)
+                hits.extend(SearchHit(entity_type, store.get(entity_id), score)
+                            for entity_id in sorted(ids)[skip:skip + limit - len(hits)])
+                skip = 0
+            total = sum(len(group[3]) for group in groups)
+        return SearchResult(hits, total, offset, limit)
+
+
+def search(data: UniversityData, query: str, **options) -> SearchResult:
+    """Разовый поиск без сохранения индекса; для повторных запросов используйте SearchIndex"""
+    index = SearchIndex(data)
+    try:
+        return index.search(query, **options)
+    finally:
+        index.close()
@@ -0,0 +1,227 @@
+"""Параллельный экспорт и импорт UniversityData в виде набора файлов-шардов.
+
+save_sharded() делит каждый раздел на N последовательных частей и
+сериализует их в пуле процессов; каждый шард - обычный university.json
+(или .xml) с одним разделом, который читается load_from_json/load_from_xml.
+Имя шарда содержит дайджест его строк, поэтому измененный шард пишется в
+новый файл, а прежние файлы не трогаются. Последним атомарно заменяется
+manifest.json со списком шардов: до этого момента каталог описывает прежнее
+сохранение целиком, после - новое; ненужные шарды затем удаляются.
+
+load_sharded() читает шарды параллельно и объединяет их в один
+UniversityData в порядке манифеста, проверяя уникальность ID между шардами.
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set
+from weakref import WeakKeyDictionary
+
+from unik import (SECTIONS, DuplicateIDError, InvalidDataError, UniversityData,
+                  _instrumented, _write_json, _write_xml, iter_json, iter_xml)
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+_EXTENSIONS = {"json": ".json", "xml": ".xml"}
+# Файлы шардов (и их недописанные временные файлы), которые save_sharded может удалить
+_SHARD_NAME = re.compile(r"^(?:%s)-\d{4}-[0-9a-f]{32}\.(?:json|xml)(?:\.tmp)?$" % "|".join(SECTIONS))
+
+
+def _fields(section: str):
+    return SECTIONS[section].__slots__
+
+
+# Функции, выполняемые в процессах пула: получают и возвращают кортежи значений полей,
+# так как их сериализация между процессами дешевле, чем объектов
+
+def _write_shard(path: str, fmt: str, section: str, rows: List[tuple]) -> int:
+    class_type = SECTIONS[section]
+    items = [class_type(*row) for row in rows]
+    tmp_name = path + ".tmp"
+    with open(tmp_name, 'w', encoding='utf-8') as f:
+        if fmt == "json":
+            _write_json(f, [(section, items)])
+        else:
+            _write_xml(f, [(section, items)])
+        # Шард должен оказаться на диске раньше манифеста, который на него ссылается
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_name, path)
+    return len(items)
+
+
+def _read_shard(path: str, fmt: str, section: str) -> List[tuple]:
+    # Записи проверяются декодерами схем, как при обычной загрузке
+    fields = _fields(section)
+    entities = iter_json(path, sections=[section]) if fmt == "json" else iter_xml(path, sections=[section])
+    return [tuple(getattr(entity, field) for field in fields) for _, entity in entities]
+
+
+def _digest(rows: List[tuple]) -> bytes:
+    # repr различает типы и значения полей (1 и 1.0, -1 и -2), в отличие от hash()
+    return hashlib.blake2b(repr(rows).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _chunks(rows: list, count: int) -> List[list]:
+    size = -(-len(rows) // count) if rows else 0
+    return [rows[start:start + size] for start in range(0, len(rows), size)] if size else []
+
+
+class _ShardState:
+    """Что было записано в каталог шардов при прошлом сохранении этих данных"""
+    __slots__ = ("fmt", "shards", "tokens", "files", "manifest")
+
+    def __init__(self, fmt: str, shards: int):
+        self.fmt = fmt
+        self.shards = shards
+        # Раздел -> (поколение данных, версия хранилища) на момент записи
+        self.tokens: Dict[str, tuple] = {}
+        # Имена файлов шардов в манифесте; имя содержит дайджест строк шарда
+        self.files: Set[str] = set()
+        self.manifest: dict = {}
+
+
+# Состояние сохранений по данным и каталогам; слабые ссылки не удерживают данные в памяти
+_STATES: "WeakKeyDictionary[UniversityData, Dict[str, _ShardState]]" = WeakKeyDictionary()
+
+
+def _previous_state(data: UniversityData, directory: str, fmt: str, shards: int) -> Optional[_ShardState]:
+    state = _STATES.get(data, {}).get(os.path.abspath(directory))
+    if state is None or (state.fmt, state.shards) != (fmt, shards):
+        return None
+    # Каталог могли изменить или очистить снаружи: тогда записываем все заново
+    try:
+        with open(os.path.join(directory, MANIFEST), 'r', encoding='utf-8') as f:
+            if json.load(f) != state.manifest:
+                return None
+    except (OSError, ValueError):
+        return None
+    return state
+
+
+@_instrumented()
+def save_sharded(data: UniversityData, directory: str, shards: int = 0, fmt: str = "json",
+                 workers: Optional[int] = None) -> dict:
+    """Сохраняет данные в каталог шардов и возвращает манифест.
+
+    shards - число частей на раздел (по умолчанию число процессоров),
+    fmt - "json" или "xml", workers - размер пула процессов
+    (0 - записывать в текущем процессе).
+
+    Повторное сохранение тех же данных в тот же каталог записывает только
+    шарды, содержимое которых изменилось; с skip_unchanged_saves разделы с
+    прежней версией хранилища не сериализуются вовсе. Сбой во время сохранения оставляет
+    каталог в прежнем состоянии.
+    """
+    if fmt not in _EXTENSIONS:
+        raise InvalidDataError(f"Неизвестный формат шардов: {fmt}")
+    shards = shards or os.cpu_count() or 1
+    os.makedirs(directory, exist_ok=True)
+    previous = _previous_state(data, directory, fmt, shards)
+    state = _ShardState(fmt, shards)
+
+    # Согласованный снимок значений измененных разделов берем под блокировкой чтения
+    sections = {}
+    with data.lock.read():
+        for name in SECTIONS:
+            state.tokens[name] = (data._generation, getattr(data, name).version)
+            # Версии хранилищ не видят прямых присваиваний атрибутов, поэтому
+            # пропускать раздел по версии можно только с skip_unchanged_saves
+            if (previous is None or not data._skip_unchanged_saves
+                    or previous.tokens.get(name) != state.tokens[name]):
+                sections[name] = [tuple(getattr(item, field) for field in _fields(name))
+                                  for item in getattr(data, name)]
+
+    jobs = []
+    manifest = {"format": fmt, "version": FORMAT_VERSION, "sections": {}}
+    for name in SECTIONS:
+        if name not in sections:
+            # Раздел не менялся: шарды и их записи в манифесте остаются прежними
+            manifest["sections"][name] = previous.manifest["sections"][name]
+            state.files.update(entry["file"] for entry in manifest["sections"][name])
+            continue
+        entries = manifest["sections"][name] = []
+        for number, chunk in enumerate(_chunks(sections[name], shards)):
+            filename = f"{name}-{number:04d}-{_digest(chunk).hex()}{_EXTENSIONS[fmt]}"
+            entries.append({"file": filename, "count": len(chunk)})
+            state.files.add(filename)
+            if previous is None or filename not in previous.files:
+                jobs.append((os.path.join(directory, filename), fmt, name, chunk))
+
+    if workers == 0 or len(jobs) < 2:
+        for job in jobs:
+            _write_shard(*job)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Дожидаемся всех шардов; result() пробрасывает ошибки записи
+            for future in [pool.submit(_write_shard, *job) for job in jobs]:
+                future.result()
+
+    if previous is None or manifest != previous.manifest:
+        tmp_name = os.path.join(directory, MANIFEST + ".tmp")
+        with open(tmp_name, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, os.path.join(directory, MANIFEST))
+        # Замена манифеста - момент фиксации; после нее удаляем шарды, на которые
+        # он не ссылается: прежние версии и остатки прерванных сохранений
+        for filename in os.listdir(directory):
+            if _SHARD_NAME.match(filename) and filename not in state.files:
+                try:
+                    os.remove(os.path.join(directory, filename))
+                except FileNotFoundError:
+                    pass
+    state.manifest = manifest
+    _STATES.setdefault(data, {})[os.path.abspath(directory)] = state
+    return manifest
+
+
+@_instrumented()
+def load_sharded(directory: str, workers: Optional[int] = None, columnar_grades: bool = False) -> UniversityData:
+    """Загружает каталог шардов, читая файлы параллельно.
+
+    DuplicateIDError выбрасывается, если ID повторяется в разных шардах,
+    InvalidDataError - если число записей в шарде не совпадает с манифестом.
+    """
+    with open(os.path.join(directory, MANIFEST), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    fmt = manifest["format"]
+    if manifest.get("version") != FORMAT_VERSION or fmt not in _EXTENSIONS:
+        raise InvalidDataError(f"Неподдерживаемый манифест шардов: {manifest.get('version')}, {fmt}")
+
+    jobs = [(os.path.join(directory, entry["file"]), fmt, name, entry)
+            for name, entries in manifest["sections"].items() if name in SECTIONS
+            for entry in entries]
+
+    data = UniversityData(columnar_grades)
+    if workers == 0 or not jobs:
+        _merge(data, jobs, (_read_shard(*job[:3]) for job in jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Шарды объединяются в порядке манифеста, пока остальные еще читаются
+            futures = [pool.submit(_read_shard, *job[:3]) for job in jobs]
+            _merge(data, jobs, (future.result() for future in futures))
+    return data
+
+
+def _merge(data: UniversityData, jobs: list, results):
+    for (_, _, name, entry), rows in zip(jobs, results):
+        if len(rows) != entry["count"]:
+            raise InvalidDataError(f"Шард {entry['file']}: ожидалось {entry['count']} записей, найдено {len(rows)}")
+        class_type = SECTIONS[name]
+        store = getattr(data, name)
+        for row in rows:
+            try:
+                store.add(class_type(*row))
+            except DuplicateIDError:
+                raise DuplicateIDError(f"ID {row[0]} из шарда {entry['file']} уже встречался в разделе {name}") from None
+
+
+def shard_counts(directory: str) -> Dict[str, int]:
+    """Число записей по разделам согласно манифесту"""
+    with open(os.path.join(directory, MANIFEST), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    return {name: sum(entry["count"] for entry in entries) for name, entries in manifest["sections"].items()}
@@ -0,0 +1,418 @@
+"""Бинарный формат снимка UniversityData с загрузкой через mmap.
+
+Каждый раздел хранится колонками фиксированной ширины (целые - int64,
+вещественные - float64), строки лежат в общей куче UTF-8, а ID и ключи
+вторичных индексов оценок (student_id, course_id) - в отсортированных
+массивах для двоичного поиска. В конце файла записаны JSON с описанием
+расположения блоков и трейлер со смещением этого описания.
+
+open_snapshot() отображает файл в память и отдает объект с тем же
+интерфейсом чтения, что и UniversityData: find_student, grades_for_student
+и другие запросы работают прямо по отображенному файлу, создавая объекты
+только для запрошенных записей.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, get_type_hints
+
+from unik import (NULL_LOCK, SECTIONS, DuplicateIDError, InvalidDataError, NotFoundError, UniversityData,
+                  UniversityDataError, _instrumented, _is_false, iter_json, iter_xml, logger, save_to_json,
+                  save_to_xml)
+
+MAGIC = b"UNIKSNAP"
+FORMAT_VERSION = 1
+# Трейлер: смещение и длина JSON описания, затем сигнатура
+_TRAILER = struct.Struct("<QQ8s")
+_ALIGN = 8
+
+# Вторичные индексы, которые записываются для разделов
+_SECONDARY_INDEXES = {"grades": ("student_id", "course_id")}
+
+# Признаки типа значения в вещественных колонках, чтобы целые оставались целыми
+_KIND_INT = 0
+_KIND_FLOAT = 1
+
+
+def _fields(class_type) -> List[tuple]:
+    """Поля сущности и их типы из аннотаций конструктора"""
+    hints = get_type_hints(class_type.__init__)
+    return [(field, hints[field]) for field in class_type.__slots__]
+
+
+# Запись снимка
+
+class _BlockWriter:
+    """Пишет выровненные блоки и запоминает их смещения"""
+
+    def __init__(self, f):
+        self._f = f
+        self._f.write(MAGIC)
+        self.position = len(MAGIC)
+
+    def write(self, block) -> int:
+        padding = -self.position % _ALIGN
+        if padding:
+            self._f.write(b"\0" * padding)
+            self.position += padding
+        offset = self.position
+        raw = block.tobytes() if isinstance(block, array) else bytes(block)
+        self._f.write(raw)
+        self.position += len(raw)
+        return offset
+
+
+def _sorted_index(keys: array, writer: _BlockWriter) -> dict:
+    # Устойчивая сортировка сохраняет порядок добавления внутри одного ключа
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return {"keys": writer.write(array('q', (keys[row] for row in order))),
+            "rows": writer.write(array('q', order))}
+
+
+def _write_section(writer: _BlockWriter, heap: bytearray, name: str, items) -> dict:
+    class_type = SECTIONS[name]
+    fields = _fields(class_type)
+    columns = {}
+    for field, field_type in fields:
+        if field_type is str:
+            columns[field] = (array('q'), array('q'))
+        elif field_type is float:
+            columns[field] = (array('d'), bytearray())
+        else:
+            columns[field] = array('q')
+
+    count = 0
+    for item in items:
+        for field, field_type in fields:
+            value = getattr(item, field)
+            column = columns[field]
+            if field_type is str:
+                offsets, lengths = column
+                if value is None:
+                    offsets.append(0)
+                    lengths.append(-1)
+                elif isinstance(value, str):
+                    raw = value.encode("utf-8")
+                    offsets.append(len(heap))
+                    lengths.append(len(raw))
+                    heap += raw
+                else:
+                    raise InvalidDataError(f"{name}: поле {field} записи {item.id} должно быть строкой")
+            elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise InvalidDataError(f"{name}: поле {field} записи {item.id} должно быть числом")
+            elif field_type is float:
+                values, kinds = column
+                values.append(value)
+                kinds.append(_KIND_INT if isinstance(value, int) else _KIND_FLOAT)
+            elif isinstance(value, int):
+                column.append(value)
+            else:
+                raise InvalidDataError(f"{name}: поле {field} записи {item.id} должно быть целым")
+        count += 1
+
+    meta_columns = {}
+    for field, field_type in fields:
+        column = columns[field]
+        if field_type is str:
+            meta_columns[field] = {"type": "str", "offsets": writer.write(column[0]),
+                                   "lengths": writer.write(column[1])}
+        elif field_type is float:
+            meta_columns[field] = {"type": "float", "values": writer.write(column[0]),
+                                   "kinds": writer.write(column[1])}
+        else:
+            meta_columns[field] = {"type": "int", "values": writer.write(column)}
+
+    indexes = {"id": _sorted_index(columns["id"], writer)}
+    for field in _SECONDARY_INDEXES.get(name, ()):
+        indexes[field] = _sorted_index(columns[field], writer)
+    return {"count": count, "columns": meta_columns, "indexes": indexes}
+
+
+def write_snapshot(data: UniversityData, filename: str):
+    """Записывает снимок атомарно: сначала во временный файл, затем переименование"""
+    tmp_name = filename + ".tmp"
+    with open(tmp_name, "wb") as f:
+        writer = _BlockWriter(f)
+        heap = bytearray()
+        sections = {name: _write_section(writer, heap, name, getattr(data, name)) for name in SECTIONS}
+        heap_offset = writer.write(heap)
+        meta = {"format": FORMAT_VERSION, "byteorder": sys.byteorder,
+                "heap": [heap_offset, len(heap)], "sections": sections}
+        raw_meta = json.dumps(meta).encode("utf-8")
+        meta_offset = writer.write(raw_meta)
+        f.write(_TRAILER.pack(meta_offset, len(raw_meta), MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_name, filename)
+
+
+# Чтение снимка
+
+class SnapshotSection:
+    """Раздел снимка, доступный только для чтения, с интерфейсом хранилища.
+
+    Объекты сущностей создаются при обращении к конкретной записи.
+    """
+
+    def __init__(self, snapshot: "SnapshotData", name: str, meta: dict):
+        self._class = SECTIONS[name]
+        self._count = meta["count"]
+        self._heap = snapshot._heap
+        self._decoders = []
+        self._ids = None
+        for field, field_type in _fields(self._class):
+            column = meta["columns"][field]
+            if column["type"] == "str":
+                self._decoders.append(self._string_decoder(
+                    snapshot._view(column["offsets"], self._count, 'q'),
+                    snapshot._view(column["lengths"], self._count, 'q')))
+            elif column["type"] == "float":
+                self._decoders.append(self._float_decoder(
+                    snapshot._view(column["values"], self._count, 'd'),
+                    snapshot._view(column["kinds"], self._count, 'B')))
+            else:
+                values = snapshot._view(column["values"], self._count, 'q')
+                self._decoders.append(values.__getitem__)
+                if field == "id":
+                    self._ids = values
+        self._indexes = {field: (snapshot._view(index["keys"], self._count, 'q'),
+                                 snapshot._view(index["rows"], self._count, 'q'))
+                         for field, index in meta["indexes"].items()}
+
+    def _string_decoder(self, offsets, lengths):
+        heap = self._heap
+
+        def decode(row):
+            length = lengths[row]
+            if length < 0:
+                return None
+            start = offsets[row]
+            return str(heap[start:start + length], "utf-8")
+        return decode
+
+    @staticmethod
+    def _float_decoder(values, kinds):
+        def decode(row):
+            value = values[row]
+            return int(value) if kinds[row] == _KIND_INT else value
+        return decode
+
+    # Версия не меняется: снимок неизменяем
+    version = 0
+
+    def _entity(self, row: int):
+        return self._class(*[decode(row) for decode in self._decoders])
+
+    def __iter__(self) -> Iterator:
+        for row in range(self._count):
+            yield self._entity(row)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _row_of(self, entity_id) -> int:
+        keys, rows = self._indexes["id"]
+        position = bisect_left(keys, entity_id)
+        if position < self._count and keys[position] == entity_id:
+            return rows[position]
+        return -1
+
+    def __contains__(self, entity_id) -> bool:
+        return self._row_of(entity_id) >= 0
+
+    def ids(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def get(self, entity_id: int, default=None):
+        row = self._row_of(entity_id)
+        return self._entity(row) if row >= 0 else default
+
+    def _select(self, field: str, key: int) -> list:
+        if field not in self._indexes:
+            raise NotFoundError(f"В снимке нет индекса по полю {field}")
+        keys, rows = self._indexes[field]
+        start, end = bisect_left(keys, key), bisect_right(keys, key)
+        return [self._entity(rows[position]) for position in range(start, end)]
+
+    def for_student(self, student_id: int) -> list:
+        """Оценки студента по индексу student_id из файла"""
+        return self._select("student_id", student_id)
+
+    def for_course(self, course_id: int) -> list:
+        """Оценки по курсу по индексу course_id из файла"""
+        return self._select("course_id", course_id)
+
+    def _read_only(self, *args, **kwargs):
+        raise UniversityDataError("Снимок открыт только для чтения, используйте load_snapshot")
+
+    add = append = extend = remove = update = clear = _read_only
+
+
+class SnapshotData:
+    """Снимок, отображенный в память, с интерфейсом чтения UniversityData"""
+
+    def __init__(self, filename: str):
+        self._file = open(filename, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise InvalidDataError(f"Файл {filename} пуст") from None
+        self._views: List[memoryview] = []
+        try:
+            self._open(filename)
+        except Exception as e:
+            self.close()
+            if isinstance(e, (KeyError, TypeError, ValueError, struct.error)):
+                # Испорченное описание блоков: json, неверные ключи или смещения
+                raise InvalidDataError(f"Снимок {filename} поврежден: {e!r}") from None
+            raise
+
+    def _open(self, filename: str):
+        buffer = memoryview(self._mmap)
+        self._views.append(buffer)
+        if len(buffer) < len(MAGIC) + _TRAILER.size or buffer[:len(MAGIC)] != MAGIC:
+            raise InvalidDataError(f"Файл {filename} не является снимком")
+        meta_offset, meta_length, magic = _TRAILER.unpack_from(buffer, len(buffer) - _TRAILER.size)
+        if magic != MAGIC:
+            raise InvalidDataError(f"Снимок {filename} поврежден")
+        meta = json.loads(bytes(buffer[meta_offset:meta_offset + meta_length]))
+        if meta["format"] != FORMAT_VERSION:
+            raise InvalidDataError(f"Неподдерживаемая версия снимка: {meta['format']}")
+        if meta["byteorder"] != sys.byteorder:
+            raise InvalidDataError("Снимок записан на платформе с другим порядком байт")
+
+        heap_offset, heap_length = meta["heap"]
+        self._heap = self._view(heap_offset, heap_length, 'B')
+        self._sections: Dict[str, SnapshotSection] = {
+            name: SnapshotSection(self, name, meta["sections"][name]) for name in SECTIONS}
+
+    def _view(self, offset: int, count: int, fmt: str) -> memoryview:
+        """Возвращает типизированное окно в отображенный файл без копирования"""
+        size = struct.calcsize(fmt)
+        view = memoryview(self._mmap)[offset:offset + count * size].cast(fmt)
+        self._views.append(view)
+        if offset < 0 or len(view) != count:
+            raise InvalidDataError("Блок снимка выходит за границы файла")
+        return view
+
+    students = property(lambda self: self._sections["students"])
+    professors = property(lambda self: self._sections["professors"])
+    courses = property(lambda self: self._sections["courses"])
+    departments = property(lambda self: self._sections["departments"])
+    grades = property(lambda self: self._sections["grades"])
+
+    def store(self, entity_type: str) -> SnapshotSection:
+        return self._sections[entity_type + "s"]
+
+    version = (0, ())
+    # Снимок неизменяем, поэтому CRUD функциям не нужна настоящая блокировка
+    lock = NULL_LOCK
+    integrity = None
+
+    def close(self):
+        """Освобождает окна и закрывает отображение файла"""
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_snapshot(filename: str) -> SnapshotData:
+    """Открывает снимок через mmap без создания объектов сущностей"""
+    return SnapshotData(filename)
+
+
+# Функция для сохранения данных в бинарный снимок; файл с общей кучей строк
+# переписывается целиком (с skip_unchanged_saves - только если данные изменились
+# после прошлой записи); возвращает False, если записать не удалось
+@_instrumented(_is_false)
+def save_snapshot(data: UniversityData, filename: str):
+    try:
+        with data.lock.read():
+            if data._is_saved("snapshot", filename):
+                logger.info("Изменений нет, %s не перезаписан", filename)
+                return True
+            write_snapshot(data, filename)
+            data._mark_saved("snapshot", filename)
+        logger.info("Данные сохранены в %s", filename)
+        return True
+    except Exception as e:
+        logger.error("Ошибка сохранения снимка: %s", e)
+    return False
+
+
+# Функция для полной загрузки снимка в изменяемый UniversityData; поврежденный
+# снимок выбрасывает InvalidDataError, частично загруженные данные не возвращаются
+@_instrumented()
+def load_snapshot(filename: str, columnar_grades: bool = False) -> UniversityData:
+    data = UniversityData(columnar_grades)
+    try:
+        # Хранилища заполняются, только когда декодированы все разделы
+        with open_snapshot(filename) as snapshot:
+            sections = {name: list(getattr(snapshot, name)) for name in SECTIONS}
+        loaded = UniversityData(columnar_grades)
+        for name, items in sections.items():
+            getattr(loaded, name).extend(items)
+        data = loaded
+        logger.info("Данные загружены из %s", filename)
+    except FileNotFoundError:
+        logger.warning("Файл %s не найден", filename)
+    except InvalidDataError as e:
+        logger.error("Ошибка загрузки снимка: %s", e)
+        raise
+    except (DuplicateIDError, IndexError, ValueError) as e:
+        # Повторяющиеся ID или испорченные строки в куче (UnicodeDecodeError)
+        logger.error("Ошибка загрузки снимка: %s", e)
+        raise InvalidDataError(f"Снимок {filename} поврежден: {e}") from None
+    except Exception as e:
+        logger.error("Ошибка загрузки снимка: %s", e)
+    return data
+
+
+def iter_snapshot(filename: str) -> Iterator:
+    """Выдает пары (раздел, сущность) из снимка, как iter_json и iter_xml"""
+    with open_snapshot(filename) as snapshot:
+        for name in SECTIONS:
+            for entity in getattr(snapshot, name):
+                yield name, entity
+
+
+# Читатели и сохранятели по расширению файла. Для конвертации нужны читатели,
+# выбрасывающие ошибки: load_* при ошибке возвращают пустые данные
+_READERS = {".json": iter_json, ".xml": iter_xml, ".snap": iter_snapshot}
+_SAVERS = {".json": save_to_json, ".xml": save_to_xml, ".snap": save_snapshot}
+
+
+def convert(source: str, target: str):
+    """Конвертирует данные между форматами .json, .xml и .snap по расширению файлов.
+
+    Ошибка чтения source выбрасывается как есть, а target заменяется только
+    после успешной записи, поэтому неудачная конвертация его не портит.
+    """
+    reader = _READERS.get(os.path.splitext(source)[1].lower())
+    saver = _SAVERS.get(os.path.splitext(target)[1].lower())
+    if reader is None or saver is None:
+        raise InvalidDataError(f"Неизвестный формат: {source} -> {target}")
+    data = UniversityData()
+    for section, entity in reader(source):
+        getattr(data, section).add(entity)
+    tmp_name = target + ".tmp"
+    try:
+        if not saver(data, tmp_name):
+            raise UniversityDataError(f"Не удалось записать {target}")
+        os.replace(tmp_name, target)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
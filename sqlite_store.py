@@ -0,0 +1,271 @@
+"""Хранилище данных университета на стандартном модуле sqlite3.
+
+SQLiteUniversity повторяет CRUD интерфейс unik (create_*/find_*/update_*/
+delete_* для всех пяти типов сущностей) поверх таблиц с индексами, поэтому
+объем данных не ограничен оперативной памятью. База открывается в режиме
+WAL: читатели из других соединений и процессов работают параллельно с
+писателем. Пакетные операции выполняются одной транзакцией через
+executemany, импорт и экспорт JSON/XML идут потоково.
+
+В отличие от функций unik, методы не печатают ошибки, а выбрасывают
+DuplicateIDError, NotFoundError и InvalidDataError.
+"""
+import sqlite3
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from unik import (ENTITY_TYPES, SCHEMAS, SECTIONS, DuplicateIDError, InvalidDataError, NotFoundError,
+                  UniversityData, _validate_id, _write_json, _write_xml, iter_json, iter_xml)
+
+# Таблицы по типам сущностей. У колонки grade нет объявленного типа, чтобы
+# SQLite хранил целые и вещественные оценки как есть и экспорт был без потерь
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY, name TEXT, email TEXT, year INTEGER, faculty TEXT);
+CREATE TABLE IF NOT EXISTS professors (
+    id INTEGER PRIMARY KEY, name TEXT, email TEXT, department TEXT);
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY, name TEXT, code TEXT, credits INTEGER);
+CREATE TABLE IF NOT EXISTS departments (
+    id INTEGER PRIMARY KEY, name TEXT, head TEXT);
+CREATE TABLE IF NOT EXISTS grades (
+    id INTEGER PRIMARY KEY, student_id INTEGER, course_id INTEGER, grade);
+CREATE INDEX IF NOT EXISTS grades_student_id ON grades (student_id);
+CREATE INDEX IF NOT EXISTS grades_course_id ON grades (course_id);
+CREATE INDEX IF NOT EXISTS students_faculty ON students (faculty);
+CREATE INDEX IF NOT EXISTS professors_department ON professors (department);
+"""
+
+# Размер пакета строк для executemany при импорте
+DEFAULT_BATCH_SIZE = 5000
+
+
+class _Statements:
+    """Заранее подготовленные тексты запросов для одного типа сущности"""
+
+    def __init__(self, entity_type: str):
+        self.class_type = ENTITY_TYPES[entity_type]
+        self.schema = SCHEMAS[self.class_type]
+        self.fields: Tuple[str, ...] = self.class_type.__slots__
+        table = entity_type + "s"
+        self.table = table
+        columns = ", ".join(self.fields)
+        placeholders = ", ".join("?" for _ in self.fields)
+        self.insert = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+        self.select = f"SELECT {columns} FROM {table}"
+        self.select_by_id = f"{self.select} WHERE id = ?"
+        self.delete = f"DELETE FROM {table} WHERE id = ?"
+        self.exists = f"SELECT 1 FROM {table} WHERE id = ?"
+
+
+class SQLiteUniversity:
+    """CRUD поверх базы SQLite с интерфейсом, повторяющим функции unik"""
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # В режиме WAL synchronous=NORMAL сохраняет целостность и заметно быстрее FULL
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._statements: Dict[str, _Statements] = {name: _Statements(name) for name in ENTITY_TYPES}
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _stmts(self, entity_type: str) -> _Statements:
+        try:
+            return self._statements[entity_type]
+        except KeyError:
+            raise InvalidDataError(f"Неизвестный тип сущности: {entity_type}") from None
+
+    def _row(self, stmts: _Statements, record: dict) -> tuple:
+        # Те же проверки набора полей и типов, что у create_many в unik
+        stmts.schema.check(record)
+        _validate_id(record["id"])
+        return tuple(record[field] for field in stmts.fields)
+
+    # Обобщенные CRUD операции
+
+    def create(self, entity_type: str, **fields):
+        """Создает сущность; DuplicateIDError, если ID занят"""
+        stmts = self._stmts(entity_type)
+        row = self._row(stmts, fields)
+        try:
+            with self._conn:
+                self._conn.execute(stmts.insert, row)
+        except sqlite3.IntegrityError:
+            raise DuplicateIDError(f"ID {fields['id']} уже существует") from None
+        return stmts.class_type(*row)
+
+    def find(self, entity_type: str, entity_id: int):
+        """Возвращает сущность по ID; NotFoundError, если ее нет"""
+        stmts = self._stmts(entity_type)
+        _validate_id(entity_id)
+        row = self._conn.execute(stmts.select_by_id, (entity_id,)).fetchone()
+        if row is None:
+            raise NotFoundError(f"ID {entity_id} не найден")
+        return stmts.class_type(*row)
+
+    def update(self, entity_type: str, entity_id: int, **changes):
+        """Обновляет существующие поля сущности; неизвестные поля игнорируются, как в unik"""
+        stmts = self._stmts(entity_type)
+        _validate_id(entity_id)
+        changes = {key: value for key, value in changes.items() if key in stmts.fields}
+        stmts.schema.check(changes, partial=True)
+        if "id" in changes:
+            _validate_id(changes["id"])
+        try:
+            with self._conn:
+                if changes:
+                    assignments = ", ".join(f"{key} = ?" for key in changes)
+                    cursor = self._conn.execute(f"UPDATE {stmts.table} SET {assignments} WHERE id = ?",
+                                                (*changes.values(), entity_id))
+                    found = cursor.rowcount > 0
+                else:
+                    found = self._conn.execute(stmts.exists, (entity_id,)).fetchone() is not None
+                if not found:
+                    raise NotFoundError(f"ID {entity_id} не найден")
+        except sqlite3.IntegrityError:
+            raise DuplicateIDError(f"ID {changes.get('id')} уже существует") from None
+        return True
+
+    def delete(self, entity_type: str, entity_id: int):
+        """Удаляет сущность по ID; NotFoundError, если ее нет"""
+        stmts = self._stmts(entity_type)
+        _validate_id(entity_id)
+        with self._conn:
+            cursor = self._conn.execute(stmts.delete, (entity_id,))
+        if cursor.rowcount == 0:
+            raise NotFoundError(f"ID {entity_id} не найден")
+        return True
+
+    def create_many(self, entity_type: str, records: Iterable[dict]) -> int:
+        """Вставляет пакет записей одной транзакцией; при дубликате ID откатывает весь пакет"""
+        stmts = self._stmts(entity_type)
+        try:
+            with self._conn:
+                cursor = self._conn.executemany(stmts.insert, (self._row(stmts, record) for record in records))
+        except sqlite3.IntegrityError as e:
+            raise DuplicateIDError(f"Пакет содержит уже существующий ID: {e}") from None
+        return cursor.rowcount
+
+    def delete_many(self, entity_type: str, ids: Iterable[int]) -> int:
+        """Удаляет пакет сущностей одной транзакцией и возвращает число удаленных"""
+        stmts = self._stmts(entity_type)
+        with self._conn:
+            cursor = self._conn.executemany(stmts.delete, ((entity_id,) for entity_id in ids))
+        return cursor.rowcount
+
+    def iter_entities(self, entity_type: str) -> Iterator:
+        """Перебирает сущности в порядке ID, не загружая таблицу целиком"""
+        stmts = self._stmts(entity_type)
+        for row in self._conn.execute(stmts.select + " ORDER BY id"):
+            yield stmts.class_type(*row)
+
+    def count(self, entity_type: str) -> int:
+        stmts = self._stmts(entity_type)
+        return self._conn.execute(f"SELECT COUNT(*) FROM {stmts.table}").fetchone()[0]
+
+    # Запросы по оценкам с использованием индексов
+
+    def grades_for_student(self, student_id: int) -> List:
+        stmts = self._statements["grade"]
+        rows = self._conn.execute(stmts.select + " WHERE student_id = ? ORDER BY id", (student_id,))
+        return [stmts.class_type(*row) for row in rows]
+
+    def grades_for_course(self, course_id: int) -> List:
+        stmts = self._statements["grade"]
+        rows = self._conn.execute(stmts.select + " WHERE course_id = ? ORDER BY id", (course_id,))
+        return [stmts.class_type(*row) for row in rows]
+
+    def average_grade(self, student_id: int) -> Optional[float]:
+        return self._conn.execute("SELECT AVG(grade) FROM grades WHERE student_id = ?", (student_id,)).fetchone()[0]
+
+    # Импорт и экспорт
+
+    def _import(self, entities: Iterable[tuple], batch_size: int) -> int:
+        """Вставляет пары (раздел, сущность) пакетами в одной транзакции"""
+        total = 0
+        iterator = iter(entities)
+        try:
+            with self._conn:
+                while True:
+                    batch = list(islice(iterator, batch_size))
+                    if not batch:
+                        break
+                    by_section: Dict[str, list] = {}
+                    for section, entity in batch:
+                        by_section.setdefault(section, []).append(entity)
+                    for section, items in by_section.items():
+                        stmts = self._statements[SECTIONS[section].__name__.lower()]
+                        self._conn.executemany(stmts.insert, (
+                            tuple(getattr(item, field) for field in stmts.fields) for item in items))
+                    total += len(batch)
+        except sqlite3.IntegrityError as e:
+            raise DuplicateIDError(f"Импорт содержит уже существующий ID: {e}") from None
+        return total
+
+    def import_json(self, filename: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Потоково импортирует university.json; возвращает число записей"""
+        return self._import(iter_json(filename), batch_size)
+
+    def import_xml(self, filename: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Потоково импортирует university.xml; возвращает число записей"""
+        return self._import(iter_xml(filename), batch_size)
+
+    def import_data(self, data: UniversityData, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Импортирует все сущности из UniversityData"""
+        return self._import(((name, item) for name in SECTIONS for item in getattr(data, name)), batch_size)
+
+    def _sections(self):
+        return ((name, self.iter_entities(class_type.__name__.lower())) for name, class_type in SECTIONS.items())
+
+    def export_json(self, filename: str):
+        """Экспортирует базу в формат save_to_json без загрузки в память"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            _write_json(f, self._sections())
+
+    def export_xml(self, filename: str, pretty: bool = True):
+        """Экспортирует базу в формат save_to_xml без загрузки в память"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            _write_xml(f, self._sections(), pretty)
+
+    def to_data(self) -> UniversityData:
+        """Загружает всю базу в UniversityData"""
+        data = UniversityData()
+        for name, items in self._sections():
+            getattr(data, name).extend(items)
+        return data
+
+
+def _bind(entity_type: str):
+    # Методы create_student, find_student и т.д. для каждого типа сущности
+    def create(self, **fields):
+        return self.create(entity_type, **fields)
+
+    def find(self, entity_id: int):
+        return self.find(entity_type, entity_id)
+
+    def update(self, entity_id: int, **changes):
+        return self.update(entity_type, entity_id, **changes)
+
+    def delete(self, entity_id: int):
+        return self.delete(entity_type, entity_id)
+
+    for verb, action, method in (("create", "Создает", create), ("find", "Находит", find),
+                                 ("update", "Обновляет", update), ("delete", "Удаляет", delete)):
+        method.__name__ = method.__qualname__ = f"{verb}_{entity_type}"
+        method.__doc__ = f"{action} сущность типа {entity_type}"
+        setattr(SQLiteUniversity, method.__name__, method)
+
+
+for _entity_type in ENTITY_TYPES:
+    _bind(_entity_type)
+del _entity_type
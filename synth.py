@@ -0,0 +1,236 @@
+"""Детерминированный генератор синтетических данных университета.
+
+generate() строит UniversityData заданного размера: студенты, профессора,
+курсы, кафедры и оценки с правдоподобными русскими ФИО, email и кодами
+направлений. При одинаковых параметрах и seed результат совпадает до байта
+(в том числе между запусками и версиями Python), поэтому наборы пригодны
+для сравнения замеров между версиями кода.
+
+Оценки создаются потоком, и при columnar_grades=True даже 20 млн оценок
+не требуют объекта на каждую запись:
+
+    data = generate(students=1_000_000, grades=20_000_000, columnar_grades=True)
+
+Запуск: python synth.py --students N [--grades N] [--seed S] [--output file.json|file.xml]
+"""
+import argparse
+import random
+from typing import Iterator, Optional
+
+from unik import Course, Department, Grade, InvalidDataError, Professor, Student, UniversityData
+
+# Мужские имена и образованные от них отчества (мужское, женское)
+MALE_NAMES = (
+    ("Александр", "Александрович", "Александровна"), ("Алексей", "Алексеевич", "Алексеевна"),
+    ("Андрей", "Андреевич", "Андреевна"), ("Артем", "Артемович", "Артемовна"),
+    ("Борис", "Борисович", "Борисовна"), ("Вадим", "Вадимович", "Вадимовна"),
+    ("Василий", "Васильевич", "Васильевна"), ("Виктор", "Викторович", "Викторовна"),
+    ("Владимир", "Владимирович", "Владимировна"), ("Владислав", "Владиславович", "Владиславовна"),
+    ("Дмитрий", "Дмитриевич", "Дмитриевна"), ("Евгений", "Евгеньевич", "Евгеньевна"),
+    ("Егор", "Егорович", "Егоровна"), ("Иван", "Иванович", "Ивановна"),
+    ("Игорь", "Игоревич", "Игоревна"), ("Илья", "Ильич", "Ильинична"),
+    ("Кирилл", "Кириллович", "Кирилловна"), ("Константин", "Константинович", "Константиновна"),
+    ("Максим", "Максимович", "Максимовна"), ("Михаил", "Михайлович", "Михайловна"),
+    ("Никита", "Никитич", "Никитична"), ("Николай", "Николаевич", "Николаевна"),
+    ("Олег", "Олегович", "Олеговна"), ("Павел", "Павлович", "Павловна"),
+    ("Роман", "Романович", "Романовна"), ("Сергей", "Сергеевич", "Сергеевна"),
+    ("Степан", "Степанович", "Степановна"), ("Тимофей", "Тимофеевич", "Тимофеевна"),
+    ("Федор", "Федорович", "Федоровна"), ("Юрий", "Юрьевич", "Юрьевна"),
+)
+
+FEMALE_NAMES = (
+    "Александра", "Алина", "Алиса", "Анастасия", "Анна", "Валерия", "Вера", "Виктория",
+    "Дарья", "Екатерина", "Елена", "Елизавета", "Ирина", "Ксения", "Любовь", "Мария",
+    "Марина", "Надежда", "Наталья", "Ольга", "Полина", "Светлана", "София", "Татьяна",
+    "Ульяна", "Юлия",
+)
+
+# Фамилии в мужской форме; женская образуется по окончанию (см. _female_surname)
+SURNAMES = (
+    "Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов",
+    "Новиков", "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семенов", "Егоров",
+    "Павлов", "Козлов", "Степанов", "Николаев", "Орлов", "Андреев", "Макаров", "Никитин",
+    "Захаров", "Зайцев", "Соловьев", "Борисов", "Яковлев", "Григорьев", "Романов", "Воробьев",
+    "Сергеев", "Фролов", "Белов", "Тарасов", "Медведев", "Ершов", "Комаров", "Орешников",
+    "Чеканин", "Ильин", "Гусев", "Титов", "Кудрявцев", "Баранов", "Куликов", "Киселев",
+    "Брусиловский", "Вишневский", "Полянский", "Ковальский", "Дубровский", "Толстой",
+    "Черных", "Седых", "Шевченко", "Ткаченко", "Бондаренко", "Гордиенко",
+)
+
+# Кафедры; их названиями студенты обозначают факультет, как "ИИТ" в демонстрации unik
+DEPARTMENTS = ("ИИТ", "ИКБ", "ИПТИП", "ИРИ", "ИТУ", "ИТХТ", "ФМИ", "ФФ", "ЭФ", "ЮФ", "ФИЯ", "ИФ")
+
+# Дисциплины и коды направлений, к которым они относятся
+SUBJECTS = (
+    ("Математический анализ", "01.03.02"), ("Линейная алгебра", "01.03.02"),
+    ("Дискретная математика", "01.03.04"), ("Теория вероятностей", "01.03.02"),
+    ("Программирование на Python", "09.03.04"), ("Алгоритмы и структуры данных", "09.03.01"),
+    ("Базы данных", "09.03.02"), ("Операционные системы", "09.03.01"),
+    ("Компьютерные сети", "09.03.01"), ("Прикладная информатика", "09.03.03"),
+    ("Прикладная математика и информатика", "01.03.02"), ("Машинное обучение", "01.03.02"),
+    ("Информационная безопасность", "10.03.01"), ("Криптография", "10.03.01"),
+    ("Физика", "03.03.02"), ("Электротехника", "11.03.02"), ("Органическая химия", "04.03.01"),
+    ("Микроэкономика", "38.03.01"), ("Менеджмент", "38.03.02"), ("Гражданское право", "40.03.01"),
+    ("Английский язык", "45.03.02"), ("История России", "46.03.01"), ("Философия", "47.03.01"),
+)
+
+EMAIL_DOMAINS = ("gmail.com", "yandex.ru", "mail.ru", "rambler.ru", "edu.ru")
+
+# Транслитерация для email
+_TRANSLIT = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh", "з": "z",
+    "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+    "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh",
+    "щ": "shch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+}
+
+
+def translit(text: str) -> str:
+    """Латинская запись русского слова для адреса email"""
+    return "".join(_TRANSLIT.get(char, char) for char in text.lower())
+
+
+def _female_surname(surname: str) -> str:
+    if surname.endswith(("ов", "ев", "ин")):
+        return surname + "а"
+    if surname.endswith(("ский", "ой")):
+        return surname[:-2] + "ая"
+    # Фамилии на -их, -ых и -ко не склоняются по роду
+    return surname
+
+
+class Generator:
+    """Поток сущностей для генерации; каждый раздел использует свой поток случайных чисел.
+
+    Раздел зависит только от seed и числа сущностей, от которых он зависит
+    (оценки - от числа студентов и курсов), поэтому, например, увеличение
+    числа оценок не меняет студентов.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        # Варианты имен вместе с началом латинской записи для email
+        self._men = [(first, translit(first[0])) for first, _, _ in MALE_NAMES]
+        self._women = [(first, translit(first[0])) for first in FEMALE_NAMES]
+        self._male_patronymics = [patronymic for _, patronymic, _ in MALE_NAMES]
+        self._female_patronymics = [patronymic for _, _, patronymic in MALE_NAMES]
+        self._male_surnames = [(surname, translit(surname)) for surname in SURNAMES]
+        self._female_surnames = [(surname, translit(surname))
+                                 for surname in map(_female_surname, SURNAMES)]
+
+    def _random(self, section: str) -> random.Random:
+        # Строковое зерно хэшируется random детерминированно (в отличие от hash())
+        return random.Random(f"{self.seed}:{section}")
+
+    def _person(self, rng: random.Random) -> tuple:
+        """(имя, отчество, фамилия, латинская запись для email)"""
+        draw = rng.random
+        if draw() < 0.5:
+            first, initial = self._women[int(draw() * len(self._women))]
+            patronymic = self._female_patronymics[int(draw() * len(self._female_patronymics))]
+            surname, latin = self._female_surnames[int(draw() * len(self._female_surnames))]
+        else:
+            first, initial = self._men[int(draw() * len(self._men))]
+            patronymic = self._male_patronymics[int(draw() * len(self._male_patronymics))]
+            surname, latin = self._male_surnames[int(draw() * len(self._male_surnames))]
+        return first, patronymic, surname, f"{initial}.{latin}"
+
+    def departments(self, count: int) -> Iterator[Department]:
+        rng = self._random("departments")
+        for department_id in range(1, count + 1):
+            short = DEPARTMENTS[(department_id - 1) % len(DEPARTMENTS)]
+            # Сверх списка кафедры нумеруются: "ИИТ-2"
+            cycle = (department_id - 1) // len(DEPARTMENTS)
+            name = short if not cycle else f"{short}-{cycle + 1}"
+            first, patronymic, surname, _ = self._person(rng)
+            yield Department(department_id, name, f"{first} {patronymic} {surname}")
+
+    def professors(self, count: int, departments: int) -> Iterator[Professor]:
+        rng = self._random("professors")
+        names = [department.name for department in self.departments(departments)]
+        for professor_id in range(1, count + 1):
+            first, patronymic, surname, latin = self._person(rng)
+            email = f"{latin}{professor_id}@{EMAIL_DOMAINS[int(rng.random() * len(EMAIL_DOMAINS))]}"
+            yield Professor(professor_id, f"{first} {patronymic} {surname}", email,
+                            names[int(rng.random() * len(names))])
+
+    def courses(self, count: int) -> Iterator[Course]:
+        rng = self._random("courses")
+        for course_id in range(1, count + 1):
+            subject, code = SUBJECTS[(course_id - 1) % len(SUBJECTS)]
+            # Повторы дисциплины становятся ее продолжением: "Физика, часть 2"
+            part = (course_id - 1) // len(SUBJECTS)
+            name = subject if not part else f"{subject}, часть {part + 1}"
+            yield Course(course_id, name, code, 2 + int(rng.random() * 7))
+
+    def students(self, count: int, departments: int) -> Iterator[Student]:
+        rng = self._random("students")
+        faculties = [department.name for department in self.departments(departments)]
+        for student_id in range(1, count + 1):
+            first, _, surname, latin = self._person(rng)
+            email = f"{latin}{student_id}@{EMAIL_DOMAINS[int(rng.random() * len(EMAIL_DOMAINS))]}"
+            yield Student(student_id, f"{first} {surname}", email, 1 + int(rng.random() * 4),
+                          faculties[int(rng.random() * len(faculties))])
+
+    def grades(self, count: int, students: int, courses: int) -> Iterator[Grade]:
+        rng = self._random("grades")
+        draw = rng.random
+        for grade_id in range(1, count + 1):
+            # Сумма двух равномерных величин: баллы от 40 до 100 с пиком около 70
+            yield Grade(grade_id, 1 + int(draw() * students), 1 + int(draw() * courses),
+                        float(40 + int(30 * (draw() + draw()))))
+
+
+def generate(students: int = 1000, professors: Optional[int] = None, courses: Optional[int] = None,
+             departments: Optional[int] = None, grades: Optional[int] = None, seed: int = 0,
+             columnar_grades: bool = False, thread_safe: bool = False) -> UniversityData:
+    """Создает набор данных заданного размера.
+
+    Не заданные размеры выводятся из числа студентов: профессор на 20
+    студентов, курс на 50, кафедр - по списку DEPARTMENTS, 20 оценок на
+    студента. Все ссылки оценок указывают на существующих студентов и курсы.
+    """
+    professors = max(1, students // 20) if professors is None else professors
+    courses = max(1, students // 50) if courses is None else courses
+    departments = len(DEPARTMENTS) if departments is None else departments
+    grades = students * 20 if grades is None else grades
+    if min(students, professors, courses, departments, grades) < 0:
+        raise InvalidDataError("Размеры набора данных не могут быть отрицательными")
+    if grades and not (students and courses):
+        raise InvalidDataError("Для оценок нужны студенты и курсы")
+    if (students or professors) and not departments:
+        raise InvalidDataError("Для студентов и профессоров нужна хотя бы одна кафедра")
+
+    generator = Generator(seed)
+    data = UniversityData(columnar_grades, thread_safe)
+    data.departments = generator.departments(departments)
+    data.professors = generator.professors(professors, departments)
+    data.courses = generator.courses(courses)
+    data.students = generator.students(students, departments)
+    data.grades = generator.grades(grades, students, courses)
+    return data
+
+
+def main():
+    from unik import save_to_json, save_to_xml
+
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных университета")
+    parser.add_argument("--students", type=int, default=1000, help="количество студентов")
+    parser.add_argument("--professors", type=int, help="количество профессоров")
+    parser.add_argument("--courses", type=int, help="количество курсов")
+    parser.add_argument("--departments", type=int, help="количество кафедр")
+    parser.add_argument("--grades", type=int, help="количество оценок")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора")
+    parser.add_argument("--output", default="synthetic.json", help="файл .json или .xml")
+    args = parser.parse_args()
+
+    data = generate(args.students, args.professors, args.courses, args.departments, args.grades, args.seed,
+                    columnar_grades=True)
+    if args.output.endswith(".xml"):
+        save_to_xml(data, args.output)
+    else:
+        save_to_json(data, args.output)
+
+
+if __name__ == "__main__":
+    main()
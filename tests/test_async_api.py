@@ -0,0 +1,39 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from async_api import AsyncUniversity
+from unik import UniversityDataError
+
+
+class AsyncSaveTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    async def test_failed_save_raises_in_every_waiting_call(self):
+        university = AsyncUniversity()
+        await university.create_student(id=1, name="Иванов", email="ivanov@uni.ru", year=1, faculty="ФИТ")
+        filename = os.path.join(self.directory, "missing", "university.json")
+        results = await asyncio.gather(*(university.save_json(filename) for _ in range(3)),
+                                       return_exceptions=True)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(result, UniversityDataError) for result in results))
+        self.assertEqual(university.writes, 0)
+
+    async def test_save_after_failure(self):
+        university = AsyncUniversity()
+        filename = os.path.join(self.directory, "university.xml")
+        with self.assertRaises(UniversityDataError):
+            await university.save_xml(os.path.join(self.directory, "missing", "university.xml"))
+        await university.save_xml(filename)
+        self.assertEqual(university.writes, 1)
+        self.assertTrue(os.path.exists(filename))
+
+
+if __name__ == "__main__":
+    unittest.main()
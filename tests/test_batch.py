@@ -0,0 +1,99 @@
+import unittest
+
+from unik import (DuplicateIDError, InvalidDataError, NotFoundError, UniversityData, create_many,
+                  delete_many, update_many)
+
+
+def _grade(grade_id, grade=4.0):
+    return {"id": grade_id, "student_id": 1, "course_id": 1, "grade": grade}
+
+
+def _student(student_id, year=1):
+    return {"id": student_id, "name": f"Студент {student_id}", "email": f"s{student_id}@uni.ru",
+            "year": year, "faculty": "ФИТ"}
+
+
+class CreateManyTest(unittest.TestCase):
+    def test_applies_valid_batch(self):
+        data = UniversityData()
+        result = create_many(data, "student", [_student(1), _student(2)])
+        self.assertTrue(result.ok)
+        self.assertEqual(result.applied, 2)
+        self.assertEqual(sorted(data.students.ids()), [1, 2])
+
+    def test_wrong_value_type_rejects_whole_batch(self):
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                data = UniversityData(columnar_grades=columnar)
+                result = create_many(data, "grade", [_grade(1, 1.0), _grade(2, "abc"), _grade(3, None)])
+                self.assertEqual(result.applied, 0)
+                self.assertEqual([failure.index for failure in result.failures], [1, 2])
+                self.assertTrue(all(isinstance(failure.error, InvalidDataError) for failure in result.failures))
+                self.assertEqual(len(data.grades), 0)
+
+    def test_int_accepted_for_float_field(self):
+        data = UniversityData()
+        self.assertTrue(create_many(data, "grade", [_grade(1, 5)]).ok)
+
+    def test_bool_rejected_for_int_field(self):
+        data = UniversityData()
+        result = create_many(data, "student", [_student(1, year=True)])
+        self.assertFalse(result.ok)
+        self.assertEqual(len(data.students), 0)
+
+    def test_non_dict_and_shape_errors_are_failures(self):
+        data = UniversityData()
+        records = [_student(1), ["не", "словарь"], None, {"id": 4}, dict(_student(5), extra=1)]
+        result = create_many(data, "student", records)
+        self.assertEqual([failure.index for failure in result.failures], [1, 2, 3, 4])
+        self.assertEqual(len(data.students), 0)
+
+    def test_duplicates(self):
+        data = UniversityData()
+        create_many(data, "student", [_student(1)])
+        result = create_many(data, "student", [_student(2), _student(2), _student(1)])
+        self.assertEqual([type(failure.error) for failure in result.failures], [DuplicateIDError, DuplicateIDError])
+        self.assertEqual(sorted(data.students.ids()), [1])
+
+
+class UpdateManyTest(unittest.TestCase):
+    def setUp(self):
+        self.data = UniversityData()
+        create_many(self.data, "student", [_student(1), _student(2)])
+
+    def test_applies_valid_batch(self):
+        result = update_many(self.data, "student", [(1, {"year": 3}), (2, {"id": 5})])
+        self.assertTrue(result.ok)
+        self.assertEqual(self.data.students.get(1).year, 3)
+        self.assertEqual(sorted(self.data.students.ids()), [1, 5])
+
+    def test_malformed_items_are_failures(self):
+        result = update_many(self.data, "student", [(1, {"year": 3}), (2,), 7, (2, ["year"]), (2, {"nope": 1})])
+        self.assertEqual([failure.index for failure in result.failures], [1, 2, 3, 4])
+        self.assertEqual(result.failures[1].record, 7)
+        self.assertEqual(self.data.students.get(1).year, 1)
+
+    def test_wrong_value_type_rejects_whole_batch(self):
+        result = update_many(self.data, "student", [(1, {"year": 3}), (2, {"year": "abc"})])
+        self.assertEqual(result.applied, 0)
+        self.assertIsInstance(result.failures[0].error, InvalidDataError)
+        self.assertEqual(self.data.students.get(1).year, 1)
+
+    def test_missing_entity(self):
+        result = update_many(self.data, "student", [(9, {"year": 3})])
+        self.assertIsInstance(result.failures[0].error, NotFoundError)
+
+
+class DeleteManyTest(unittest.TestCase):
+    def test_all_or_nothing(self):
+        data = UniversityData()
+        create_many(data, "student", [_student(1), _student(2)])
+        result = delete_many(data, "student", [1, 3])
+        self.assertEqual(result.applied, 0)
+        self.assertEqual(sorted(data.students.ids()), [1, 2])
+        self.assertTrue(delete_many(data, "student", [1, 2]).ok)
+        self.assertEqual(len(data.students), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from unik import DuplicateIDError, Grade, GradeTable, InvalidDataError, NotFoundError
+
+
+class GradeTableAddTest(unittest.TestCase):
+    def test_invalid_value_leaves_columns_aligned(self):
+        table = GradeTable([Grade(1, 10, 100, 4.0)])
+        with self.assertRaises(InvalidDataError):
+            table.add(Grade(2, 11, 101, "abc"))
+        with self.assertRaises(InvalidDataError):
+            table.add(Grade(3, "x", 101, 5.0))
+        self.assertEqual(len(table), 1)
+        self.assertEqual({len(table._ids), len(table._student_ids), len(table._course_ids),
+                          len(table._grades), len(table._alive)}, {1})
+        table.add(Grade(2, 11, 101, 5))
+        self.assertEqual([(g.id, g.grade) for g in table], [(1, 4.0), (2, 5.0)])
+
+    def test_duplicate_id(self):
+        table = GradeTable([Grade(1, 10, 100, 4.0)])
+        with self.assertRaises(DuplicateIDError):
+            table.add(Grade(1, 11, 101, 5.0))
+        self.assertEqual(len(table._ids), 1)
+
+
+class GradeTableClearTest(unittest.TestCase):
+    def test_stale_view_does_not_see_new_row(self):
+        table = GradeTable([Grade(1, 10, 100, 4.0)])
+        view = table.get(1)
+        table.clear()
+        table.add(Grade(2, 20, 200, 3.0))
+        with self.assertRaises(NotFoundError):
+            view.grade
+
+    def test_view_finds_readded_id(self):
+        table = GradeTable([Grade(5, 10, 100, 4.0)])
+        view = table.get(5)
+        table.clear()
+        table.add(Grade(1, 20, 200, 3.0))
+        table.add(Grade(5, 30, 300, 2.0))
+        self.assertEqual(view.student_id, 30)
+
+
+class GradeTableUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.table = GradeTable([Grade(1, 10, 100, 4.0), Grade(2, 10, 101, 3.0), Grade(3, 11, 100, 5.0)])
+        # Индексы строятся при первом запросе
+        self.table.for_student(10)
+        self.table.for_course(100)
+
+    def test_foreign_key_change_moves_row_between_buckets(self):
+        by_student, by_course = self.table._by_student, self.table._by_course
+        self.table.update(1, {"student_id": 11, "course_id": 101})
+        self.assertIs(self.table._by_student, by_student)
+        self.assertIs(self.table._by_course, by_course)
+        self.assertEqual([g.id for g in self.table.for_student(10)], [2])
+        self.assertEqual([g.id for g in self.table.for_student(11)], [1, 3])
+        self.assertEqual([g.id for g in self.table.for_course(100)], [3])
+        self.assertEqual([g.id for g in self.table.for_course(101)], [1, 2])
+
+    def test_new_key_and_emptied_bucket(self):
+        self.table.update(3, {"student_id": 12})
+        self.assertEqual(self.table.for_student(11), [])
+        self.assertNotIn(11, self.table._by_student)
+        self.assertEqual([g.id for g in self.table.for_student(12)], [3])
+
+    def test_invalid_change_is_not_applied(self):
+        with self.assertRaises(InvalidDataError):
+            self.table.update(1, {"id": 7, "student_id": 11, "grade": None})
+        grade = self.table.get(1)
+        self.assertEqual((grade.student_id, grade.grade), (10, 4.0))
+        self.assertNotIn(7, self.table)
+        self.assertEqual([g.id for g in self.table.for_student(10)], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+
+from integrity import Integrity, check
+from journal import open_journaled
+from snapshot import load_snapshot, save_snapshot
+from unik import (InvalidDataError, IntegrityError, UniversityData, create_many, delete_course, delete_many,
+                  delete_student, load_from_json, load_from_xml, save_to_json, save_to_xml, update_many)
+
+
+def _fill(data):
+    create_many(data, "department", [{"id": 1, "name": "ИИТ", "head": "Иванов"},
+                                     {"id": 2, "name": "ФМ", "head": "Петров"}])
+    create_many(data, "professor", [{"id": 1, "name": "Сидоров", "email": "s@uni.ru", "department": "ИИТ"},
+                                    {"id": 2, "name": "Козлов", "email": "k@uni.ru", "department": "ФМ"}])
+    create_many(data, "student", [{"id": 1, "name": "Анна", "email": "a@uni.ru", "year": 1, "faculty": "ИИТ"},
+                                  {"id": 2, "name": "Олег", "email": "o@uni.ru", "year": 2, "faculty": "ФМ"}])
+    create_many(data, "course", [{"id": 1, "name": "Базы данных", "code": "DB", "credits": 4}])
+    create_many(data, "grade", [{"id": 1, "student_id": 1, "course_id": 1, "grade": 5},
+                                {"id": 2, "student_id": 2, "course_id": 1, "grade": 4}])
+    return data
+
+
+class IntegrityTest(unittest.TestCase):
+    def setUp(self):
+        self.data = _fill(UniversityData())
+        self.integrity = Integrity(self.data)
+
+    def test_cascade_delete(self):
+        self.assertTrue(delete_student(self.data, 1))
+        self.assertEqual([grade.id for grade in self.data.grades], [2])
+        self.assertTrue(delete_course(self.data, 1))
+        self.assertEqual(len(self.data.grades), 0)
+
+    def test_key_change(self):
+        self.assertTrue(update_many(self.data, "department", [(1, {"name": "ИТ"})]).ok)
+        self.assertIsNone(self.data.professors.get(1).department)
+        self.integrity.close()
+        Integrity(self.data, actions={"professor.department": "cascade"})
+        self.assertTrue(update_many(self.data, "department", [(2, {"name": "ФМиИ"})]).ok)
+        self.assertEqual(self.data.professors.get(2).department, "ФМиИ")
+
+    def test_restrict(self):
+        self.integrity.close()
+        Integrity(self.data, actions={"grade.student_id": "restrict"})
+        self.assertFalse(delete_student(self.data, 1))
+        self.assertIn(1, self.data.students)
+        result = delete_many(self.data, "student", [2])
+        self.assertIsInstance(result.failures[0].error, IntegrityError)
+        self.assertEqual(len(self.data.grades), 2)
+
+    def test_nullify(self):
+        self.assertTrue(delete_many(self.data, "department", [1]).ok)
+        self.assertIsNone(self.data.professors.get(1).department)
+        self.assertEqual(self.data.professors.get(2).department, "ФМ")
+        self.assertEqual(check(self.data), [])
+
+    def test_nullify_requires_nullable_field(self):
+        self.integrity.close()
+        with self.assertRaises(InvalidDataError):
+            Integrity(self.data, actions={"grade.student_id": "nullify"})
+
+    def test_check_finds_dangling_references(self):
+        self.integrity.close()
+        delete_student(self.data, 2)
+        delete_many(self.data, "department", [2])
+        violations = sorted((violation.foreign_key.name, violation.child_id, violation.value)
+                            for violation in check(self.data))
+        self.assertEqual(violations, [("grade.student_id", 2, 2), ("professor.department", 2, "ФМ")])
+
+
+class NullifiedSaveTest(unittest.TestCase):
+    """Пустая ссылка после nullify переживает сохранение и загрузку"""
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.data = _fill(UniversityData())
+        Integrity(self.data)
+        delete_many(self.data, "department", [1])
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self._directory.name, name)
+
+    def test_round_trip(self):
+        formats = [(save_to_json, load_from_json, "university.json"),
+                   (save_to_xml, load_from_xml, "university.xml"),
+                   (save_snapshot, load_snapshot, "university.snap")]
+        for save, load, name in formats:
+            with self.subTest(name=name):
+                save(self.data, self.path(name))
+                loaded = load(self.path(name))
+                self.assertIsNone(loaded.professors.get(1).department)
+                self.assertEqual(loaded.professors.get(2).department, "ФМ")
+
+    def test_journal_compaction(self):
+        snapshot = self.path("university.json")
+        journal = open_journaled(snapshot, sync=False)
+        self.assertTrue(create_many(journal.data, "professor", [
+            {"id": 3, "name": "Орлов", "email": "o@uni.ru", "department": None}]).ok)
+        journal.compact()
+        journal.close()
+        journal = open_journaled(snapshot, sync=False)
+        self.assertIsNone(journal.data.professors.get(3).department)
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
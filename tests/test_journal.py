@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from journal import open_journaled
+from unik import create_student, delete_student, find_student, update_student
+
+
+def _create(data, student_id, year=1):
+    return create_student(data, id=student_id, name=f"Студент {student_id}", email=f"s{student_id}@uni.ru",
+                          year=year, faculty="ФИТ")
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self._directory.name, "university.json")
+        self.journal_path = self.snapshot + ".journal"
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def reopen(self, journal=None, **options):
+        if journal is not None:
+            journal.close()
+        return open_journaled(self.snapshot, sync=False, **options)
+
+    def journal_lines(self):
+        with open(self.journal_path, "rb") as f:
+            return f.read().splitlines()
+
+    def test_replay(self):
+        journal = self.reopen()
+        _create(journal.data, 1)
+        _create(journal.data, 2)
+        update_student(journal.data, 1, year=3)
+        delete_student(journal.data, 2)
+        journal = self.reopen(journal)
+        self.assertEqual(list(journal.data.students.ids()), [1])
+        self.assertEqual(find_student(journal.data, 1).year, 3)
+        self.assertEqual(journal.seq, 4)
+        journal.close()
+
+    def test_torn_tail_is_truncated(self):
+        journal = self.reopen()
+        _create(journal.data, 1)
+        journal.close()
+        with open(self.journal_path, "ab") as f:
+            f.write(b'{"seq": 2, "op": "delete", "ty')
+        journal = self.reopen()
+        self.assertEqual(list(journal.data.students.ids()), [1])
+        self.assertEqual(len(self.journal_lines()), 1)
+        _create(journal.data, 2)
+        journal = self.reopen(journal)
+        self.assertEqual(list(journal.data.students.ids()), [1, 2])
+        journal.close()
+
+    def test_compaction(self):
+        journal = self.reopen()
+        _create(journal.data, 1)
+        _create(journal.data, 2)
+        journal.compact()
+        self.assertEqual(self.journal_lines(), [])
+        with open(self.snapshot, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["journal_seq"], 2)
+        update_student(journal.data, 2, year=4)
+        journal = self.reopen(journal)
+        self.assertEqual(find_student(journal.data, 2).year, 4)
+        self.assertEqual(journal.seq, 3)
+        journal.close()
+
+    def test_automatic_compaction_includes_change(self):
+        journal = self.reopen(compact_threshold=1)
+        _create(journal.data, 1)
+        self.assertEqual(self.journal_lines(), [])
+        journal = self.reopen(journal)
+        self.assertEqual(list(journal.data.students.ids()), [1])
+        journal.close()
+
+    def test_failed_append_leaves_data_unchanged(self):
+        journal = open_journaled(self.snapshot)
+        _create(journal.data, 1)
+        with mock.patch("journal.os.fsync", side_effect=OSError("диск недоступен")):
+            self.assertIsNone(_create(journal.data, 2))
+            self.assertFalse(update_student(journal.data, 1, year=4))
+            self.assertFalse(delete_student(journal.data, 1))
+        self.assertEqual(list(journal.data.students.ids()), [1])
+        self.assertEqual(find_student(journal.data, 1).year, 1)
+        self.assertEqual(len(self.journal_lines()), 1)
+
+        # После сбоя журнал продолжает работать и проигрывается
+        self.assertTrue(update_student(journal.data, 1, year=2))
+        self.assertIsNotNone(_create(journal.data, 2))
+        journal = self.reopen(journal)
+        self.assertEqual(list(journal.data.students.ids()), [1, 2])
+        self.assertEqual(find_student(journal.data, 1).year, 2)
+        self.assertEqual(journal.seq, 3)
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from metrics import Metrics
+from unik import (UniversityData, create_course, create_professor, create_student, set_observer, update_course,
+                  update_professor, update_student)
+
+
+class UpdateMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.data = UniversityData()
+        create_student(self.data, id=1, name="Анна", email="a@uni.ru", year=1, faculty="ИИТ")
+        create_professor(self.data, id=1, name="Сидоров", email="s@uni.ru", department="ИИТ")
+        create_course(self.data, id=1, name="Базы данных", code="DB", credits=4)
+        self.metrics = Metrics()
+        set_observer(self.metrics)
+        self.addCleanup(set_observer, None)
+
+    def counts(self):
+        return {op: (stats["calls"], stats["errors"])
+                for op, stats in self.metrics.snapshot()["operations"].items()}
+
+    def test_update_is_counted_once(self):
+        for update in (update_student, update_professor, update_course):
+            with self.subTest(update=update.__name__):
+                self.metrics.reset()
+                self.assertTrue(update(self.data, 1, name="Новое имя"))
+                self.assertFalse(update(self.data, 2, name="Нет такого"))
+                self.assertEqual(self.counts(), {update.__name__: (2, 1)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from query import Query
+from unik import Student, UniversityData, update_student
+
+
+def _data(thread_safe=False):
+    rng = random.Random(1)
+    data = UniversityData(thread_safe=thread_safe)
+    data.students = [Student(i, f"Студент {rng.randrange(5)}", f"s{i}@uni.ru", rng.randrange(1, 5), "ФИТ")
+                     for i in range(1, 41)]
+    return data
+
+
+class OrderTest(unittest.TestCase):
+    def test_mixed_directions_match_sorting(self):
+        data = _data()
+        data.students.get(3).year = None
+        expected = sorted(data.students, key=lambda s: s.id, reverse=True)
+        expected.sort(key=lambda s: s.name)
+        expected.sort(key=lambda s: (s.year is not None, s.year or 0), reverse=True)
+        query = Query(data, "student").order_by("-year", "name", "-id")
+        self.assertEqual([s.id for s in query], [s.id for s in expected])
+        self.assertEqual([s.id for s in query.limit(7, 3)], [s.id for s in expected[3:10]])
+        self.assertIn("(куча)", query.limit(7, 3).explain())
+
+    def test_explain_without_limit(self):
+        self.assertNotIn("(куча)", Query(_data(), "student").order_by("-year", "name").explain())
+
+
+class IterationLockTest(unittest.TestCase):
+    def test_update_inside_loop(self):
+        data = _data(thread_safe=True)
+        for student in Query(data, "student").where(year=1):
+            self.assertIsNotNone(update_student(data, student.id, year=2))
+        self.assertEqual(Query(data, "student").where(year=1).count(), 0)
+
+    def test_abandoned_iterator_releases_lock(self):
+        data = _data(thread_safe=True)
+        rows = iter(Query(data, "student"))
+        next(rows)
+        with data.lock.write():
+            data.students.get(1).year = 4
+        self.assertEqual(Query(data, "student").where(id=1).first().year, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from sharding import load_sharded, save_sharded
+from snapshot import load_snapshot, save_snapshot
+from unik import (UniversityData, create_many, find_student, load_from_json, load_from_xml, save_to_json,
+                  save_to_xml)
+
+
+class SaveUnchangedTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def make_data(self, **options):
+        data = UniversityData(**options)
+        create_many(data, "student", [{"id": 1, "name": "Анна", "email": "a@example.com",
+                                       "year": 1, "faculty": "ИИТ"}])
+        return data
+
+    def formats(self):
+        path = os.path.join(self.directory, "university")
+        return [
+            (lambda data: save_to_json(data, path + ".json"), lambda: load_from_json(path + ".json")),
+            (lambda data: save_to_xml(data, path + ".xml"), lambda: load_from_xml(path + ".xml")),
+            (lambda data: save_snapshot(data, path + ".snap"), lambda: load_snapshot(path + ".snap")),
+            (lambda data: save_sharded(data, path + "-shards"), lambda: load_sharded(path + "-shards")),
+        ]
+
+    def test_attribute_write_is_saved_by_default(self):
+        for save, load in self.formats():
+            with self.subTest(save=save):
+                data = self.make_data()
+                save(data)
+                find_student(data, 1).name = "Мария"
+                save(data)
+                self.assertEqual(load().students.get(1).name, "Мария")
+
+    def test_skip_unchanged_saves(self):
+        for save, load in self.formats():
+            with self.subTest(save=save):
+                data = self.make_data(skip_unchanged_saves=True)
+                save(data)
+                find_student(data, 1).name = "Мария"
+                save(data)
+                self.assertEqual(load().students.get(1).name, "Анна")
+                data.mark_dirty()
+                save(data)
+                self.assertEqual(load().students.get(1).name, "Мария")
+
+
+if __name__ == "__main__":
+    unittest.main()
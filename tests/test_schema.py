@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import unittest
+
+from unik import (SCHEMAS, DuplicateIDError, Grade, InvalidDataError, Student, UniversityData, load_from_json,
+                  load_from_json_stream, load_from_xml, save_to_json, save_to_xml)
+
+
+def _grade(**changes):
+    return dict({"id": 1, "student_id": 1, "course_id": 1, "grade": 4.5}, **changes)
+
+
+class FromDictTest(unittest.TestCase):
+    decode = staticmethod(SCHEMAS[Grade].from_dict)
+
+    def test_valid_record(self):
+        grade = self.decode(_grade(grade=5))
+        self.assertEqual((grade.id, grade.grade), (1, 5))
+
+    def test_wrong_types(self):
+        for record in (_grade(grade=None), _grade(grade="5"), _grade(id="1"), _grade(student_id=1.0),
+                       _grade(course_id=True)):
+            with self.subTest(record=record):
+                with self.assertRaises(InvalidDataError):
+                    self.decode(record)
+
+    def test_error_names_field(self):
+        with self.assertRaisesRegex(InvalidDataError, "student.year"):
+            SCHEMAS[Student].from_dict({"id": 1, "name": "", "email": "", "year": "abc", "faculty": ""})
+
+    def test_shape_errors(self):
+        for record in ([1, 2, 3, 4], {"id": 1}, dict(_grade(), extra=1)):
+            with self.subTest(record=record):
+                with self.assertRaises(InvalidDataError):
+                    self.decode(record)
+
+
+class LoadMalformedTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, "university.json")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def write(self, content):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(content if isinstance(content, str) else json.dumps(content))
+
+    def test_bad_row_raises_with_location(self):
+        self.write({"departments": [{"id": 1, "name": "ИИТ", "head": "Иванов"}],
+                    "grades": [_grade(), _grade(id=2, grade=None)]})
+        for load in (load_from_json, load_from_json_stream):
+            with self.subTest(load=load.__name__):
+                with self.assertRaisesRegex(InvalidDataError, r"grades\[1\] \(ID 2\)"):
+                    load(self.path)
+
+    def test_stream_into_existing_data(self):
+        data = UniversityData()
+        data.grades = [Grade(1, 1, 1, 5)]
+        self.write({"grades": [_grade(id=2), _grade(id=3, grade=None)]})
+        with self.assertRaises(InvalidDataError):
+            load_from_json_stream(self.path, data=data)
+        self.assertEqual(list(data.grades.ids()), [1])
+
+        self.write({"grades": [_grade(id=2), _grade(id=1)]})
+        with self.assertRaises(DuplicateIDError):
+            load_from_json_stream(self.path, data=data)
+        self.assertEqual(list(data.grades.ids()), [1])
+
+        self.write({"grades": [_grade(id=2), _grade(id=3)]})
+        self.assertIs(load_from_json_stream(self.path, data=data), data)
+        self.assertEqual(list(data.grades.ids()), [1, 2, 3])
+
+    def test_syntax_error_raises(self):
+        self.write('{"students": [')
+        with self.assertRaises(InvalidDataError):
+            load_from_json(self.path)
+
+    def test_missing_file_gives_empty_data(self):
+        self.assertEqual(len(load_from_json(self.path).students), 0)
+
+    def test_round_trip(self):
+        data = UniversityData()
+        data.grades = [Grade(1, 1, 1, 5), Grade(2, 1, 2, 4.5)]
+        save_to_json(data, self.path)
+        self.assertEqual([g.grade for g in load_from_json(self.path).grades], [5, 4.5])
+
+    def test_bad_xml_raises(self):
+        path = os.path.join(self._directory.name, "university.xml")
+        data = UniversityData()
+        data.grades = [Grade(1, 1, 1, 5)]
+        save_to_xml(data, path)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        for broken in (text.replace("<grade>5</grade>", "<grade>abc</grade>"), text[:-20]):
+            with self.subTest(broken=broken[-40:]):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(broken)
+                with self.assertRaises(InvalidDataError):
+                    load_from_xml(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sharding
+from sharding import load_sharded, save_sharded
+from unik import Grade, InvalidDataError, Student, UniversityData
+
+
+class ShardChangeDetectionTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self.data = UniversityData()
+        self.data.students = [Student(i, f"Студент {i}", f"s{i}@uni.ru", 1, "ФИТ") for i in range(1, 5)]
+        self.data.grades = [Grade(i, i, 1, 4) for i in range(1, 5)]
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def save(self):
+        manifest = save_sharded(self.data, self.directory, shards=2, workers=0)
+        files = [entry["file"] for entries in manifest["sections"].values() for entry in entries]
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(files + ["manifest.json"]))
+        # Шарды переписываются через временный файл, поэтому у переписанного новый inode
+        return {name: os.stat(os.path.join(self.directory, name)).st_ino for name in files}
+
+    def changed(self, before, after):
+        return sorted(name for name in after if before.get(name) != after[name])
+
+    def test_unchanged_data_rewrites_nothing(self):
+        before = self.save()
+        self.data.mark_dirty()
+        self.assertEqual(self.changed(before, self.save()), [])
+
+    def test_only_changed_shard_is_rewritten(self):
+        before = self.save()
+        self.data.grades.get(4).grade = 5
+        self.data.mark_dirty("grade")
+        changed = self.changed(before, self.save())
+        self.assertEqual(len(changed), 1)
+        self.assertTrue(changed[0].startswith("grades-0001-"))
+        self.assertEqual(load_sharded(self.directory, workers=0).grades.get(4).grade, 5)
+
+    def test_interrupted_save_keeps_previous_state(self):
+        self.save()
+        self.data.grades.get(1).grade = 2
+        self.data.grades.get(4).grade = 5
+        self.data.mark_dirty("grade")
+        calls = []
+
+        def fail_second(*job):
+            calls.append(job)
+            if len(calls) == 2:
+                raise OSError("сбой записи")
+            return sharding._write_shard(*job)
+
+        with mock.patch("sharding._write_shard", side_effect=fail_second):
+            with self.assertRaises(OSError):
+                self.save()
+        loaded = load_sharded(self.directory, workers=0)
+        self.assertEqual([g.grade for g in loaded.grades], [4, 4, 4, 4])
+        # Следующее сохранение записывает все заново и убирает остатки прерванного
+        self.save()
+        self.assertEqual([g.grade for g in load_sharded(self.directory, workers=0).grades], [2, 4, 4, 5])
+
+    def test_values_with_equal_hash_are_detected(self):
+        # hash(-1) == hash(-2) в CPython
+        self.data.grades.get(1).grade = -1
+        self.save()
+        self.data.grades.get(1).grade = -2
+        self.data.mark_dirty("grade")
+        self.save()
+        self.assertEqual(load_sharded(self.directory, workers=0).grades.get(1).grade, -2)
+
+    def test_int_and_float_are_different(self):
+        self.save()
+        self.data.grades.get(1).grade = 4.0
+        self.data.mark_dirty("grade")
+        self.save()
+        self.assertEqual(repr(load_sharded(self.directory, workers=0).grades.get(1).grade), "4.0")
+
+
+class LoadShardTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        data = UniversityData()
+        data.grades = [Grade(i, i, 1, 4) for i in range(1, 5)]
+        save_sharded(data, self.directory, shards=2, workers=0)
+        self.shard = os.path.join(self.directory, next(name for name in os.listdir(self.directory)
+                                                       if name.startswith("grades-0001-")))
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_malformed_shard_raises(self):
+        with open(self.shard, encoding="utf-8") as f:
+            text = f.read()
+        for broken in (text.replace('"grade": 4', '"grade": "4"', 1), text.replace('"course_id"', '"course"', 1),
+                       text.replace('"grade": 4', '"grade": null', 1), text[:-10]):
+            with self.subTest(broken=broken):
+                with open(self.shard, "w", encoding="utf-8") as f:
+                    f.write(broken)
+                with self.assertRaises(InvalidDataError):
+                    load_sharded(self.directory, workers=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from snapshot import convert, load_snapshot, save_snapshot
+from unik import InvalidDataError, UniversityData, UniversityDataError, create_many, load_from_json, save_to_json
+
+
+class ConvertTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self.target = self.path("target.json")
+        data = UniversityData()
+        create_many(data, "department", [{"id": 1, "name": "ИИТ", "head": "Иванов"}])
+        save_to_json(data, self.target)
+        with open(self.target, encoding="utf-8") as f:
+            self.original = f.read()
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def assertTargetIntact(self):
+        with open(self.target, encoding="utf-8") as f:
+            self.assertEqual(f.read(), self.original)
+        self.assertEqual(os.listdir(self.directory), ["target.json"])
+
+    def test_round_trip_through_snapshot(self):
+        snap = self.path("data.snap")
+        convert(self.target, snap)
+        os.remove(self.target)
+        convert(snap, self.target)
+        os.remove(snap)
+        self.assertTargetIntact()
+        self.assertEqual(load_from_json(self.target).departments.get(1).head, "Иванов")
+
+    def test_missing_source_keeps_target(self):
+        with self.assertRaises(FileNotFoundError):
+            convert(self.path("missing.xml"), self.target)
+        self.assertTargetIntact()
+
+    def test_malformed_source_keeps_target(self):
+        source = self.path("bad.json")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write('{"departments": [{"id": 1}]}')
+        with self.assertRaises(InvalidDataError):
+            convert(source, self.target)
+        os.remove(source)
+        self.assertTargetIntact()
+
+    def test_failed_save_raises(self):
+        with self.assertRaises(UniversityDataError):
+            convert(self.target, self.path(os.path.join("missing", "data.xml")))
+        self.assertTargetIntact()
+
+
+class LoadSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, "data.snap")
+        data = UniversityData()
+        create_many(data, "student", [{"id": i, "name": f"Студент {i}", "email": f"s{i}@uni.ru",
+                                       "year": 1, "faculty": "ФИТ"} for i in range(1, 6)])
+        save_snapshot(data, self.path)
+        with open(self.path, "rb") as f:
+            self.content = f.read()
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_loads(self):
+        self.assertEqual(sorted(load_snapshot(self.path).students.ids()), [1, 2, 3, 4, 5])
+
+    def test_missing_file_gives_empty_data(self):
+        self.assertEqual(len(load_snapshot(self.path + ".missing").students), 0)
+
+    def test_corrupt_snapshot_raises(self):
+        meta_start = self.content.rindex(b'{"format"')
+        corruptions = {
+            "пустой файл": b"",
+            "обрезан": self.content[:len(self.content) // 2],
+            "мусор": b"x" * 100,
+            "испорчено описание": self.content[:meta_start + 2] + b"#" + self.content[meta_start + 3:],
+            "смещение за границей": self.content.replace(b'"heap": [', b'"heap": [9', 1),
+        }
+        for name, content in corruptions.items():
+            with self.subTest(name):
+                with open(self.path, "wb") as f:
+                    f.write(content)
+                with self.assertRaises(InvalidDataError):
+                    load_snapshot(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from sqlite_store import SQLiteUniversity
+from unik import DuplicateIDError, InvalidDataError, NotFoundError, load_from_json
+
+
+def _student(student_id, **changes):
+    return dict({"id": student_id, "name": f"Студент {student_id}", "email": f"s{student_id}@uni.ru",
+                 "year": 1, "faculty": "ФИТ"}, **changes)
+
+
+class SQLiteValidationTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.db = SQLiteUniversity(os.path.join(self._directory.name, "university.db"))
+        self.db.create_student(**_student(1))
+
+    def tearDown(self):
+        self.db.close()
+        self._directory.cleanup()
+
+    def test_create_rejects_wrong_types(self):
+        for record in (_student(2, year="notanint"), _student(2, name=None), _student(2, id="2")):
+            with self.subTest(record=record):
+                with self.assertRaises(InvalidDataError):
+                    self.db.create_student(**record)
+        self.assertEqual(self.db.count("student"), 1)
+
+    def test_create_many_is_rolled_back(self):
+        with self.assertRaises(InvalidDataError):
+            self.db.create_many("student", [_student(2), _student(3, year="x")])
+        self.assertEqual(self.db.count("student"), 1)
+        with self.assertRaises(DuplicateIDError):
+            self.db.create_many("student", [_student(2), _student(1)])
+        self.assertEqual(self.db.count("student"), 1)
+
+    def test_update_validates_values_and_new_id(self):
+        for changes in ({"year": "notanint"}, {"id": -5}, {"id": "7"}):
+            with self.subTest(changes=changes):
+                with self.assertRaises(InvalidDataError):
+                    self.db.update_student(1, **changes)
+        self.assertEqual(self.db.find_student(1).year, 1)
+        self.assertTrue(self.db.update_student(1, year=2, unknown="игнорируется"))
+        with self.assertRaises(NotFoundError):
+            self.db.update_student(9, year=2)
+
+    def test_export_loads_back(self):
+        self.db.update_student(1, year=3)
+        path = os.path.join(self._directory.name, "university.json")
+        self.db.export_json(path)
+        self.assertEqual(load_from_json(path).students.get(1).year, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
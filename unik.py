@@ -1,7 +1,14 @@
 import json
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import wraps
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
-from typing import List
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional
 
 # Создание иерархии пользовательских исключений
 class UniversityDataError(Exception):
@@ -20,8 +27,15 @@ class InvalidDataError(UniversityDataError):
     """Исключение, возникающее при невалидных данных"""
     pass
 
+class IntegrityError(UniversityDataError):
+    """Исключение, возникающее когда операция нарушает ссылочную целостность"""
+    pass
+
 # Класс для представления студента
 class Student:
+    # __slots__ убирает словарь атрибутов у каждого экземпляра и экономит память
+    __slots__ = ("id", "name", "email", "year", "faculty")
+
     def __init__(self, id: int, name: str, email: str, year: int, faculty: str):
         # Инициализация атрибутов студента
         self.id = id
@@ -37,13 +51,14 @@ class Student:
 
     def to_xml(self):
         """Преобразует объект Student в XML элемент"""
-        element = ET.Element("student")  # Создаем корневой элемент
-        for field in ['id', 'name', 'email', 'year', 'faculty']:
-            ET.SubElement(element, field).text = str(getattr(self, field))
-        return element
+        # Функция построения элемента сгенерирована по схеме класса (см. SCHEMAS)
+        return SCHEMAS[Student].to_element(self)
 
 # Класс для представления профессора
 class Professor:
+    # __slots__ убирает словарь атрибутов у каждого экземпляра и экономит память
+    __slots__ = ("id", "name", "email", "department")
+
     def __init__(self, id: int, name: str, email: str, department: str):
         # Инициализация атрибутов профессора
         self.id = id
@@ -58,13 +73,14 @@ class Professor:
 
     def to_xml(self):
         """Преобразует объект Professor в XML элемент"""
-        element = ET.Element("professor")
-        for field in ['id', 'name', 'email', 'department']:
-            ET.SubElement(element, field).text = str(getattr(self, field))
-        return element
+        # Функция построения элемента сгенерирована по схеме класса (см. SCHEMAS)
+        return SCHEMAS[Professor].to_element(self)
 
 # Класс для представления курса
 class Course:
+    # __slots__ убирает словарь атрибутов у каждого экземпляра и экономит память
+    __slots__ = ("id", "name", "code", "credits")
+
     def __init__(self, id: int, name: str, code: str, credits: int):
         # Инициализация атрибутов курса
         self.id = id
@@ -79,13 +95,14 @@ class Course:
 
     def to_xml(self):
         """Преобразует объект Course в XML элемент"""
-        element = ET.Element("course")
-        for field in ['id', 'name', 'code', 'credits']:
-            ET.SubElement(element, field).text = str(getattr(self, field))
-        return element
+        # Функция построения элемента сгенерирована по схеме класса (см. SCHEMAS)
+        return SCHEMAS[Course].to_element(self)
 
 # Класс для представления кафедры
 class Department:
+    # __slots__ убирает словарь атрибутов у каждого экземпляра и экономит память
+    __slots__ = ("id", "name", "head")
+
     def __init__(self, id: int, name: str, head: str):
         # Инициализация атрибутов кафедры
         self.id = id
@@ -98,13 +115,14 @@ class Department:
 
     def to_xml(self):
         """Преобразует объект Department в XML элемент"""
-        element = ET.Element("department")
-        for field in ['id', 'name', 'head']:
-            ET.SubElement(element, field).text = str(getattr(self, field))
-        return element
+        # Функция построения элемента сгенерирована по схеме класса (см. SCHEMAS)
+        return SCHEMAS[Department].to_element(self)
 
 # Класс для представления оценки
 class Grade:
+    # __slots__ убирает словарь атрибутов у каждого экземпляра и экономит память
+    __slots__ = ("id", "student_id", "course_id", "grade")
+
     def __init__(self, id: int, student_id: int, course_id: int, grade: float):
         # Инициализация атрибутов оценки
         self.id = id
@@ -119,42 +137,797 @@ class Grade:
 
     def to_xml(self):
         """Преобразует объект Grade в XML элемент"""
-        element = ET.Element("grade")
-        for field in ['id', 'student_id', 'course_id', 'grade']:
-            ET.SubElement(element, field).text = str(getattr(self, field))
-        return element
+        # Функция построения элемента сгенерирована по схеме класса (см. SCHEMAS)
+        return SCHEMAS[Grade].to_element(self)
+
+# Хранилище сущностей с индексом по ID
+class EntityStore:
+    """Хранит сущности в словаре id -> объект с сохранением порядка вставки.
+
+    Поиск, добавление и удаление по ID выполняются за O(1), а итерация
+    возвращает объекты в порядке добавления, как это делал обычный список.
+    Подклассы поддерживают дополнительные индексы через _index/_unindex.
+    """
+
+    def __init__(self, items: Iterable = ()):
+        # Словарь в Python сохраняет порядок вставки, поэтому отдельный список не нужен
+        self._items: Dict[int, object] = {}
+        # Счетчик изменений: растет при каждом добавлении, удалении и обновлении
+        self.version = 0
+        # Обработчики изменений (op, entity_id, entity, changes); их устанавливает UniversityData.
+        # _before_change вызывается после проверок, но до изменения, и может его отменить,
+        # выбросив исключение; _on_change - после изменения
+        self._before_change = None
+        self._on_change = None
+        for item in items:
+            self.add(item)
+
+    def __iter__(self) -> Iterator:
+        return iter(self._items.values())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, entity_id) -> bool:
+        return entity_id in self._items
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self._items.values())!r})"
+
+    def _index(self, entity):
+        """Добавляет сущность во вторичные индексы подкласса"""
+
+    def _unindex(self, entity):
+        """Убирает сущность из вторичных индексов подкласса"""
+
+    def _clear_index(self):
+        """Очищает вторичные индексы подкласса"""
+
+    def ids(self):
+        """Возвращает представление всех ID в порядке вставки"""
+        return self._items.keys()
+
+    def get(self, entity_id: int, default=None):
+        """Возвращает сущность по ID или default, если её нет"""
+        return self._items.get(entity_id, default)
+
+    def add(self, entity):
+        """Добавляет сущность, проверяя уникальность её ID"""
+        if entity.id in self._items:
+            raise DuplicateIDError(f"ID {entity.id} уже существует")
+        if self._before_change is not None:
+            self._before_change("create", entity.id, entity, None)
+        self._items[entity.id] = entity
+        self._index(entity)
+        self.version += 1
+        if self._on_change is not None:
+            self._on_change("create", entity.id, entity, None)
+        return entity
+
+    # Совместимость с кодом, который добавлял сущности в список через append
+    append = add
+
+    def extend(self, entities: Iterable):
+        """Добавляет несколько сущностей"""
+        for entity in entities:
+            self.add(entity)
+
+    def remove(self, entity_id: int):
+        """Удаляет сущность по ID и возвращает её"""
+        entity = self._items.get(entity_id)
+        if entity is None:
+            raise NotFoundError(f"ID {entity_id} не найден")
+        if self._before_change is not None:
+            self._before_change("delete", entity_id, entity, None)
+        del self._items[entity_id]
+        self._unindex(entity)
+        self.version += 1
+        if self._on_change is not None:
+            self._on_change("delete", entity_id, entity, None)
+        return entity
+
+    def update(self, entity_id: int, changes: dict):
+        """Обновляет поля сущности; при смене ID переиндексирует хранилище"""
+        entity = self._items.get(entity_id)
+        if entity is None:
+            raise NotFoundError(f"ID {entity_id} не найден")
+        new_id = changes.get('id', entity_id)
+        if new_id != entity_id and new_id in self._items:
+            raise DuplicateIDError(f"ID {new_id} уже существует")
+
+        # Обновляем только существующие поля, как и раньше; индексы снимаем на время изменения
+        applied = {key: value for key, value in changes.items() if hasattr(entity, key)}
+        if self._before_change is not None:
+            self._before_change("update", entity_id, entity, applied)
+        self._unindex(entity)
+        try:
+            for key, value in applied.items():
+                setattr(entity, key, value)
+        finally:
+            self._index(entity)
+
+        if entity.id != entity_id:
+            self._rekey(entity_id, entity.id)
+        self.version += 1
+        if self._on_change is not None:
+            self._on_change("update", entity_id, entity, applied)
+        return entity
+
+    def _rekey(self, old_id: int, new_id: int):
+        # Смена ID встречается редко, поэтому пересобираем словарь, чтобы сохранить порядок
+        self._items = {(new_id if key == old_id else key): value
+                       for key, value in self._items.items()}
+
+    def clear(self):
+        """Удаляет все сущности"""
+        if self._before_change is not None:
+            self._before_change("clear", None, None, None)
+        self._items.clear()
+        self._clear_index()
+        self.version += 1
+        if self._on_change is not None:
+            self._on_change("clear", None, None, None)
+
+# Хранилище оценок со вторичными индексами по студенту и курсу
+class GradeStore(EntityStore):
+    """Хранилище оценок, которое поддерживает индексы student_id и course_id.
+
+    Индексы обновляются при добавлении, удалении и изменении оценок, поэтому
+    выборка оценок студента или курса занимает время, пропорциональное
+    размеру результата, а не всей таблицы.
+    """
+
+    def __init__(self, items: Iterable = ()):
+        # student_id / course_id -> {id оценки: оценка}; вложенный словарь дает удаление за O(1)
+        self._by_student: Dict[int, Dict[int, Grade]] = {}
+        self._by_course: Dict[int, Dict[int, Grade]] = {}
+        super().__init__(items)
+
+    def _index(self, grade):
+        self._by_student.setdefault(grade.student_id, {})[grade.id] = grade
+        self._by_course.setdefault(grade.course_id, {})[grade.id] = grade
+
+    def _unindex(self, grade):
+        for index, key in ((self._by_student, grade.student_id), (self._by_course, grade.course_id)):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(grade.id, None)
+                if not bucket:
+                    del index[key]
+
+    def _clear_index(self):
+        self._by_student.clear()
+        self._by_course.clear()
+
+    def for_student(self, student_id: int) -> List[Grade]:
+        """Возвращает оценки студента в порядке добавления"""
+        return list(self._by_student.get(student_id, {}).values())
+
+    def for_course(self, course_id: int) -> List[Grade]:
+        """Возвращает оценки по курсу в порядке добавления"""
+        return list(self._by_course.get(course_id, {}).values())
+
+# Представление строки GradeTable, ведущее себя как объект Grade
+class GradeView:
+    """Легковесное представление оценки, хранящейся в колонках GradeTable.
+
+    Запоминает ID оценки и номер строки; если таблица была уплотнена,
+    строка находится заново по ID. Запись в поля идет через таблицу,
+    поэтому индексы остаются согласованными.
+    """
+    __slots__ = ("_table", "_row", "_generation", "_id")
+
+    def __init__(self, table: "GradeTable", row: int):
+        self._table = table
+        self._row = row
+        self._generation = table._generation
+        self._id = table._ids[row]
+
+    def _current_row(self) -> int:
+        table = self._table
+        if self._generation != table._generation:
+            self._row = table._row_of(self._id)
+            self._generation = table._generation
+        if self._row < 0 or not table._alive[self._row]:
+            raise NotFoundError(f"Оценка с ID {self._id} удалена")
+        return self._row
+
+    def _column_property(column: str):
+        def getter(self):
+            return getattr(self._table, column)[self._current_row()]
+
+        def setter(self, value):
+            self._current_row()
+            self._table.update(self._id, {_GRADE_COLUMNS[column]: value})
+            if column == "_ids":
+                self._id = value
+
+        return property(getter, setter)
+
+    id = _column_property("_ids")
+    student_id = _column_property("_student_ids")
+    course_id = _column_property("_course_ids")
+    grade = _column_property("_grades")
+    del _column_property
+
+    def __repr__(self):
+        try:
+            return f"GradeView(id={self.id}, student_id={self.student_id}, course_id={self.course_id}, grade={self.grade})"
+        except NotFoundError:
+            return f"GradeView(id={self._id}, удалена)"
+
+    # Сериализация совпадает с обычным объектом Grade
+    to_dict = Grade.to_dict
+    to_xml = Grade.to_xml
+
+# Соответствие колонок GradeTable полям Grade
+_GRADE_COLUMNS = {"_ids": "id", "_student_ids": "student_id", "_course_ids": "course_id", "_grades": "grade"}
+_GRADE_FIELDS = frozenset(_GRADE_COLUMNS.values())
+
+# Колоночное хранилище оценок на типизированных массивах
+class GradeTable:
+    """Хранит оценки в четырех массивах (id, student_id, course_id, grade).
+
+    Одна оценка занимает около 33 байт вместо сотен байт у отдельного объекта.
+    Интерфейс совпадает с GradeStore, а при итерации и поиске выдаются
+    объекты GradeView. Удаленные строки помечаются и вычищаются уплотнением.
+    Пока ID добавляются по возрастанию, поиск идет двоичным поиском без словаря.
+    Оценки хранятся как float.
+    """
+
+    # Уплотняем таблицу, когда удаленных строк больше половины
+    _COMPACT_MIN_DEAD = 1024
+
+    def __init__(self, items: Iterable = ()):
+        self._ids = array('q')
+        self._student_ids = array('q')
+        self._course_ids = array('q')
+        self._grades = array('d')
+        self._alive = bytearray()
+        self._size = 0
+        self._dead = 0
+        # Словарь id -> строка строится, только если ID перестали идти по возрастанию
+        self._rows: Optional[Dict[int, int]] = None
+        # Индексы student_id / course_id -> строки строятся лениво при первом запросе
+        self._by_student: Optional[Dict[int, array]] = None
+        self._by_course: Optional[Dict[int, array]] = None
+        # Номер поколения меняется при уплотнении, когда строки сдвигаются
+        self._generation = 0
+        self.version = 0
+        self._before_change = None
+        self._on_change = None
+        self.extend(items)
+
+    def __iter__(self) -> Iterator[GradeView]:
+        alive = self._alive
+        for row in range(len(alive)):
+            if alive[row]:
+                yield GradeView(self, row)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, grade_id) -> bool:
+        return self._row_of(grade_id) >= 0
+
+    def __repr__(self):
+        return f"GradeTable({self._size} оценок)"
+
+    def _row_of(self, grade_id) -> int:
+        """Возвращает номер строки живой оценки или -1"""
+        if self._rows is not None:
+            return self._rows.get(grade_id, -1)
+        ids = self._ids
+        row = bisect_left(ids, grade_id)
+        if row < len(ids) and ids[row] == grade_id and self._alive[row]:
+            return row
+        return -1
+
+    def _build_rows(self):
+        alive = self._alive
+        self._rows = {grade_id: row for row, grade_id in enumerate(self._ids) if alive[row]}
+
+    @staticmethod
+    def _keys(*values) -> array:
+        """Проверяет, что ID помещаются в колонки; возвращает их массивом"""
+        try:
+            return array('q', values)
+        except (TypeError, OverflowError) as e:
+            raise InvalidDataError(f"Некорректный ID в оценке: {e}") from None
+
+    @staticmethod
+    def _value(grade) -> float:
+        try:
+            return array('d', (grade,))[0]
+        except TypeError as e:
+            raise InvalidDataError(f"Некорректное значение оценки: {e}") from None
+
+    @staticmethod
+    def _move_row(index: Optional[Dict[int, array]], row: int, old_key: int, new_key: int):
+        """Переносит строку между корзинами индекса, сохраняя порядок добавления"""
+        if index is None:
+            return
+        bucket = index[old_key]
+        bucket.remove(row)
+        if not bucket:
+            del index[old_key]
+        bucket = index.setdefault(new_key, array('q'))
+        bucket.insert(bisect_left(bucket, row), row)
+
+    def ids(self) -> Iterator[int]:
+        """Возвращает ID живых оценок в порядке добавления"""
+        alive = self._alive
+        return (grade_id for row, grade_id in enumerate(self._ids) if alive[row])
+
+    def get(self, grade_id: int, default=None):
+        row = self._row_of(grade_id)
+        return GradeView(self, row) if row >= 0 else default
+
+    def add(self, grade) -> GradeView:
+        """Добавляет оценку (Grade или любой объект с теми же полями)"""
+        # Все значения проверяются до записи, чтобы ошибка не оставила колонки разной длины
+        grade_id, student_id, course_id = self._keys(grade.id, grade.student_id, grade.course_id)
+        value = self._value(grade.grade)
+        if grade_id in self:
+            raise DuplicateIDError(f"ID {grade_id} уже существует")
+        if self._before_change is not None:
+            self._before_change("create", grade_id, Grade(grade_id, student_id, course_id, value), None)
+        row = len(self._ids)
+        if self._rows is None and row and grade_id <= self._ids[-1]:
+            # ID пришел не по возрастанию: переходим на словарь
+            self._build_rows()
+        self._ids.append(grade_id)
+        self._student_ids.append(student_id)
+        self._course_ids.append(course_id)
+        self._grades.append(value)
+        self._alive.append(1)
+        self._size += 1
+        if self._rows is not None:
+            self._rows[grade_id] = row
+        if self._by_student is not None:
+            self._by_student.setdefault(student_id, array('q')).append(row)
+        if self._by_course is not None:
+            self._by_course.setdefault(course_id, array('q')).append(row)
+        self.version += 1
+        view = GradeView(self, row)
+        if self._on_change is not None:
+            self._on_change("create", grade_id, view, None)
+        return view
+
+    append = add
+
+    def extend(self, grades: Iterable):
+        for grade in grades:
+            self.add(grade)
+
+    def remove(self, grade_id: int) -> Grade:
+        """Удаляет оценку и возвращает ее копию в виде Grade"""
+        row = self._row_of(grade_id)
+        if row < 0:
+            raise NotFoundError(f"ID {grade_id} не найден")
+        grade = Grade(grade_id, self._student_ids[row], self._course_ids[row], self._grades[row])
+        if self._before_change is not None:
+            self._before_change("delete", grade_id, grade, None)
+        self._alive[row] = 0
+        self._size -= 1
+        self._dead += 1
+        if self._rows is not None:
+            del self._rows[grade_id]
+        self.version += 1
+        if self._on_change is not None:
+            self._on_change("delete", grade_id, grade, None)
+        if self._dead >= self._COMPACT_MIN_DEAD and self._dead > self._size:
+            self.compact()
+        return grade
+
+    def update(self, grade_id: int, changes: dict) -> GradeView:
+        row = self._row_of(grade_id)
+        if row < 0:
+            raise NotFoundError(f"ID {grade_id} не найден")
+        new_id, student_id, course_id = self._keys(changes.get('id', grade_id),
+                                                   changes.get('student_id', self._student_ids[row]),
+                                                   changes.get('course_id', self._course_ids[row]))
+        value = self._value(changes.get('grade', self._grades[row]))
+        if new_id != grade_id and new_id in self:
+            raise DuplicateIDError(f"ID {new_id} уже существует")
+        applied = {key: change for key, change in changes.items() if key in _GRADE_FIELDS}
+        if self._before_change is not None:
+            self._before_change("update", grade_id, GradeView(self, row), applied)
+        if new_id != grade_id:
+            if self._rows is None:
+                self._build_rows()
+            del self._rows[grade_id]
+            self._rows[new_id] = row
+            self._ids[row] = new_id
+        if student_id != self._student_ids[row]:
+            self._move_row(self._by_student, row, self._student_ids[row], student_id)
+            self._student_ids[row] = student_id
+        if course_id != self._course_ids[row]:
+            self._move_row(self._by_course, row, self._course_ids[row], course_id)
+            self._course_ids[row] = course_id
+        self._grades[row] = value
+        self.version += 1
+        view = GradeView(self, row)
+        if self._on_change is not None:
+            self._on_change("update", grade_id, view, applied)
+        return view
+
+    def clear(self):
+        if self._before_change is not None:
+            self._before_change("clear", None, None, None)
+        version, before_change, on_change, generation = (self.version, self._before_change, self._on_change,
+                                                         self._generation)
+        self.__init__()
+        self.version, self._before_change, self._on_change = version + 1, before_change, on_change
+        # Строки начинаются заново, поэтому старые GradeView должны искать свою строку по ID
+        self._generation = generation + 1
+        if on_change is not None:
+            on_change("clear", None, None, None)
+
+    def compact(self):
+        """Физически удаляет помеченные строки и сбрасывает производные индексы"""
+        alive = self._alive
+        keep = [row for row in range(len(alive)) if alive[row]]
+        self._ids = array('q', (self._ids[row] for row in keep))
+        self._student_ids = array('q', (self._student_ids[row] for row in keep))
+        self._course_ids = array('q', (self._course_ids[row] for row in keep))
+        self._grades = array('d', (self._grades[row] for row in keep))
+        self._alive = bytearray(b"\x01" * len(keep))
+        self._dead = 0
+        self._generation += 1
+        self._by_student = self._by_course = None
+        if self._rows is not None:
+            self._build_rows()
+
+    def _select(self, index_name: str, column: array, key: int) -> List[GradeView]:
+        index = getattr(self, index_name)
+        if index is None:
+            index = {}
+            alive = self._alive
+            for row, value in enumerate(column):
+                if alive[row]:
+                    index.setdefault(value, array('q')).append(row)
+            setattr(self, index_name, index)
+        alive = self._alive
+        return [GradeView(self, row) for row in index.get(key, ()) if alive[row]]
+
+    def for_student(self, student_id: int) -> List[GradeView]:
+        """Возвращает оценки студента в порядке добавления"""
+        return self._select("_by_student", self._student_ids, student_id)
+
+    def for_course(self, course_id: int) -> List[GradeView]:
+        """Возвращает оценки по курсу в порядке добавления"""
+        return self._select("_by_course", self._course_ids, course_id)
+
+# Блокировка "много читателей или один писатель"
+class RWLock:
+    """Блокировка чтения/записи без голодания ни читателей, ни писателей.
+
+    Новые читатели ждут, пока есть ожидающий писатель, а после каждой записи
+    сначала впускаются все ожидавшие читатели. Поток, держащий запись, может
+    повторно брать и запись, и чтение; поток, держащий чтение, может
+    повторно брать чтение. Повышение чтения до записи запрещено, так как
+    ведет к взаимной блокировке.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._readers_waiting = 0
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+        # Очередь читателей: после записи ожидавшие читатели проходят раньше следующего писателя
+        self._read_turn = False
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if self._writer == me or depth:
+            # Повторный вход: блокировка уже удерживается этим потоком
+            local.depth = depth + 1
+            try:
+                yield
+            finally:
+                local.depth = depth
+            return
+        with self._cond:
+            self._readers_waiting += 1
+            try:
+                while self._writer is not None or (self._writers_waiting and not self._read_turn):
+                    self._cond.wait()
+            finally:
+                self._readers_waiting -= 1
+            if not self._readers_waiting:
+                self._read_turn = False
+            self._readers += 1
+        local.depth = 1
+        try:
+            yield
+        finally:
+            local.depth = 0
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            try:
+                yield
+            finally:
+                self._write_depth -= 1
+            return
+        if getattr(self._local, "depth", 0):
+            raise RuntimeError("Нельзя повысить блокировку чтения до блокировки записи")
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers or self._read_turn:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._write_depth = 0
+                self._writer = None
+                self._read_turn = self._readers_waiting > 0
+                self._cond.notify_all()
+
+# Пустая блокировка для однопоточного режима: ничего не стоит при входе и выходе
+class _NullLock:
+    _context = nullcontext()
+
+    def read(self):
+        return self._context
+
+    def write(self):
+        return self._context
+
+NULL_LOCK = _NullLock()
+
+# Декоратор, выполняющий функцию под блокировкой данных (первого аргумента)
+def _locked(mode: str):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(data, *args, **kwargs):
+            with getattr(data.lock, mode)():
+                return func(data, *args, **kwargs)
+        return wrapper
+    return decorator
+
+# Журнал операций. По умолчанию сообщения никуда не выводятся; вывод включается
+# настройкой logging, например logging.basicConfig(level=logging.INFO).
+# Аргументы сообщений форматируются, только если уровень включен
+logger = logging.getLogger("unik")
+logger.addHandler(logging.NullHandler())
+
+# Наблюдатель операций (например, metrics.Metrics); None - операции не измеряются
+_observer = None
+
+def set_observer(observer):
+    """Устанавливает наблюдателя измеряемых операций или снимает его (None).
+
+    Перед операцией вызывается token = observer.start(op), после нее -
+    observer.finish(op, token, ok), где op - имя функции, а ok - успешна ли она.
+    """
+    global _observer
+    _observer = observer
+
+# Декоратор измеряемой операции. CRUD функции не выбрасывают исключений, а
+# сообщают об ошибке результатом, поэтому неудачу определяет failed(result)
+def _instrumented(failed=None):
+    def decorator(func):
+        op = func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            observer = _observer
+            if observer is None:
+                return func(*args, **kwargs)
+            token = observer.start(op)
+            ok = False
+            try:
+                result = func(*args, **kwargs)
+                ok = failed is None or not failed(result)
+                return result
+            finally:
+                observer.finish(op, token, ok)
+        return wrapper
+    return decorator
+
+def _is_none(result) -> bool:
+    return result is None
+
+def _is_false(result) -> bool:
+    return result is False
+
+def _batch_failed(result) -> bool:
+    return not result.ok
+
+# Создает свойство UniversityData, которое отдает хранилище нужного типа
+def _store_property(entity_type: str):
+    def getter(self) -> EntityStore:
+        return self._stores[entity_type]
+
+    def setter(self, items: Iterable):
+        # Присваивание списка (например, при загрузке) превращается в хранилище того же типа
+        if not isinstance(items, (EntityStore, GradeTable)):
+            items = type(self._stores[entity_type])(items)
+        if self._before_listeners:
+            self._notify(self._before_listeners, entity_type, "reset", None, items, None)
+        self._stores[entity_type] = items
+        self._generation += 1
+        if self._save_cache:
+            # Версия нового хранилища начинается заново, поэтому его текст в кэше недействителен
+            for key in [key for key in self._save_cache if key[1] == entity_type + "s"]:
+                del self._save_cache[key]
+        self._install_hooks()
+        if self._listeners:
+            # Замена хранилища целиком: подписчики получают новое хранилище
+            self._notify(self._listeners, entity_type, "reset", None, items, None)
+
+    return property(getter, setter)
 
 # Основной класс для хранения всех данных университета
 class UniversityData:
-    def __init__(self):
-        # Инициализация пустых списков для хранения всех сущностей
-        self.students: List[Student] = []
-        self.professors: List[Professor] = []
-        self.courses: List[Course] = []
-        self.departments: List[Department] = []
-        self.grades: List[Grade] = []
-
-# Функция для сохранения данных в JSON файл
+    def __init__(self, columnar_grades: bool = False, thread_safe: bool = False, save_cache: bool = False,
+                 skip_unchanged_saves: bool = False):
+        # Инициализация пустых хранилищ для всех сущностей;
+        # columnar_grades=True хранит оценки в компактной GradeTable.
+        # thread_safe=True включает блокировку чтения/записи: CRUD функции и
+        # сохранение берут ее сами, прямой доступ к хранилищам из нескольких
+        # потоков должен оборачиваться в data.lock.read() / data.lock.write().
+        # save_cache=True хранит текст сохраненных разделов, чтобы при следующем
+        # сохранении сериализовать заново только измененные. Кэш держит в памяти
+        # полный текст файла, поэтому по умолчанию выключен и сохранение пишет
+        # разделы потоково.
+        # skip_unchanged_saves=True не перезаписывает файл, если данные не менялись
+        # с прошлого сохранения в него. Как и save_cache, опирается на версии
+        # хранилищ: прямое присваивание атрибутов сущности тогда нужно отмечать
+        # через mark_dirty(), иначе сохранение его пропустит
+        self.lock = RWLock() if thread_safe else NULL_LOCK
+        # Правила ссылочной целостности (integrity.Integrity); None - не проверяются
+        self.integrity = None
+        self._stores: Dict[str, EntityStore] = {
+            "student": EntityStore(),
+            "professor": EntityStore(),
+            "course": EntityStore(),
+            "department": EntityStore(),
+            "grade": GradeTable() if columnar_grades else GradeStore(),
+        }
+        # Увеличивается при замене хранилища целиком (например, data.students = [...])
+        self._generation = 0
+        # Подписчики на изменения; пока их нет, хранилища не тратят время на уведомления
+        self._listeners: List = []
+        # Подписчики, вызываемые до применения изменения (см. subscribe)
+        self._before_listeners: List = []
+        # Кэш текста разделов: (формат, раздел) -> (версия хранилища, текст)
+        self._save_cache: Optional[dict] = {} if save_cache else None
+        self._skip_unchanged_saves = skip_unchanged_saves
+        # Последние сохранения: (формат, путь) -> (версия данных, mtime, размер файла)
+        self._saved: dict = {}
+
+    students = _store_property("student")
+    professors = _store_property("professor")
+    courses = _store_property("course")
+    departments = _store_property("department")
+    grades = _store_property("grade")
+
+    def store(self, entity_type: str) -> EntityStore:
+        """Возвращает хранилище для типа сущности ("student", "grade", ...)"""
+        return self._stores[entity_type]
+
+    @property
+    def version(self) -> tuple:
+        """Версия данных: меняется при любом изменении через хранилища и CRUD функции.
+
+        Подходит для проверки актуальности кэшей, построенных по данным.
+        """
+        return self._generation, tuple(store.version for store in self._stores.values())
+
+    def mark_dirty(self, entity_type: Optional[str] = None):
+        """Отмечает хранилище (или все хранилища) измененным.
+
+        Изменения через CRUD функции и методы хранилищ (add, append, extend,
+        remove, update, clear) отслеживаются автоматически; прямое присваивание атрибутов
+        сущности, например data.students.get(1).name = "...", нужно отметить
+        вручную, иначе кэши по версии (и сохранение с save_cache или
+        skip_unchanged_saves) его не заметят.
+        """
+        for name in ([entity_type] if entity_type else list(self._stores)):
+            self._stores[name].version += 1
+
+    def _is_saved(self, fmt, filename: str) -> bool:
+        # Файл записан из текущей версии данных и с тех пор не менялся на диске
+        if not self._skip_unchanged_saves:
+            return False
+        saved = self._saved.get((fmt, os.path.abspath(filename)))
+        if saved is None or saved[0] != self.version:
+            return False
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return False
+        return saved[1:] == (stat.st_mtime_ns, stat.st_size)
+
+    def _mark_saved(self, fmt, filename: str):
+        if not self._skip_unchanged_saves:
+            return
+        stat = os.stat(filename)
+        self._saved[(fmt, os.path.abspath(filename))] = (self.version, stat.st_mtime_ns, stat.st_size)
+
+    def subscribe(self, listener, before: bool = False):
+        """Подписывает listener(entity_type, op, entity_id, entity, changes) на изменения.
+
+        op: "create", "update", "delete", "clear" или "reset" (замена хранилища).
+        entity_id - ID до изменения, changes - примененные поля для "update".
+
+        before=True вызывает listener после проверок хранилища, но до изменения:
+        entity - добавляемая, изменяемая или удаляемая сущность в прежнем
+        состоянии, а исключение из listener отменяет изменение (так журнал
+        записывает изменение раньше, чем оно применяется).
+        """
+        (self._before_listeners if before else self._listeners).append(listener)
+        self._install_hooks()
+
+    def unsubscribe(self, listener):
+        """Отписывает обработчик изменений"""
+        if listener in self._before_listeners:
+            self._before_listeners.remove(listener)
+        else:
+            self._listeners.remove(listener)
+        self._install_hooks()
+
+    def _notify(self, listeners: List, entity_type: str, op: str, entity_id, entity, changes):
+        for listener in tuple(listeners):
+            listener(entity_type, op, entity_id, entity, changes)
+
+    def _hook(self, listeners: List, entity_type: str):
+        if not listeners:
+            return None
+        return (lambda op, entity_id, entity, changes:
+                self._notify(listeners, entity_type, op, entity_id, entity, changes))
+
+    def _install_hooks(self):
+        for entity_type, store in self._stores.items():
+            store._before_change = self._hook(self._before_listeners, entity_type)
+            store._on_change = self._hook(self._listeners, entity_type)
+
+# Функция для сохранения данных в JSON файл; возвращает False, если записать не удалось
+@_instrumented(_is_false)
+@_locked("read")
 def save_to_json(data: UniversityData, filename: str):
     try:
-        # Создаем словарь, содержащий списки всех сущностей в виде словарей
-        json_data = {
-            "students": [i.to_dict() for i in data.students],  # Преобразуем каждого студента в словарь
-            "professors": [i.to_dict() for i in data.professors],
-            "courses": [i.to_dict() for i in data.courses],
-            "departments": [i.to_dict() for i in data.departments],
-            "grades": [i.to_dict() for i in data.grades]
-        }
-        # Открываем файл для записи с кодировкой UTF-8
+        # Если файл уже содержит текущую версию данных, перезаписывать его не нужно
+        if data._is_saved("json", filename):
+            logger.info("Изменений нет, %s не перезаписан", filename)
+            return True
+        # Открываем файл для записи с кодировкой UTF-8; неизмененные разделы
+        # берутся из кэша, измененные сериализуются заново
         with open(filename, 'w', encoding='utf-8') as f:
-            # Записываем данные в файл с отступами и поддержкой кириллицы
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
-        print(f"Данные сохранены в {filename}")
+            _write_json(f, _cached_sections(data, "json", _json_section))
+        data._mark_saved("json", filename)
+        logger.info("Данные сохранены в %s", filename)
+        return True
     except Exception as e:
         # Обрабатываем любые ошибки при сохранении
-        print(f"Ошибка сохранения JSON: {e}")
+        logger.error("Ошибка сохранения JSON: %s", e)
+    return False
 
-# Функция для загрузки данных из JSON файла
+# Функция для загрузки данных из JSON файла; некорректное содержимое файла
+# выбрасывает InvalidDataError, частично загруженные данные не возвращаются
+@_instrumented()
 def load_from_json(filename: str):
     # Создаем новый экземпляр UniversityData
     data = UniversityData()
@@ -163,107 +936,615 @@ def load_from_json(filename: str):
         with open(filename, 'r', encoding='utf-8') as f:
             # Загружаем данные из JSON файла
             json_data = json.load(f)
-
-        # Используем распаковку словарей для создания объектов
-        # Student(**i) эквивалентно Student(id=i['id'], name=i['name'], ...)
-        data.students = [Student(**i) for i in json_data.get("students", [])]
-        data.professors = [Professor(**j) for j in json_data.get("professors", [])]
-        data.courses = [Course(**k) for k in json_data.get("courses", [])]
-        data.departments = [Department(**l) for l in json_data.get("departments", [])]
-        data.grades = [Grade(**m) for m in json_data.get("grades", [])]
-
-        print(f"Данные загружены из {filename}")
+        if not isinstance(json_data, dict):
+            raise InvalidDataError(f"Ожидался объект JSON, получено {type(json_data).__name__}")
+
+        # Создаем объекты декодерами, сгенерированными по схемам сущностей;
+        # некорректная запись прерывает загрузку с указанием раздела и номера записи.
+        # Хранилища заполняются, только когда декодированы все разделы
+        sections = {section: _decode_rows(SCHEMAS[class_type].from_dict, json_data.get(section, []), section)
+                    for section, class_type in SECTIONS.items()}
+        for section, items in sections.items():
+            setattr(data, section, items)
+
+        logger.info("Данные загружены из %s", filename)
     except FileNotFoundError:
         # Если файл не найден, создаем пустой набор данных
-        print(f"Файл {filename} не найден")
+        logger.warning("Файл %s не найден", filename)
+    except json.JSONDecodeError as e:
+        logger.error("Ошибка загрузки JSON: %s", e)
+        raise InvalidDataError(f"Некорректный JSON в {filename}: {e}") from None
+    except InvalidDataError as e:
+        logger.error("Ошибка загрузки JSON: %s", e)
+        raise
     except Exception as e:
         # Обрабатываем другие ошибки
-        print(f"Ошибка загрузки JSON: {e}")
+        logger.error("Ошибка загрузки JSON: %s", e)
     return data
 
-# Функция для сохранения данных в XML файл
-def save_to_xml(data: UniversityData, filename: str):
+# Экранирование текста так же, как это делал minidom при красивом выводе
+def _xml_escape(text: str) -> str:
+    # Обычно экранировать нечего, и проверка вхождений дешевле четырех замен
+    if "&" not in text and "<" not in text and ">" not in text and '"' not in text:
+        return text
+    return (text.replace("&", "&amp;").replace("<", "&lt;")
+            .replace('"', "&quot;").replace(">", "&gt;"))
+
+# Кодирование скалярного значения JSON. json.dumps с indent не использует
+# ускоренный кодировщик на C, поэтому записи собираются из готовых значений
+# (см. EntitySchema.to_json)
+def _json_scalar(value) -> str:
+    kind = type(value)
+    if kind is str:
+        return json.encoder.encode_basestring(value)
+    if kind is int:
+        return int.__repr__(value)
+    if kind is float and value - value == 0:
+        # Конечные числа; NaN и бесконечности json.dumps пишет по-своему
+        return float.__repr__(value)
+    return json.dumps(value, ensure_ascii=False)
+
+# Типы значений, допустимые для поля объявленного типа; как и в JSON, целое
+# число подходит для поля float. bool не принимается за int
+_ACCEPTED_TYPES = {int: (int,), float: (float, int), str: (str,)}
+
+# Схемы сущностей: поля и их типы в порядке сериализации. По схеме один раз на
+# класс генерируются специализированные функции кодирования и декодирования,
+# поэтому при загрузке и сохранении нет обхода списков полей, getattr и **kwargs
+class EntitySchema:
+    """Описание сущности: класс, раздел файла данных, тег XML и типы полей.
+
+    Сгенерированные функции:
+    from_dict(record) - объект из словаря JSON,
+    from_xml(element) - объект из XML элемента записи,
+    to_json(obj) - текст записи JSON в формате json.dump(indent=2) внутри раздела,
+    to_xml_text(obj, pretty) - текст записи XML,
+    to_element(obj) - XML элемент ElementTree.
+    Ошибки формата записи декодеры выбрасывают как InvalidDataError.
+
+    Поля из nullable допускают None (пустую ссылку): в JSON это null, в XML -
+    пустой элемент, который и читается как None.
+    """
+
+    def __init__(self, class_type: type, section: str, fields: Dict[str, type], nullable: Iterable[str] = ()):
+        self.class_type = class_type
+        self.section = section
+        self.tag = class_type.__name__.lower()
+        self.fields = dict(fields)
+        self.nullable = frozenset(nullable)
+        self._xml_text = {}
+        self._generate()
+
+    def __repr__(self):
+        return f"EntitySchema({self.class_type.__name__}, {list(self.fields)})"
+
+    def to_xml_text(self, obj, pretty: bool = True) -> str:
+        return self._xml_text[pretty](obj)
+
+    def check(self, record, partial: bool = False):
+        """Проверяет набор полей и типы значений записи.
+
+        partial=True разрешает неполный набор полей (изменения для update).
+        """
+        fields = self.fields
+        if not isinstance(record, dict):
+            raise _schema_error(self, record, None)
+        extra = [name for name in record if name not in fields]
+        if extra and partial:
+            raise InvalidDataError(f"Неизвестные поля {self.tag}: {extra}")
+        if extra or (not partial and len(record) != len(fields)):
+            raise _schema_error(self, record, None)
+        for name, value in record.items():
+            kind = fields[name]
+            if value is None and name in self.nullable:
+                continue
+            if type(value) not in _ACCEPTED_TYPES[kind]:
+                raise InvalidDataError(f"Поле {self.tag}.{name} должно иметь тип {kind.__name__}, "
+                                       f"получено {type(value).__name__}")
+
+    def _generate(self):
+        fields = self.fields
+        names = list(fields)
+        nullable = self.nullable
+        lines = []
+        # Из словаря: типы значений проверяются одним условием, атрибуты
+        # присваиваются напрямую, минуя вызов __init__ с **kwargs. При ошибке
+        # check() находит конкретное поле
+        def wrong_type(name, kind, value):
+            checks = [f"type({value}) is not {accepted.__name__}" for accepted in _ACCEPTED_TYPES[kind]]
+            if name in nullable:
+                checks.append(f"{value} is not None")
+            return " and ".join(checks)
+        values = [f"v{i}" for i in range(len(names))]
+        lines.append("def from_dict(record):")
+        lines.append("    try:")
+        lines.append(f"        if len(record) != {len(names)}:")
+        lines.append("            raise KeyError")
+        lines.extend(f"        {value} = record[{name!r}]" for value, name in zip(values, names))
+        lines.append("    except (KeyError, TypeError) as e:")
+        lines.append("        raise _schema_error(_schema, record, e) from None")
+        lines.append("    if " + " or ".join(f"({wrong_type(name, kind, value)})"
+                                            for value, (name, kind) in zip(values, fields.items())) + ":")
+        lines.append("        _schema.check(record)")
+        lines.append("    obj = _new(_cls)")
+        lines.extend(f"    obj.{name} = {value}" for value, name in zip(values, names))
+        lines.append("    return obj")
+
+        # Из XML: текст полей преобразуется конвертером по типу поля. Обычно поля
+        # идут в порядке схемы и разбираются по позиции, иначе - через словарь тегов.
+        # Пустой элемент поля из nullable читается как None
+        def convert(name, kind, text):
+            if name in nullable:
+                return text if kind is str else f"None if {text} is None else {kind.__name__}({text})"
+            return f"{text} or ''" if kind is str else f"{kind.__name__}({text} or '')"
+        children = [f"c{i}" for i in range(len(names))]
+        lines.append("def from_xml(element):")
+        lines.append(f"    if len(element) == {len(names)}:")
+        lines.append(f"        {', '.join(children)}, = element")
+        lines.append("        if " + " and ".join(f"{child}.tag == {name!r}" for child, name in zip(children, names)) + ":")
+        lines.append("            obj = _new(_cls)")
+        lines.append("            try:")
+        lines.extend(f"                obj.{name} = {convert(name, kind, child + '.text')}"
+                     for child, (name, kind) in zip(children, fields.items()))
+        lines.append("            except (TypeError, ValueError) as e:")
+        lines.append("                raise _schema_error(_schema, {child.tag: child.text for child in element}, e) from None")
+        lines.append("            return obj")
+        lines.append("    values = {child.tag: child.text for child in element}")
+        lines.append("    obj = _new(_cls)")
+        lines.append("    try:")
+        lines.append(f"        if len(values) != {len(names)}:")
+        lines.append("            raise KeyError")
+        lines.extend(f"        obj.{name} = {convert(name, kind, f'values[{name!r}]')}" for name, kind in fields.items())
+        lines.append("    except (KeyError, TypeError, ValueError) as e:")
+        lines.append("        raise _schema_error(_schema, values, e) from None")
+        lines.append("    return obj")
+
+        # В JSON: скаляры кодируются ускоренными функциями для объявленного типа,
+        # запись собирается одной f-строкой без промежуточных конкатенаций
+        encoders = {int: "_int_repr(v{i}) if type(v{i}) is int else _json_scalar(v{i})",
+                    str: "_json_string(v{i}) if type(v{i}) is str else _json_scalar(v{i})"}
+        lines.append("def to_json(obj):")
+        template = []
+        for i, (name, kind) in enumerate(fields.items()):
+            lines.append(f"    v{i} = obj.{name}")
+            lines.append(f"    e{i} = " + encoders.get(kind, "_json_scalar(v{i})").format(i=i))
+            template.append(("{{" if i == 0 else ",") + f"\n      {json.dumps(name)}: {{e{i}}}")
+        template.append("\n    }}")
+        lines.append("    return f" + repr("".join(template)))
+
+        # В XML: текст записи целиком, пустые значения и None - тегом вида <field/>
+        for pretty in (True, False):
+            newline, indent = ("\n", "  ") if pretty else ("", "")
+            function = "to_xml_pretty" if pretty else "to_xml_compact"
+            lines.append(f"def {function}(obj):")
+            template = [f"{indent * 2}<{self.tag}>{newline}"]
+            for i, (name, kind) in enumerate(fields.items()):
+                lines.append(f"    v{i} = obj.{name}")
+                text = f"_xml_escape(v{i} if type(v{i}) is str else str(v{i}))" if kind is str else f"str(v{i})"
+                if name in nullable:
+                    text = f"'' if v{i} is None else {text}"
+                lines.append(f"    t{i} = {text}")
+                filled = "f" + repr(f"{indent * 3}<{name}>{{t{i}}}</{name}>{newline}")
+                empty = repr(f"{indent * 3}<{name}/>{newline}")
+                lines.append(f"    p{i} = {filled} if t{i} else {empty}")
+                template.append(f"{{p{i}}}")
+            template.append(f"{indent * 2}</{self.tag}>{newline}")
+            lines.append("    return f" + repr("".join(template)))
+
+        # XML элемент ElementTree для to_xml() классов сущностей
+        lines.append("def to_element(obj):")
+        lines.append(f"    element = _Element({self.tag!r})")
+        lines.extend(f"    _SubElement(element, {name!r}).text = None if obj.{name} is None else str(obj.{name})"
+                     if name in nullable else f"    _SubElement(element, {name!r}).text = str(obj.{name})"
+                     for name in names)
+        lines.append("    return element")
+
+        namespace = {"_new": object.__new__, "_cls": self.class_type, "_schema": self,
+                     "_Element": ET.Element, "_SubElement": ET.SubElement,
+                     "_int_repr": int.__repr__, "_json_string": json.encoder.encode_basestring,
+                     "_json_scalar": _json_scalar, "_xml_escape": _xml_escape, "_schema_error": _schema_error}
+        exec("\n".join(lines), namespace)
+        self.from_dict = namespace["from_dict"]
+        self.from_xml = namespace["from_xml"]
+        self.to_json = namespace["to_json"]
+        self.to_element = namespace["to_element"]
+        self._xml_text = {True: namespace["to_xml_pretty"], False: namespace["to_xml_compact"]}
+
+# Описание причины, по которой запись не соответствует схеме
+def _schema_error(schema: EntitySchema, record, error: Exception) -> InvalidDataError:
+    if not isinstance(record, dict):
+        return InvalidDataError(f"Запись {schema.tag} должна быть объектом, получено {type(record).__name__}")
+    missing = [name for name in schema.fields if name not in record]
+    extra = [name for name in record if name not in schema.fields]
+    if missing or extra:
+        return InvalidDataError(f"Неверный набор полей {schema.tag}: нет {missing}, лишние {extra}")
+    return InvalidDataError(f"Неверное значение поля {schema.tag}: {error}")
+
+# Ошибка записи с указанием раздела, номера записи в нем и ID
+def _row_error(section: str, index: int, entity_id, error: Exception) -> InvalidDataError:
+    where = f"{section}[{index}]" + (f" (ID {entity_id})" if entity_id is not None else "")
+    return InvalidDataError(f"{where}: {error}")
+
+# Декодирование раздела списком; при ошибке повторный проход находит первую плохую запись
+def _decode_rows(decode, rows: list, section: str) -> list:
+    try:
+        return [decode(row) for row in rows]
+    except InvalidDataError:
+        for index, row in enumerate(rows):
+            try:
+                decode(row)
+            except InvalidDataError as e:
+                entity_id = row.get("id") if isinstance(row, dict) else None
+                raise _row_error(section, index, entity_id, e) from None
+        raise
+
+# Схемы всех сущностей: класс -> схема
+SCHEMAS = {schema.class_type: schema for schema in (
+    EntitySchema(Student, "students", {"id": int, "name": str, "email": str, "year": int, "faculty": str}),
+    EntitySchema(Professor, "professors", {"id": int, "name": str, "email": str, "department": str},
+                 nullable=("department",)),
+    EntitySchema(Course, "courses", {"id": int, "name": str, "code": str, "credits": int}),
+    EntitySchema(Department, "departments", {"id": int, "name": str, "head": str}),
+    EntitySchema(Grade, "grades", {"id": int, "student_id": int, "course_id": int, "grade": float}),
+)}
+
+# Разделы файлов данных и соответствующие им классы сущностей
+SECTIONS = {schema.section: class_type for class_type, schema in SCHEMAS.items()}
+
+# Потоковый разбор JSON: читает файл кусками и держит в памяти только текущую запись
+class _JSONStream:
+    _WHITESPACE = " \t\n\r"
+
+    def __init__(self, f, chunk_size: int):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Дочитывает следующий кусок файла, отбрасывая уже разобранную часть буфера"""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Возвращает следующий значимый символ, не сдвигая позицию"""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in self._WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise InvalidDataError(f"Ожидался символ {char!r}, найдено {found or 'конец файла'!r}")
+        self._pos += 1
+
+    def value(self):
+        """Разбирает одно JSON значение, при необходимости дочитывая файл"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise InvalidDataError(f"Некорректный JSON: {e}") from None
+            # Значение, упирающееся в конец буфера (например, число), может быть обрезано
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def items(self) -> Iterator:
+        """Перебирает элементы JSON массива по одному"""
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise InvalidDataError(f"Ожидался ',' или ']' в массиве, найдено {char or 'конец файла'!r}")
+
+# Генератор сущностей из JSON файла без загрузки всего документа в память
+def iter_json(filename: str, sections: Optional[Iterable[str]] = None,
+              chunk_size: int = 1 << 16) -> Iterator:
+    """Разбирает JSON файл по разделам и выдает пары (раздел, сущность).
+
+    Если указан sections, создаются только сущности из перечисленных разделов,
+    остальные разделы пролистываются по одной записи.
+    """
+    selected = set(SECTIONS if sections is None else sections)
+    unknown = selected - SECTIONS.keys()
+    if unknown:
+        raise InvalidDataError(f"Неизвестные разделы: {', '.join(sorted(unknown))}")
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        stream = _JSONStream(f, chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key in SECTIONS and stream.peek() == "[":
+                decode = SCHEMAS[SECTIONS[key]].from_dict
+                for index, record in enumerate(stream.items()):
+                    if key in selected:
+                        try:
+                            entity = decode(record)
+                        except InvalidDataError as e:
+                            entity_id = record.get("id") if isinstance(record, dict) else None
+                            raise _row_error(key, index, entity_id, e) from None
+                        yield key, entity
+            else:
+                # Посторонние ключи верхнего уровня пропускаем целиком
+                stream.value()
+            char = stream.peek()
+            stream._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise InvalidDataError(f"Ожидался ',' или '}}' в объекте, найдено {char or 'конец файла'!r}")
+
+# Функция для потоковой загрузки данных из JSON файла
+@_instrumented()
+def load_from_json_stream(filename: str, sections: Optional[Iterable[str]] = None,
+                          data: Optional[UniversityData] = None) -> UniversityData:
+    """Загружает данные из JSON файла по мере чтения, не строя промежуточных списков.
+
+    sections ограничивает загрузку выбранными разделами, например ["grades"];
+    data позволяет дописать сущности в уже существующий UniversityData: файл
+    сначала загружается отдельно и дописывается, только если прочитан целиком
+    и его ID не пересекаются с имеющимися. Некорректное содержимое файла
+    выбрасывает InvalidDataError, а пересечение ID - DuplicateIDError; data
+    при этом не изменяется.
+    """
+    loaded = UniversityData(columnar_grades=data is not None and isinstance(data.grades, GradeTable))
+    try:
+        for section, entity in iter_json(filename, sections):
+            getattr(loaded, section).add(entity)
+        if data is not None:
+            _merge_loaded(data, loaded)
+        logger.info("Данные загружены из %s", filename)
+    except FileNotFoundError:
+        logger.warning("Файл %s не найден", filename)
+    except (InvalidDataError, DuplicateIDError) as e:
+        # Некорректный файл: частично загруженные данные не возвращаются
+        logger.error("Ошибка загрузки JSON: %s", e)
+        raise
+    except Exception as e:
+        logger.error("Ошибка загрузки JSON: %s", e)
+        loaded = UniversityData()
+    return data if data is not None else loaded
+
+# Дописывает загруженные сущности в data целиком или не дописывает ничего
+def _merge_loaded(data: UniversityData, loaded: UniversityData):
+    with data.lock.write():
+        for section in SECTIONS:
+            store = getattr(data, section)
+            for entity_id in getattr(loaded, section).ids():
+                if entity_id in store:
+                    raise DuplicateIDError(f"{section}: ID {entity_id} уже существует")
+        for section in SECTIONS:
+            getattr(data, section).extend(getattr(loaded, section))
+
+# Текст одного раздела XML по частям, без построения DOM
+def _xml_section(name: str, items: Iterable, pretty: bool = True, batch_size: int = 1000) -> Iterator[str]:
+    newline, indent = ("\n", "  ") if pretty else ("", "")
+    encode = SCHEMAS[SECTIONS[name]]._xml_text[pretty]
+    buf = []
+    empty = True
+    for item in items:
+        if empty:
+            buf.append(f"{indent}<{name}>{newline}")
+            empty = False
+        buf.append(encode(item))
+        # Отдаем накопленные записи пачками, чтобы не держать в памяти весь раздел
+        if len(buf) >= batch_size:
+            yield "".join(buf)
+            buf.clear()
+    if empty:
+        yield f"{indent}<{name}/>{newline}"
+    else:
+        buf.append(f"{indent}</{name}>{newline}")
+        yield "".join(buf)
+
+# Потоковая запись разделов XML без построения DOM
+def _write_xml(f, sections: Iterable, pretty: bool = True, batch_size: int = 1000):
+    """Записывает разделы (имя, итерируемое сущностей) в открытый файл f.
+
+    Вместо сущностей может быть передан готовый текст раздела (str).
+    При pretty=True вывод совпадает с прежним форматированием minidom
+    (отступ в два пробела), при pretty=False пишется без пробелов и переносов.
+    """
+    newline = "\n" if pretty else ""
+    f.write('<?xml version="1.0" ?>' + newline + "<university>" + newline)
+    for name, items in sections:
+        if isinstance(items, str):
+            f.write(items)
+        else:
+            for chunk in _xml_section(name, items, pretty, batch_size):
+                f.write(chunk)
+    f.write("</university>" + newline)
+
+# Текст одного раздела JSON по частям в том же формате, что json.dump(indent=2)
+def _json_section(name: str, items: Iterable, batch_size: int = 1000) -> Iterator[str]:
+    buf = [f"  {json.dumps(name, ensure_ascii=False)}: ["]
+    encode = SCHEMAS[SECTIONS[name]].to_json
+    empty = True
+    for item in items:
+        buf.append(("\n    " if empty else ",\n    ") + encode(item))
+        empty = False
+        if len(buf) >= batch_size:
+            yield "".join(buf)
+            buf.clear()
+    buf.append("]" if empty else "\n  ]")
+    yield "".join(buf)
+
+# Потоковая запись разделов JSON в том же формате, что json.dump(indent=2)
+def _write_json(f, sections: Iterable, batch_size: int = 1000):
+    """Записывает разделы (имя, итерируемое сущностей) в открытый файл f по одной записи.
+
+    Вместо сущностей может быть передан готовый текст раздела (str).
+    """
+    f.write("{")
+    separator = "\n"
+    for name, items in sections:
+        f.write(separator)
+        separator = ",\n"
+        if isinstance(items, str):
+            f.write(items)
+        else:
+            for chunk in _json_section(name, items, batch_size):
+                f.write(chunk)
+    f.write("}" if separator == "\n" else "\n}")
+
+# Разделы для записи: из кэша сериализованного текста, если раздел не менялся
+def _cached_sections(data: UniversityData, fmt, serialize) -> Iterator[tuple]:
+    """Выдает пары (раздел, текст) для save_to_json/save_to_xml.
+
+    Перегенерируется только текст разделов, версия хранилища которых
+    изменилась после прошлого сохранения; без кэша выдаются сами хранилища.
+    """
+    cache = data._save_cache
+    for name in SECTIONS:
+        store = getattr(data, name)
+        if cache is None:
+            yield name, store
+            continue
+        cached = cache.get((fmt, name))
+        if cached is None or cached[0] != store.version:
+            cached = cache[(fmt, name)] = (store.version, "".join(serialize(name, store)))
+        yield name, cached[1]
+
+# Функция для сохранения данных в XML файл; возвращает False, если записать не удалось
+@_instrumented(_is_false)
+@_locked("read")
+def save_to_xml(data: UniversityData, filename: str, pretty: bool = True):
     try:
-        # Создаем корневой элемент XML
-        root = ET.Element("university")
-        # Для каждого типа сущностей создаем соответствующий раздел
-        for lst, name in [
-            (data.students, "students"), (data.professors, "professors"),
-            (data.courses, "courses"), (data.departments, "departments"),
-            (data.grades, "grades")
-        ]:
-            # Создаем элемент для текущего типа сущностей
-            elem = ET.SubElement(root, name)
-            # Добавляем каждую сущность в виде XML элемента
-            for item in lst:
-                elem.append(item.to_xml())
-
-        # Форматируем XML для красивого вывода
-        xml_str = minidom.parseString(ET.tostring(root)).toprettyxml(indent="  ")
-        # Записываем XML в файл
+        key = ("xml", pretty)
+        if data._is_saved(key, filename):
+            logger.info("Изменений нет, %s не перезаписан", filename)
+            return True
+        # Записываем разделы в файл, не строя дерево в памяти; текст
+        # неизмененных разделов берется из кэша
+        serialize = lambda name, items: _xml_section(name, items, pretty)
         with open(filename, 'w', encoding='utf-8') as f:
-            f.write(xml_str)
-        print(f"Данные сохранены в {filename}")
+            _write_xml(f, _cached_sections(data, key, serialize), pretty)
+        data._mark_saved(key, filename)
+        logger.info("Данные сохранены в %s", filename)
+        return True
     except Exception as e:
-        print(f"Ошибка сохранения XML: {e}")
+        logger.error("Ошибка сохранения XML: %s", e)
+    return False
+
+# Генератор сущностей из XML файла на основе iterparse
+def iter_xml(filename: str, sections: Optional[Iterable[str]] = None) -> Iterator:
+    """Разбирает XML файл потоково и выдает пары (раздел, сущность).
+
+    Разобранные элементы сразу очищаются, поэтому расход памяти не зависит
+    от размера файла. sections ограничивает разбор выбранными разделами.
+    """
+    selected = set(SECTIONS if sections is None else sections)
+    unknown = selected - SECTIONS.keys()
+    if unknown:
+        raise InvalidDataError(f"Неизвестные разделы: {', '.join(sorted(unknown))}")
+
+    depth = 0
+    root = section_elem = None
+    schema = None
+    index = 0
+    for event, elem in ET.iterparse(filename, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1:
+                root = elem
+            elif depth == 2:
+                # Начало раздела: выбираем схему один раз на раздел
+                section_elem = elem
+                schema = SCHEMAS[SECTIONS[elem.tag]] if elem.tag in selected else None
+                index = 0
+            continue
+
+        depth -= 1
+        if depth == 2:
+            # Конец записи: собираем объект из дочерних элементов-полей
+            if schema is not None:
+                try:
+                    if elem.tag != schema.tag:
+                        raise InvalidDataError(f"Ожидался элемент <{schema.tag}>, найден <{elem.tag}>")
+                    entity = schema.from_xml(elem)
+                except InvalidDataError as e:
+                    raise _row_error(section_elem.tag, index, elem.findtext("id"), e) from None
+                index += 1
+                yield section_elem.tag, entity
+            # Освобождаем уже обработанные записи раздела
+            section_elem.clear()
+        elif depth == 1:
+            root.clear()
 
 # Функция для загрузки данных из XML файла
-def load_from_xml(filename: str) -> UniversityData:
+@_instrumented()
+def load_from_xml(filename: str, sections: Optional[Iterable[str]] = None) -> UniversityData:
     data = UniversityData()
     try:
-        # Парсим XML файл
-        tree = ET.parse(filename)
-        root = tree.getroot()  # Получаем корневой элемент
-
-        # Внутренняя функция для загрузки элементов определенного типа
-        def load_items(element_name, class_type, fields):
-            # Ищем элемент с заданным именем
-            elem = root.find(element_name)
-            if elem is not None:
-                # Для каждого элемента нужного типа
-                for item_elem in elem.findall(class_type.__name__.lower()):
-                    field_values = []
-                    # Для каждого поля извлекаем значение
-                    for field in fields:
-                        field_elem = item_elem.find(field)
-                        if field_elem is not None and field_elem.text is not None:
-                            # Преобразуем типы данных в зависимости от поля
-                            if field in ["id", "year", "credits", "student_id", "course_id"]:
-                                field_values.append(int(field_elem.text))
-                            elif field == "grade":
-                                field_values.append(float(field_elem.text))
-                            else:
-                                field_values.append(field_elem.text)
-                    # Создаем объект и добавляем в соответствующий список
-                    data.__dict__[element_name].append(class_type(*field_values))
-
-        # Загружаем все типы сущностей
-        load_items("students", Student, ["id", "name", "email", "year", "faculty"])
-        load_items("professors", Professor, ["id", "name", "email", "department"])
-        load_items("courses", Course, ["id", "name", "code", "credits"])
-        load_items("departments", Department, ["id", "name", "head"])
-        load_items("grades", Grade, ["id", "student_id", "course_id", "grade"])
-
-        print(f"Данные загружены из {filename}")
+        # Разбираем XML файл потоково и сразу добавляем сущности в хранилища
+        for section, entity in iter_xml(filename, sections):
+            getattr(data, section).add(entity)
+
+        logger.info("Данные загружены из %s", filename)
     except FileNotFoundError:
-        print(f"Файл {filename} не найден")
+        logger.warning("Файл %s не найден", filename)
+    except ET.ParseError as e:
+        logger.error("Ошибка загрузки XML: %s", e)
+        raise InvalidDataError(f"Некорректный XML в {filename}: {e}") from None
+    except InvalidDataError as e:
+        # Некорректный файл: частично загруженные данные не возвращаются
+        logger.error("Ошибка загрузки XML: %s", e)
+        raise
     except Exception as e:
-        print(f"Ошибка загрузки XML: {e}")
+        logger.error("Ошибка загрузки XML: %s", e)
     return data
 
+# Удаление и обновление через правила ссылочной целостности, если они подключены:
+# зависимые сущности удаляются, обнуляются или запрещают операцию (см. integrity.py)
+def _delete_entity(data: UniversityData, entity_type: str, entity_id: int):
+    if data.integrity is not None:
+        data.integrity.delete(entity_type, entity_id)
+    else:
+        data.store(entity_type).remove(entity_id)
+
+def _update_entity(data: UniversityData, entity_type: str, entity_id: int, changes: dict):
+    if data.integrity is not None:
+        data.integrity.update(entity_type, entity_id, changes)
+    else:
+        data.store(entity_type).update(entity_id, changes)
+
 # Вспомогательная функция для проверки уникальности ID
 def _check_unique_id(data: UniversityData, entity_type: str, new_id: int):
     """Проверяет, что ID является уникальным для данного типа сущности"""
-    # Словарь для связи типа сущности с соответствующим списком
-    entity_map = {
-        "student": data.students,
-        "professor": data.professors,
-        "course": data.courses,
-        "department": data.departments,
-        "grade": data.grades
-    }
-    # Проверяем, существует ли уже сущность с таким ID
-    if entity_type in entity_map and new_id in [item.id for item in entity_map[entity_type]]:
+    # Проверяем по индексу хранилища, существует ли уже сущность с таким ID
+    store = data._stores.get(entity_type)
+    if store is not None and new_id in store:
         raise DuplicateIDError(f"ID {new_id} уже существует")
 
 # Вспомогательная функция для валидации ID
@@ -274,6 +1555,8 @@ def _validate_id(entity_id: int):
 
 # CRUD операции для студентов
 
+@_instrumented(_is_none)
+@_locked("write")
 def create_student(data: UniversityData, **kwargs):
     """Создает нового студента"""
     try:
@@ -285,70 +1568,71 @@ def create_student(data: UniversityData, **kwargs):
         student = Student(**kwargs)
         # Добавляем студента в список
         data.students.append(student)
-        print(f"Студент {kwargs['name']} создан")
+        logger.info("Студент %s создан", kwargs['name'])
         return student
     except Exception as e:
-        print(f"Ошибка создания студента: {e}")
+        logger.warning("Ошибка создания студента: %s", e)
     return None
 
+@_instrumented(_is_false)
+@_locked("write")
 def delete_student(data: UniversityData, student_id: int):
     """Удаляет студента по ID"""
     try:
         # Валидируем ID
         _validate_id(student_id)
-        # Ищем студента в списке
-        for i, student in enumerate(data.students):
-            if student.id == student_id:
-                # Удаляем студента по индексу
-                data.students.pop(i)
-                print(f"Студент с ID {student_id} удален")
-                return True
-        # Если студент не найден, вызываем исключение
-        raise NotFoundError(f"Студент с ID {student_id} не найден")
+        # Проверяем наличие студента по индексу
+        if student_id not in data.students:
+            raise NotFoundError(f"Студент с ID {student_id} не найден")
+        # Удаляем студента по ID за O(1), а его оценки - по индексу, если подключена целостность
+        _delete_entity(data, "student", student_id)
+        logger.info("Студент с ID %s удален", student_id)
+        return True
     except Exception as e:
-        print(f"Ошибка удаления студента: {e}")
+        logger.warning("Ошибка удаления студента: %s", e)
     return False
 
+@_instrumented(_is_none)
+@_locked("read")
 def find_student(data: UniversityData, student_id: int):
     """Находит студента по ID"""
     try:
         # Валидируем ID
         _validate_id(student_id)
-        # Используем генератор для поиска студента
-        student = next((i for i in data.students if i.id == student_id), None)
+        # Ищем студента по индексу хранилища
+        student = data.students.get(student_id)
         if not student:
             raise NotFoundError(f"Студент с ID {student_id} не найден")
         return student
     except Exception as e:
-        print(f"Ошибка поиска студента: {e}")
+        logger.warning("Ошибка поиска студента: %s", e)
     return None
 
+@_instrumented(_is_false)
+@_locked("write")
 def update_student(data: UniversityData, student_id: int, **kwargs):
     """Обновляет данные студента"""
     try:
         # Валидируем ID
         _validate_id(student_id)
-        # Находим студента
-        student = find_student(data, student_id)
-        if not student:
+        # Проверяем наличие напрямую в хранилище: find_student учитывался бы
+        # в метриках как отдельная операция
+        if student_id not in data.students:
             raise NotFoundError(f"Студент с ID {student_id} не найден")
 
-        # Обновляем каждое переданное поле
-        for key, value in kwargs.items():
-            if hasattr(student, key):  # Проверяем, что поле существует
-                if key == 'id':  # Особый случай - проверяем уникальность нового ID
-                    _check_unique_id(data, "student", value)
-                # Устанавливаем новое значение поля
-                setattr(student, key, value)
+        # Обновляем существующие поля; хранилище проверяет уникальность нового ID
+        _update_entity(data, "student", student_id, kwargs)
 
-        print(f"Студент с ID {student_id} обновлен")
+        logger.info("Студент с ID %s обновлен", student_id)
         return True
     except Exception as e:
-        print(f"Ошибка обновления студента: {e}")
+        logger.warning("Ошибка обновления студента: %s", e)
     return False
 
 # Аналогичные CRUD операции для профессоров
 
+@_instrumented(_is_none)
+@_locked("write")
 def create_professor(data: UniversityData, **kwargs):
     """Создает нового профессора"""
     try:
@@ -356,60 +1640,62 @@ def create_professor(data: UniversityData, **kwargs):
         _validate_id(kwargs['id'])
         professor = Professor(**kwargs)
         data.professors.append(professor)
-        print(f"Профессор {kwargs['name']} создан")
+        logger.info("Профессор %s создан", kwargs['name'])
         return professor
     except Exception as e:
-        print(f"Ошибка создания профессора: {e}")
+        logger.warning("Ошибка создания профессора: %s", e)
     return None
 
+@_instrumented(_is_false)
+@_locked("write")
 def delete_professor(data: UniversityData, professor_id: int):
     """Удаляет профессора по ID"""
     try:
         _validate_id(professor_id)
-        for i, professor in enumerate(data.professors):
-            if professor.id == professor_id:
-                data.professors.pop(i)
-                print(f"Профессор с ID {professor_id} удален")
-                return True
-        raise NotFoundError(f"Профессор с ID {professor_id} не найден")
+        if professor_id not in data.professors:
+            raise NotFoundError(f"Профессор с ID {professor_id} не найден")
+        _delete_entity(data, "professor", professor_id)
+        logger.info("Профессор с ID %s удален", professor_id)
+        return True
     except Exception as e:
-        print(f"Ошибка удаления профессора: {e}")
+        logger.warning("Ошибка удаления профессора: %s", e)
     return False
 
+@_instrumented(_is_none)
+@_locked("read")
 def find_professor(data: UniversityData, professor_id: int):
     """Находит профессора по ID"""
     try:
         _validate_id(professor_id)
-        professor = next((p for p in data.professors if p.id == professor_id), None)
+        professor = data.professors.get(professor_id)
         if not professor:
             raise NotFoundError(f"Профессор с ID {professor_id} не найден")
         return professor
     except Exception as e:
-        print(f"Ошибка поиска профессора: {e}")
+        logger.warning("Ошибка поиска профессора: %s", e)
     return None
 
+@_instrumented(_is_false)
+@_locked("write")
 def update_professor(data: UniversityData, professor_id: int, **kwargs):
     """Обновляет данные профессора"""
     try:
         _validate_id(professor_id)
-        professor = find_professor(data, professor_id)
-        if not professor:
+        if professor_id not in data.professors:
             raise NotFoundError(f"Профессор с ID {professor_id} не найден")
 
-        for key, value in kwargs.items():
-            if hasattr(professor, key):
-                if key == 'id':
-                    _check_unique_id(data, "professor", value)
-                setattr(professor, key, value)
+        _update_entity(data, "professor", professor_id, kwargs)
 
-        print(f"Профессор с ID {professor_id} обновлен")
+        logger.info("Профессор с ID %s обновлен", professor_id)
         return True
     except Exception as e:
-        print(f"Ошибка обновления профессора: {e}")
+        logger.warning("Ошибка обновления профессора: %s", e)
     return False
 
 # Аналогичные CRUD операции для курсов
 
+@_instrumented(_is_none)
+@_locked("write")
 def create_course(data: UniversityData, **kwargs):
     """Создает новый курс"""
     try:
@@ -417,60 +1703,254 @@ def create_course(data: UniversityData, **kwargs):
         _validate_id(kwargs['id'])
         course = Course(**kwargs)
         data.courses.append(course)
-        print(f"Курс {kwargs['name']} создан")
+        logger.info("Курс %s создан", kwargs['name'])
         return course
     except Exception as e:
-        print(f"Ошибка создания курса: {e}")
+        logger.warning("Ошибка создания курса: %s", e)
     return None
 
+@_instrumented(_is_false)
+@_locked("write")
 def delete_course(data: UniversityData, course_id: int):
     """Удаляет курс по ID"""
     try:
         _validate_id(course_id)
-        for i, course in enumerate(data.courses):
-            if course.id == course_id:
-                data.courses.pop(i)
-                print(f"Курс с ID {course_id} удален")
-                return True
-        raise NotFoundError(f"Курс с ID {course_id} не найден")
+        if course_id not in data.courses:
+            raise NotFoundError(f"Курс с ID {course_id} не найден")
+        _delete_entity(data, "course", course_id)
+        logger.info("Курс с ID %s удален", course_id)
+        return True
     except Exception as e:
-        print(f"Ошибка удаления курса: {e}")
+        logger.warning("Ошибка удаления курса: %s", e)
     return False
 
+@_instrumented(_is_none)
+@_locked("read")
 def find_course(data: UniversityData, course_id: int):
     """Находит курс по ID"""
     try:
         _validate_id(course_id)
-        course = next((i for i in data.courses if i.id == course_id), None)
+        course = data.courses.get(course_id)
         if not course:
             raise NotFoundError(f"Курс с ID {course_id} не найден")
         return course
     except Exception as e:
-        print(f"Ошибка поиска курса: {e}")
+        logger.warning("Ошибка поиска курса: %s", e)
     return None
 
+@_instrumented(_is_false)
+@_locked("write")
 def update_course(data: UniversityData, course_id: int, **kwargs):
     """Обновляет данные курса"""
     try:
         _validate_id(course_id)
-        course = find_course(data, course_id)
-        if not course:
+        if course_id not in data.courses:
             raise NotFoundError(f"Курс с ID {course_id} не найден")
 
-        for key, value in kwargs.items():
-            if hasattr(course, key):
-                if key == 'id':
-                    _check_unique_id(data, "course", value)
-                setattr(course, key, value)
+        _update_entity(data, "course", course_id, kwargs)
 
-        print(f"Курс с ID {course_id} обновлен")
+        logger.info("Курс с ID %s обновлен", course_id)
         return True
     except Exception as e:
-        print(f"Ошибка обновления курса: {e}")
+        logger.warning("Ошибка обновления курса: %s", e)
     return False
 
+# Пакетные CRUD операции для всех типов сущностей
+
+# Классы сущностей по имени типа ("student", "grade", ...)
+ENTITY_TYPES = {class_type.__name__.lower(): class_type for class_type in SECTIONS.values()}
+
+class BatchFailure:
+    """Ошибка одной записи пакета: позиция в пакете, сама запись и исключение"""
+    __slots__ = ("index", "record", "error")
+
+    def __init__(self, index: int, record, error: UniversityDataError):
+        self.index = index
+        self.record = record
+        self.error = error
+
+    def __repr__(self):
+        return f"BatchFailure(index={self.index}, error={self.error!r})"
+
+class BatchResult:
+    """Результат пакетной операции.
+
+    Пакет применяется атомарно: если failures не пуст, данные не изменены
+    и applied равен 0.
+    """
+    __slots__ = ("applied", "failures")
+
+    def __init__(self):
+        self.applied = 0
+        self.failures: List[BatchFailure] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def __repr__(self):
+        return f"BatchResult(applied={self.applied}, failures={self.failures!r})"
+
+def _entity_class(entity_type: str):
+    try:
+        return ENTITY_TYPES[entity_type]
+    except KeyError:
+        raise InvalidDataError(f"Неизвестный тип сущности: {entity_type}") from None
+
+@_instrumented(_batch_failed)
+@_locked("write")
+def create_many(data: UniversityData, entity_type: str, records: Iterable[dict]) -> BatchResult:
+    """Создает пакет сущностей одного типа за один проход.
+
+    Проверяет набор полей, типы значений и ID каждой записи, дубликаты внутри пакета и пересечения
+    с уже существующими ID. Если хотя бы одна запись невалидна, ничего не
+    добавляется, а ошибки возвращаются в BatchResult.failures.
+    """
+    class_type = _entity_class(entity_type)
+    schema = SCHEMAS[class_type]
+    store = data.store(entity_type)
+    result = BatchResult()
+    entities = []
+    seen = set()
+    for index, record in enumerate(records):
+        try:
+            schema.check(record)
+            entity_id = record['id']
+            _validate_id(entity_id)
+            if entity_id in seen or entity_id in store:
+                raise DuplicateIDError(f"ID {entity_id} уже существует")
+            seen.add(entity_id)
+            entities.append(class_type(**record))
+        except UniversityDataError as e:
+            result.failures.append(BatchFailure(index, record, e))
+
+    if not result.failures:
+        store.extend(entities)
+        result.applied = len(entities)
+    return result
+
+@_instrumented(_batch_failed)
+@_locked("write")
+def update_many(data: UniversityData, entity_type: str, updates: Iterable) -> BatchResult:
+    """Обновляет пакет сущностей; updates - пары (id, {поле: значение}).
+
+    Каждая сущность может встречаться в пакете один раз, новые ID должны быть
+    уникальны, значения полей проверяются по типам схемы. Пакет применяется
+    только целиком.
+    """
+    schema = SCHEMAS[_entity_class(entity_type)]
+    store = data.store(entity_type)
+    result = BatchResult()
+    valid = []
+    seen = set()
+    new_ids = set()
+    for index, item in enumerate(updates):
+        try:
+            try:
+                entity_id, changes = item
+            except (TypeError, ValueError):
+                raise InvalidDataError(f"Ожидалась пара (id, изменения), получено {item!r}") from None
+            _validate_id(entity_id)
+            if entity_id not in store:
+                raise NotFoundError(f"ID {entity_id} не найден")
+            if entity_id in seen:
+                raise DuplicateIDError(f"ID {entity_id} встречается в пакете повторно")
+            schema.check(changes, partial=True)
+            new_id = changes.get('id', entity_id)
+            if new_id != entity_id:
+                _validate_id(new_id)
+                if new_id in store or new_id in new_ids:
+                    raise DuplicateIDError(f"ID {new_id} уже существует")
+                new_ids.add(new_id)
+            if data.integrity is not None:
+                # Запрет (restrict) проверяем до применения, чтобы пакет остался атомарным
+                data.integrity.plan_update(entity_type, entity_id, changes)
+            seen.add(entity_id)
+            valid.append((entity_id, changes))
+        except UniversityDataError as e:
+            result.failures.append(BatchFailure(index, item, e))
+
+    if not result.failures:
+        for entity_id, changes in valid:
+            _update_entity(data, entity_type, entity_id, changes)
+        result.applied = len(valid)
+    return result
+
+@_instrumented(_batch_failed)
+@_locked("write")
+def delete_many(data: UniversityData, entity_type: str, ids: Iterable[int]) -> BatchResult:
+    """Удаляет пакет сущностей по ID; пакет применяется только целиком"""
+    _entity_class(entity_type)
+    store = data.store(entity_type)
+    result = BatchResult()
+    valid = []
+    seen = set()
+    for index, entity_id in enumerate(ids):
+        try:
+            _validate_id(entity_id)
+            if entity_id in seen:
+                raise DuplicateIDError(f"ID {entity_id} встречается в пакете повторно")
+            if entity_id not in store:
+                raise NotFoundError(f"ID {entity_id} не найден")
+            if data.integrity is not None:
+                data.integrity.plan_delete(entity_type, entity_id)
+            seen.add(entity_id)
+            valid.append(entity_id)
+        except UniversityDataError as e:
+            result.failures.append(BatchFailure(index, entity_id, e))
+
+    if not result.failures:
+        for entity_id in valid:
+            _delete_entity(data, entity_type, entity_id)
+        result.applied = len(valid)
+    return result
+
+# Запросы по оценкам, использующие индексы GradeStore
+
+@_locked("read")
+def grades_for_student(data: UniversityData, student_id: int) -> List[Grade]:
+    """Возвращает все оценки студента"""
+    try:
+        _validate_id(student_id)
+        return data.grades.for_student(student_id)
+    except Exception as e:
+        logger.warning("Ошибка получения оценок студента: %s", e)
+    return []
+
+@_locked("read")
+def grades_for_course(data: UniversityData, course_id: int) -> List[Grade]:
+    """Возвращает все оценки по курсу"""
+    try:
+        _validate_id(course_id)
+        return data.grades.for_course(course_id)
+    except Exception as e:
+        logger.warning("Ошибка получения оценок курса: %s", e)
+    return []
+
+@_locked("read")
+def average_grade(data: UniversityData, student_id: int) -> Optional[float]:
+    """Возвращает средний балл студента или None, если оценок нет"""
+    grades = grades_for_student(data, student_id)
+    if not grades:
+        return None
+    return sum(g.grade for g in grades) / len(grades)
+
+@_locked("read")
+def course_statistics(data: UniversityData, course_id: int) -> dict:
+    """Возвращает статистику по курсу: количество, среднее, минимум, максимум и медиану"""
+    values = sorted(g.grade for g in grades_for_course(data, course_id))
+    count = len(values)
+    if not count:
+        return {"count": 0, "average": None, "min": None, "max": None, "median": None}
+    middle = count // 2
+    median = values[middle] if count % 2 else (values[middle - 1] + values[middle]) / 2
+    return {"count": count, "average": sum(values) / count,
+            "min": values[0], "max": values[-1], "median": median}
+
 # Основная функция программы
 def main():
+    # Демонстрация показывает сообщения операций, которые библиотека пишет в журнал
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     try:
         print("=== СИСТЕМА УПРАВЛЕНИЯ УНИВЕРСИТЕТОМ ===\n")
 
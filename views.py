@@ -0,0 +1,198 @@
+"""Кэшируемые производные представления данных университета.
+
+Представление - именованная функция от UniversityData (например, списки
+студентов по факультетам), которая вычисляется при первом обращении и
+хранится в LRU кэше ограниченного размера. ViewCache подписывается на
+изменения данных и сбрасывает только те представления, от полей которых
+они зависят: смена Student.faculty сбрасывает students_by_faculty, а смена
+Student.name - нет, так как представления содержат сами объекты сущностей.
+
+Прямое присваивание атрибутов сущностей (в обход create_*/update_*/delete_*
+и методов хранилищ) не порождает событий; после него нужен invalidate().
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from unik import InvalidDataError, UniversityData
+
+# Размер кэша по умолчанию (число сохраненных результатов)
+DEFAULT_MAXSIZE = 128
+
+_MISSING = object()
+
+
+class ViewDefinition:
+    """Описание представления: функция вычисления и поля, от которых оно зависит.
+
+    depends - {тип сущности: поля}; пустой набор полей означает, что
+    представление зависит только от добавления и удаления сущностей.
+    scope - {тип сущности: функция(entity)}, возвращающая аргументы
+    единственного результата, затронутого созданием или удалением сущности
+    этого типа (None - сбросить все результаты представления).
+    """
+    __slots__ = ("name", "compute", "depends", "scope")
+
+    def __init__(self, name: str, compute: Callable, depends: Dict[str, FrozenSet[str]],
+                 scope: Optional[Dict[str, Callable]] = None):
+        self.name = name
+        self.compute = compute
+        self.depends = {entity_type: frozenset(fields) for entity_type, fields in depends.items()}
+        self.scope = scope or {}
+
+    def __repr__(self):
+        return f"ViewDefinition({self.name!r}, depends={self.depends})"
+
+
+# Встроенные представления
+
+def students_by_faculty(data: UniversityData) -> Dict[str, list]:
+    """Факультет -> список студентов в порядке хранилища"""
+    result: Dict[str, list] = {}
+    for student in data.students:
+        result.setdefault(student.faculty, []).append(student)
+    return result
+
+
+def professors_by_department(data: UniversityData) -> Dict[str, list]:
+    """Кафедра -> список профессоров в порядке хранилища"""
+    result: Dict[str, list] = {}
+    for professor in data.professors:
+        result.setdefault(professor.department, []).append(professor)
+    return result
+
+
+def course_enrollments(data: UniversityData, course_id: int) -> list:
+    """Студенты, у которых есть оценки по курсу, в порядке первой оценки"""
+    students = data.students
+    seen = set()
+    result = []
+    for grade in data.grades.for_course(course_id):
+        student_id = grade.student_id
+        if student_id not in seen:
+            seen.add(student_id)
+            student = students.get(student_id)
+            if student is not None:
+                result.append(student)
+    return result
+
+
+BUILTIN_VIEWS = (
+    ViewDefinition("students_by_faculty", students_by_faculty, {"student": {"faculty"}}),
+    ViewDefinition("professors_by_department", professors_by_department, {"professor": {"department"}}),
+    # Новая или удаленная оценка затрагивает только список своего курса
+    ViewDefinition("course_enrollments", course_enrollments,
+                   {"grade": {"student_id", "course_id"}, "student": {"id"}},
+                   scope={"grade": lambda grade: (grade.course_id,)}),
+)
+
+
+class ViewCache:
+    """LRU кэш представлений над UniversityData с точной инвалидацией.
+
+    Результаты отдаются без копирования и не должны изменяться вызывающим кодом.
+    """
+
+    def __init__(self, data: UniversityData, maxsize: int = DEFAULT_MAXSIZE, views=BUILTIN_VIEWS):
+        self.data = data
+        self.maxsize = maxsize
+        self._views: Dict[str, ViewDefinition] = {}
+        # Тип сущности -> представления, которые от него зависят
+        self._dependents: Dict[str, List[ViewDefinition]] = {}
+        # (имя, аргументы) -> результат в порядке давности использования
+        self._entries: "OrderedDict[tuple, object]" = OrderedDict()
+        # Имя представления -> ключи его сохраненных результатов
+        self._keys: Dict[str, set] = {}
+        # Слушатель изменений вызывается в потоке писателя, а get - в потоках читателей
+        self._mutex = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        for view in views:
+            self.register(view)
+        data.subscribe(self._on_change)
+
+    def register(self, view: ViewDefinition):
+        """Добавляет представление; имя должно быть уникальным"""
+        if view.name in self._views:
+            raise InvalidDataError(f"Представление {view.name} уже зарегистрировано")
+        self._views[view.name] = view
+        self._keys[view.name] = set()
+        for entity_type in view.depends:
+            self._dependents.setdefault(entity_type, []).append(view)
+
+    def get(self, name: str, *args):
+        """Возвращает результат представления, вычисляя его при первом обращении"""
+        key = (name, args)
+        with self._mutex:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        view = self._views.get(name)
+        if view is None:
+            raise InvalidDataError(f"Неизвестное представление: {name}")
+        with self.data.lock.read():
+            value = view.compute(self.data, *args)
+            with self._mutex:
+                self._entries[key] = value
+                self._keys[name].add(key)
+                while len(self._entries) > self.maxsize:
+                    old_key, _ = self._entries.popitem(last=False)
+                    self._keys[old_key[0]].discard(old_key)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, name: Optional[str] = None, *args):
+        """Сбрасывает результаты представления (или всех представлений).
+
+        С аргументами сбрасывается только результат для этих аргументов.
+        """
+        with self._mutex:
+            if name is None:
+                keys = list(self._entries)
+            elif args:
+                keys = [(name, args)]
+            else:
+                keys = list(self._keys.get(name, ()))
+            for key in keys:
+                if self._entries.pop(key, _MISSING) is not _MISSING:
+                    self._keys[key[0]].discard(key)
+                    self.invalidations += 1
+
+    def _on_change(self, entity_type: str, op: str, entity_id, entity, changes):
+        for view in self._dependents.get(entity_type, ()):
+            if op == "update":
+                fields = view.depends[entity_type]
+                if not fields or fields.isdisjoint(changes):
+                    continue
+            elif op in ("create", "delete") and entity_type in view.scope:
+                args = view.scope[entity_type](entity)
+                if args is not None:
+                    self.invalidate(view.name, *args)
+                    continue
+            self.invalidate(view.name)
+
+    def stats(self) -> dict:
+        """Счетчики попаданий, промахов, вытеснений и сбросов"""
+        with self._mutex:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "invalidations": self.invalidations, "size": len(self._entries),
+                    "maxsize": self.maxsize}
+
+    def close(self):
+        """Отписывается от изменений данных и очищает кэш"""
+        self.data.unsubscribe(self._on_change)
+        with self._mutex:
+            self._entries.clear()
+            for keys in self._keys.values():
+                keys.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+